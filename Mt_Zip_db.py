@@ -1,30 +1,27 @@
-import requests
-import pandas as pd
-from datetime import date, datetime
+import argparse
+from datetime import datetime
 from dotenv import load_dotenv
 import os
 import pytz
 import logging
-from google.oauth2 import service_account
-import gspread
-from gspread_dataframe import set_with_dataframe
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from openpyxl import Workbook
 
-# === Load .env ===
+# === Load .env === (before odoo_client, which reads the Odoo settings on import)
 load_dotenv()
 
+import google_clients  # noqa: E402
+import incremental_sync  # noqa: E402
+from forecast_cache import forecast_cache  # noqa: E402
+from odoo_client import COMPANIES, FROM_DATE, PAGE_SIZE, TO_DATE, OdooClient  # noqa: E402
+from run_manifest import RunManifest  # noqa: E402
+from run_metrics import stage, write_report  # noqa: E402
+from sheet_sync import SheetSync  # noqa: E402
+from snapshot_store import SnapshotStore, as_exported, coerce_ledger  # noqa: E402
+
 # ========= CONFIG ==========
-ODOO_URL = os.getenv("ODOO_URL")
-DB = os.getenv("ODOO_DB")
-USERNAME = os.getenv("ODOO_USERNAME")
-PASSWORD = os.getenv("ODOO_PASSWORD")
-
-COMPANIES = {
-    1: "Zipper",
-    3: "Metal Trims",
-}
-
-FROM_DATE = "2025-01-01"
-TO_DATE = date.today().strftime("%Y-%m-%d")
 DOWNLOAD_DIR = os.path.join(os.getcwd(), "download")
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
@@ -32,233 +29,323 @@ os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger()
 
-# === Session ===
-session = requests.Session()
-USER_ID = None
+# === Local snapshot store ===
+store = SnapshotStore()
+
+
+# === Default client (module-level helpers below delegate to it) ===
+client = OdooClient()
+
 
-# ========= LOGIN ==========
 def login():
-    global USER_ID
-    payload = {
-        "jsonrpc": "2.0",
-        "params": {"db": DB, "login": USERNAME, "password": PASSWORD}
-    }
-    r = session.post(f"{ODOO_URL}/web/session/authenticate", json=payload)
-    r.raise_for_status()
-    result = r.json().get("result")
-    if result and "uid" in result:
-        USER_ID = result["uid"]
-        log.info(f"✅ Logged in (uid={USER_ID})")
-        return result
-    raise Exception("❌ Login failed")
-
-# ========= SWITCH COMPANY ==========
+    return client.login()
+
+
 def switch_company(company_id):
-    if USER_ID is None:
-        raise Exception("User not logged in yet")
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "res.users",
-            "method": "write",
-            "args": [[USER_ID], {"company_id": company_id}],
-            "kwargs": {"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-    if "error" in r.json():
-        log.error(f"❌ Failed to switch company {company_id}: {r.json()['error']}")
-        return False
-    log.info(f"🔄 Switched to company {company_id}")
-    return True
-
-# ========= CREATE FORECAST WIZARD ==========
-def create_forecast_wizard(company_id):
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.forecast.report",
-            "method": "create",
-            "args": [{"from_date": FROM_DATE, "to_date": TO_DATE}],
-            "kwargs": {"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-    wiz_id = r.json()["result"]
-    log.info(f"🪄 Created wizard {wiz_id} for company {company_id}")
-    return wiz_id
-
-# ========= COMPUTE FORECAST ==========
+    return client.switch_company(company_id)
+
+
+def create_forecast_wizard(company_id, from_date=None, to_date=None):
+    return client.create_forecast_wizard(company_id, from_date, to_date)
+
+
 def compute_forecast(company_id, wizard_id):
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.forecast.report",
-            "method": "print_date_wise_stock_register",
-            "args": [[wizard_id]],
-            "kwargs": {
-                "context": {
-                    "lang": "en_US",
-                    "tz": "Asia/Dhaka",
-                    "uid": USER_ID,
-                    "allowed_company_ids": [company_id],
-                    "company_id": company_id,
-                }
-            },
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_button", json=payload)
-    r.raise_for_status()
-    log.info(f"⚡ Forecast computed for wizard {wizard_id} (company {company_id})")
-    return r.json()
-
-# ========= FETCH OPENING/CLOSING WITH LABELS ==========
+    return client.compute_forecast(company_id, wizard_id)
+
+
+def ensure_forecast(company_id, from_date=None, to_date=None):
+    return client.ensure_forecast(company_id, from_date, to_date)
+
+
+def iter_opening_closing(company_id, cname, page_size=PAGE_SIZE):
+    return client.iter_opening_closing(company_id, cname, page_size)
+
+
 def fetch_opening_closing(company_id, cname):
-    context = {"allowed_company_ids": [company_id], "company_id": company_id}
-    
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.opening.closing",
-            "method": "web_search_read",
-            "args": [],
-            "kwargs": {
-                "specification": {
-                    "parent_category": {"fields": {"display_name": {}}},  # Product
-                    "product_category": {"fields": {"display_name": {}}}, # Category
-                    "product_id": {"fields": {"display_name": {}}},       # Item
-                    "pr_code": {},                                         # Item Code
-                    "lot_id": {"fields": {"display_name": {}}},           # Invoice
-                    "receive_date": {},                                    # Receive Date
-                    "pur_price": {},                                       # Pur Price
-                    "landed_cost": {},                                     # Landed Cost
-                    "lot_price": {},                                       # Price
-                    "product_uom": {"fields": {"display_name": {}}},      # Unit
-                    "opening_qty": {},                                     # Opening Quantity
-                    "opening_value": {},                                   # Opening Value
-                    "receive_qty": {},                                     # Receive Quantity
-                    "receive_value": {},                                   # Receive Value
-                    "issue_qty": {},                                       # Issue Quantity
-                    "issue_value": {},                                     # Issue Value
-                    "cloing_qty": {},                                      # Closing Quantity
-                    "cloing_value": {},                                    # Closing Value
-                    "po_type": {},                                         # Po Type
-                    "rejected": {},                                        # Rejected
-                    "shipment_mode": {},                                   # Shipment Mode
-                },
-                "offset": 0,
-                "limit": 5000,
-                "context": {**context, "active_model": "stock.forecast.report", "active_id": 0, "active_ids": [0]},
-                "count_limit": 10000,
-                "domain": [["product_id.categ_id.complete_name", "ilike", "All / RM"]],
-            },
-        },
-    }
-
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-
-    try:
-        records = r.json()["result"]["records"]
-
-        # Flatten nested dicts → keep only display_name
-        def flatten(record):
-            flat = {}
-            for k, v in record.items():
-                if isinstance(v, dict) and "display_name" in v:
-                    flat[k] = v["display_name"]
-                else:
-                    flat[k] = v
-            return flat
-
-        flattened = [flatten(rec) for rec in records]
-
-        # Convert to DataFrame
-        df = pd.DataFrame(flattened)
-
-        # Drop unwanted 'id' column if exists
-        if "id" in df.columns:
-            df.drop(columns=["id"], inplace=True)
-
-        # Map internal fields to human-readable labels
-        FIELD_LABELS = {
-            "parent_category": "Product",
-            "product_category": "Category",
-            "product_id": "Item",
-            "pr_code": "Item Code",
-            "lot_id": "Invoice",
-            "receive_date": "Receive Date",
-            "pur_price": "Pur Price",
-            "landed_cost": "Landed Cost",
-            "lot_price": "Price",
-            "product_uom": "Unit",
-            "opening_qty": "Opening Quantity",
-            "opening_value": "Opening Value",
-            "receive_qty": "Receive Quantity",
-            "receive_value": "Receive Value",
-            "issue_qty": "Issue Quantity",
-            "issue_value": "Issue Value",
-            "cloing_qty": "Closing Quantity",
-            "cloing_value": "Closing Value",
-            "po_type": "Po Type",
-            "rejected": "Rejected",
-            "shipment_mode": "Shipment Mode",
-        }
-
-        df.rename(columns=FIELD_LABELS, inplace=True)
-
-        log.info(f"📊 {cname}: {len(df)} rows fetched with labels")
-        return df
-
-    except Exception as e:
-        log.error(f"❌ {cname}: Failed to parse report: {r.text[:200]} | Error: {e}")
-        return pd.DataFrame()
+    return client.fetch_opening_closing(company_id, cname)
 
 
+def consumption_summary(company_id, cname, by_date=None):
+    return client.consumption_summary(company_id, cname, by_date)
 
 
+def fetch_ledger(company_id, cname):
+    return client.fetch_ledger(company_id, cname)
 
-# ========= PASTE TO GOOGLE SHEETS ==========
-def paste_to_google_sheet(df, sheet_key, worksheet_name):
-    if df.empty:
-        log.warning("DataFrame empty. Skipping Google Sheet update.")
-        return
-    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds = service_account.Credentials.from_service_account_file("service_account.json", scopes=scope)
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(sheet_key)
-    worksheet = sheet.worksheet(worksheet_name)
-    worksheet.clear()
-    set_with_dataframe(worksheet, df)
+
+# ========= STREAMING WRITERS ==========
+def _excel_rows(df):
+    # openpyxl cannot write NaN; blank cells instead
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def open_worksheet(sheet_key, worksheet_name):
+    # Shared, cached client and handles: one auth and one metadata read per run
+    return google_clients.open_worksheet(sheet_key, worksheet_name)
+
+
+def stamp_worksheet(worksheet, n_cols, worksheet_name):
     tz = pytz.timezone("Asia/Dhaka")
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
     # Write timestamp in last column safely
-    last_col = chr(65 + min(25, df.shape[1]))  # A-Z, max 26 columns
+    last_col = chr(65 + min(25, n_cols))  # A-Z, max 26 columns
     worksheet.update(f"{last_col}2", [[timestamp]])
     log.info(f"✅ Data pasted to {worksheet_name} & timestamp updated: {timestamp}")
 
+
+def stream_to_outputs(batches, cname, local_file=None):
+    """
+    Write each fetched batch to today's snapshot partition and the optional
+    local xlsx (write-only mode) as it arrives, so only one page is held in
+    memory at a time. Returns rows written.
+    """
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None or first.empty:
+        log.warning("DataFrame empty. Skipping snapshot and Google Sheet update.")
+        return 0
+
+    xl_ws = None
+    if local_file:
+        wb = Workbook(write_only=True)
+        xl_ws = wb.create_sheet("Sheet1")
+        xl_ws.append(list(first.columns))
+
+    n_rows = 0
+    with stage("fetch + snapshot") as st, store.writer(cname, TO_DATE) as snapshot:
+        for batch in chain([first], batches):
+            snapshot.write(batch)
+            if xl_ws is not None:
+                for row in _excel_rows(batch):
+                    xl_ws.append(row)
+            n_rows += len(batch)
+            st.add(rows=len(batch))
+    log.info(f"🗄️ {cname}: snapshot {TO_DATE} stored ({n_rows} rows)")
+
+    if xl_ws is not None:
+        with stage("xlsx write", rows=n_rows):
+            wb.save(local_file)
+        log.info(f"📂 Saved locally: {local_file} ({n_rows} rows)")
+    return n_rows
+
+
+# ========= PASTE TO GOOGLE SHEETS ==========
+def paste_to_google_sheet(df, sheet_key, worksheet_name):
+    """Push only the rows/cells that changed since the last push (see sheet_sync.py); the tab is never cleared."""
+    if df.empty:
+        log.warning("DataFrame empty. Skipping Google Sheet update.")
+        return
+    worksheet = open_worksheet(sheet_key, worksheet_name)
+    # Rendered like the web export Zipper.py pushes to the same tab (text dates, FALSE
+    # for empty fields), so the two writers agree on every cell and share one diff state
+    SheetSync(worksheet, worksheet_name).push(as_exported(df))
+    stamp_worksheet(worksheet, df.shape[1], worksheet_name)
+
+# ========= COMPANY PIPELINE ==========
+SHEET_KEY = "1tSgmESOWqYRkDk_KhewnaaJmQGSUaSILzOzpade9tRc"
+
+# The Parquet snapshot store is the primary local output; the dated xlsx dumps
+# are only written when EXPORT_XLSX=1.
+EXPORT_XLSX = os.getenv("EXPORT_XLSX", "0") == "1"
+
+# Run each company on its own session at the same time. Set PARALLEL_COMPANIES=0
+# to fall back to one shared session switching company via res.users.write.
+PARALLEL_COMPANIES = os.getenv("PARALLEL_COMPANIES", "1") != "0"
+
+# Recompute only the days since the last run's TO_DATE and merge them into the
+# local snapshot (see incremental_sync.py). Set INCREMENTAL_SYNC=0 for full runs.
+INCREMENTAL_SYNC = os.getenv("INCREMENTAL_SYNC", "0") == "1"
+
+
+def worksheet_for(cid, cname):
+    # Worksheet name based on company
+    return "Zipper" if cid == 1 else "Metal" if cid == 3 else cname
+
+
+def sync_company(odoo, cid, cname, manifest=None):
+    """
+    Wizard → compute → fetch → xlsx → Sheets for one company. Returns rows written.
+
+    Each stage is checkpointed in `manifest`: on a resumed run the stages that
+    already succeeded are skipped and their stored output reused.
+    """
+    manifest = manifest or RunManifest.ephemeral()
+    if INCREMENTAL_SYNC:
+        return sync_company_incremental(odoo, cid, cname, manifest)
+
+    fetched = manifest.get(cname, "fetch")
+    if fetched is None:
+        with manifest.step(cname, "fetch") as step:
+            # Skipped when the same range was computed recently and the rows are untouched
+            with stage("wizard compute") as st:
+                st.note(cache="hit" if odoo.ensure_forecast(cid) else "miss")
+            local_file = os.path.join(DOWNLOAD_DIR, f"{cname.lower().replace(' ', '')}_opening_closing_{TO_DATE}.xlsx")
+
+            # Stream pages straight into the snapshot store and the optional xlsx
+            n_rows = stream_to_outputs(
+                odoo.iter_opening_closing(cid, cname),
+                cname,
+                local_file=local_file if EXPORT_XLSX else None,
+            )
+            step.note(rows=n_rows, as_of=TO_DATE)
+            if n_rows:
+                step.keep_file(store.path(cname, TO_DATE))
+                if EXPORT_XLSX:
+                    step.keep_file(local_file)
+        fetched = manifest.get(cname, "fetch")
+        log.info(f"📊 {cname}: {fetched['rows']} rows fetched with labels")
+
+    if fetched["rows"] and not manifest.done(cname, "sheets push"):
+        with manifest.step(cname, "sheets push") as step:
+            df = store.read(cname, fetched["as_of"])
+            paste_to_google_sheet(df, SHEET_KEY, worksheet_for(cid, cname))
+            step.note(rows=len(df))
+    return fetched["rows"]
+
+
+def sync_company_incremental(odoo, cid, cname, manifest):
+    """
+    Compute and fetch only the window after the stored watermark, merge it into
+    the local snapshot and push downstream only when rows actually changed.
+    Returns the number of new or changed rows.
+
+    The fetched window is kept as a Parquet artifact of the run, so a resumed
+    run redoes the merge, push and state save without touching Odoo.
+    """
+    saved = manifest.get(cname, "save state")
+    if saved is not None:
+        return saved["rows"]
+
+    watermark = incremental_sync.load_watermark(cname)
+    fetched = manifest.get(cname, "fetch")
+    if fetched is None:
+        window = incremental_sync.plan_window(watermark, FROM_DATE, TO_DATE)
+        if window is None:
+            log.info(f"⏭️ {cname}: snapshot already current up to {watermark['to_date']}")
+            return 0
+
+        window_from, window_to = window
+        with manifest.step(cname, "fetch") as step:
+            with stage("wizard compute", window=f"{window_from}..{window_to}") as st:
+                st.note(cache="hit" if odoo.ensure_forecast(cid, window_from, window_to) else "miss")
+            with stage("fetch") as st:
+                # Must raise: an empty frame here would be merged, saved and move the watermark past unfetched days
+                df_window = odoo.read_opening_closing(cid, cname)
+                st.add(rows=len(df_window))
+            step.keep_frame(df_window)
+            step.note(rows=len(df_window), window_from=window_from, window_to=window_to)
+        fetched = manifest.get(cname, "fetch")
+    else:
+        df_window = manifest.frame(cname, "fetch")
+
+    window_from, window_to = fetched["window_from"], fetched["window_to"]
+    full = window_from == FROM_DATE
+    log.info(f"🧩 {cname}: {'full range' if full else 'window'} {window_from}..{window_to} → {len(df_window)} rows")
+
+    # The watermark only moves in "save state", so merging again on resume gives the same rows
+    with stage("merge + diff") as st:
+        df_window = coerce_ledger(df_window)
+        snapshot = df_window if full else coerce_ledger(incremental_sync.merge_window(incremental_sync.load_snapshot(cname), df_window))
+        previous = None if full else watermark.get("row_hashes")
+        changed, hashes = incremental_sync.changed_rows(snapshot, previous)
+        st.add(rows=len(changed))
+
+    if changed.empty:
+        log.info(f"✅ {cname}: no row changes, downstream untouched")
+    elif not manifest.done(cname, "sheets push"):
+        log.info(f"🔁 {cname}: {len(changed)} new/changed rows")
+        with manifest.step(cname, "sheets push") as step:
+            if EXPORT_XLSX:
+                slug = incremental_sync.company_slug(cname)
+                changes_file = os.path.join(DOWNLOAD_DIR, f"{slug}_opening_closing_changes_{TO_DATE}.xlsx")
+                with stage("xlsx write", rows=len(changed)):
+                    changed.to_excel(changes_file, index=False)
+                log.info(f"📂 Saved locally: {changes_file}")
+                step.keep_file(changes_file)
+            paste_to_google_sheet(snapshot, sheet_key=SHEET_KEY, worksheet_name=worksheet_for(cid, cname))
+            step.note(rows=len(snapshot))
+
+    # Persist only after downstream succeeded so a failed push is retried next run
+    with manifest.step(cname, "save state") as step, stage("save state", rows=len(snapshot)):
+        incremental_sync.save_snapshot(cname, window_to, snapshot)
+        incremental_sync.save_watermark(cname, FROM_DATE, window_to, hashes)
+        step.note(rows=len(changed))
+    return len(changed)
+
+
+def needs_odoo(manifest, cname):
+    """False when a resumed run already has this company's fetch, so no Odoo session is needed."""
+    return manifest is None or not (manifest.done(cname, "fetch") or manifest.done(cname, "save state"))
+
+
+def _sync_isolated(cid, cname, manifest):
+    # A dedicated session per company: the company is carried only in each
+    # call's allowed_company_ids context, never via the shared user record.
+    with stage("company sync", company=cname) as st:
+        odoo = OdooClient()
+        if needs_odoo(manifest, cname):
+            # A stage like the others, so a session that never came up fails the run
+            with manifest.step(cname, "login"):
+                odoo.login()
+        n_rows = sync_company(odoo, cid, cname, manifest)
+        st.add(rows=n_rows)
+        return n_rows
+
+
+def run_companies(companies=COMPANIES, parallel=PARALLEL_COMPANIES, manifest=None):
+    """Run every company's pipeline and return {cname: rows written or the Exception raised}."""
+    manifest = manifest or RunManifest.ephemeral()
+    results = {}
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(companies)) as pool:
+            futures = {cname: pool.submit(_sync_isolated, cid, cname, manifest) for cid, cname in companies.items()}
+            for cname, future in futures.items():
+                try:
+                    results[cname] = future.result()
+                except Exception as e:
+                    results[cname] = e
+    else:
+        login_error = None
+        if any(needs_odoo(manifest, cname) for cname in companies.values()):
+            try:
+                login()
+            except Exception as e:
+                login_error = e
+        for cid, cname in companies.items():
+            try:
+                if needs_odoo(manifest, cname):
+                    # Recorded per company, so a failed login or switch fails the run and can be resumed
+                    with manifest.step(cname, "login"):
+                        if login_error is not None:
+                            raise login_error
+                        if not switch_company(cid):
+                            raise Exception(f"Failed to switch to company {cid}")
+                with stage("company sync", company=cname) as st:
+                    results[cname] = sync_company(client, cid, cname, manifest)
+                    st.add(rows=results[cname])
+            except Exception as e:
+                results[cname] = e
+
+    for cname, outcome in results.items():
+        if isinstance(outcome, Exception):
+            log.error(f"❌ {cname}: Failed to sync report | Error: {outcome}")
+        else:
+            log.info(f"✅ {cname}: synced {outcome} rows")
+    stats = forecast_cache().stats()
+    log.info(f"♻️ Forecast cache: {stats['hits']} hits / {stats['misses']} misses this run")
+    return results
+
+
 # ========= MAIN SYNC ==========
 if __name__ == "__main__":
-    login()
-    for cid, cname in COMPANIES.items():
-        if switch_company(cid):
-            wiz_id = create_forecast_wizard(cid)
-            compute_forecast(cid, wiz_id)
-            df = fetch_opening_closing(cid, cname)
-            if not df.empty:
-                # Save locally
-                local_file = os.path.join(DOWNLOAD_DIR, f"{cname.lower().replace(' ', '')}_opening_closing_{TO_DATE}.xlsx")
-                df.to_excel(local_file, index=False)
-                log.info(f"📂 Saved locally: {local_file}")
-
-                # Worksheet name based on company
-                worksheet_name = "Zipper" if cid == 1 else "Metal" if cid == 3 else cname
-
-                # Paste to Google Sheets
-                paste_to_google_sheet(df, sheet_key="1tSgmESOWqYRkDk_KhewnaaJmQGSUaSILzOzpade9tRc", worksheet_name=worksheet_name)
+    parser = argparse.ArgumentParser(description="Sync the opening/closing ledger of every company to Google Sheets")
+    parser.add_argument("--resume", nargs="?", const=True, metavar="RUN_ID",
+                        help="continue the last unfinished run (or RUN_ID), skipping the stages that already succeeded")
+    args = parser.parse_args()
+    manifest = RunManifest.open("mt_zip_db", resume=args.resume)
+    run_companies(manifest=manifest)
+    ok = manifest.finish("Mt_Zip_db.py")
+    write_report()
+    # Fails the job when a company did not sync, with the resume command logged
+    if not ok:
+        sys.exit(1)
@@ -1,176 +1,66 @@
+import argparse
 import sys
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import os
-import time
-import re
-from pathlib import Path
-import pandas as pd
-from google.auth.transport.requests import Request
-from google.oauth2 import service_account
-import gspread
-from gspread_dataframe import set_with_dataframe
 from datetime import datetime
 import pytz
 
+from google_clients import open_worksheet
+from odoo_export import export_company
+from run_manifest import RunManifest
+from sheet_sync import SheetSync
+from xlsx_loader import load_report
+
 # === Setup Logging ===
 # This sets up logging to the console (GitHub Actions will capture this)
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 log = logging.getLogger()
 
+# === Resume a failed run instead of exporting again ===
+parser = argparse.ArgumentParser(description="Export the Zipper opening/closing report and push it to Google Sheets")
+parser.add_argument("--resume", nargs="?", const=True, metavar="RUN_ID",
+                    help="reuse the export of the last unfinished run (or RUN_ID) and retry only the upload")
+args = parser.parse_args()
+manifest = RunManifest.open("zipper", resume=args.resume)
+
 # === Setup: Linux-compatible download directory ===
 download_dir = os.path.join(os.getcwd(), "download")
 os.makedirs(download_dir, exist_ok=True)
 
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--headless")  # Comment this line for debug
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--window-size=1920,1080")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": download_dir,
-    "download.prompt_for_download": False,
-    "download.directory_upgrade": True,
-    "safebrowsing.enabled": True
-})
-
-pattern = "Stock Opening  Closing Report (stock.opening.closing)"
-
-def is_file_downloaded():
-    return any(Path(download_dir).glob(f"*{pattern}*.xlsx"))
-
-# === Debugging Loop ===
-while True:  # Infinite loop until the file is downloaded
-    try:
-        log.info("Attempting to start the browser...")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        wait = WebDriverWait(driver, 20)
-
-        log.info("Navigating to login page...")
-        driver.get("https://taps.odoo.com")
-        
-        driver.find_element(By.XPATH, "//button[contains(text(), 'Log in')]").click()
-        time.sleep(2)
-
-        time.sleep(2)
-        try:
-            wait.until(EC.invisibility_of_element_located((By.CSS_SELECTOR, ".modal-backdrop")))
-        except:
-            pass
-
-        switcher_span = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR,
-            "div.o_menu_systray div.o_switch_company_menu > button > span"
-        )))
-        driver.execute_script("arguments[0].scrollIntoView(true);", switcher_span)
-        switcher_span.click()
-        time.sleep(2)
-
-        log.info("Selecting 'Zipper' company...")
-        target_div = wait.until(EC.element_to_be_clickable((By.XPATH,
-            "//div[contains(@class, 'log_into')][span[contains(text(), 'Zipper')]]"
-        )))
-        driver.execute_script("arguments[0].scrollIntoView(true);", target_div)
-        target_div.click()
-        time.sleep(4)
-
-        driver.get("https://taps.odoo.com/web#action=441&model=stock.picking.type&view_type=kanban&cids=1&menu_id=280")
-        wait.until(EC.presence_of_element_located((By.XPATH, "//html")))
-        time.sleep(5)
-
-        log.info("Clicking export button...")
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/header/nav/div[1]/div[3]/button/span"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/header/nav/div[1]/div[3]/div/a[2]"))).click()
-        time.sleep(5)
-        first_day_of_month = datetime(2025, 1, 1).strftime("%d/%m/%Y")
-        wait.until(EC.presence_of_element_located((By.XPATH, "//*[@id='from_date_0']"))).send_keys(first_day_of_month)
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[2]/div[2]/div/div/div/div/footer/footer/button[1]"))).click()
-        time.sleep(60)
-
-        log.info("Confirming file export...")
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div/div[1]/div/div[2]/div[3]/button"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div[2]/div/table/thead/tr/th[1]/div"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div/div[1]/span/a[1]"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div/div[2]/div/button"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div/div[2]/div/div/span"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[2]/div[2]/div/div/div/div/main/div/div[2]/div[3]/div/select"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[2]/div[2]/div/div/div/div/main/div/div[2]/div[3]/div/select/option[34]"))).click()
-        time.sleep(5)
-        wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[2]/div[2]/div/div/div/div/footer/button[1]"))).click()
-        time.sleep(50)
-
-        if is_file_downloaded():
-            log.info("✅ File download complete!")
-            files = list(Path(download_dir).glob(f"*{pattern}*.xlsx"))
-            if len(files) > 1:
-                files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                for file in files[1:]:
-                    file.unlink()
-            driver.quit()
-            break  # Exit the loop after file download is complete
-        else:
-            log.warning("⚠️ File not downloaded. Retrying...")
-
-    except Exception as e:
-        log.error(f"❌ Error occurred: {e}\nRetrying in 10 seconds...\n")
-        try:
-            driver.quit()
-        except:
-            pass
-        time.sleep(10)
+# === Export the report through the web client ===
+# A copy is kept with the run, since later exports prune the download folder
+if not manifest.done("Zipper", "export"):
+    with manifest.step("Zipper", "export") as step:
+        exported = export_company("Zipper", download_dir, from_date=datetime(2025, 1, 1))
+        step.keep_file(exported, copy=True)
+latest_file = manifest.get("Zipper", "export")["files"][0]
 
 # === Step: Upload to Google Sheets ===
 try:
-    log.info("Checking for downloaded files...")
-    files = list(Path(download_dir).glob(f"*{pattern}*.xlsx"))
-    if not files:
-        raise Exception("No matching file found.")
-
-    files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    latest_file = files[0]
-    df = pd.read_excel(latest_file)
-    time.sleep(8)
-    log.info("✅ File loaded into DataFrame.")
+    with manifest.step("Zipper", "sheets push") as step:
+        # Fast read-only parse; cells kept as the export stores them so the tab
+        # renders exactly as it did with pd.read_excel (text dates, FALSE flags)
+        df = load_report(latest_file, as_stored=True)
+        log.info("✅ File loaded into DataFrame.")
 
-    # Use credentials stored in gcreds.json (created in GitHub Action)
-    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    
-    # Use google-auth to load credentials
-    creds = service_account.Credentials.from_service_account_file('service_account.json', scopes=scope)
-    log.info("✅ Successfully loaded credentials.")
+        # Shared Google client (credentials from GOOGLE_APPLICATION_CREDENTIALS / service_account.json)
+        worksheet = open_worksheet("1tSgmESOWqYRkDk_KhewnaaJmQGSUaSILzOzpade9tRc", "Zipper")
 
-    # Use gspread to authorize and access Google Sheets
-    client = gspread.authorize(creds)
-
-    sheet = client.open_by_key("1tSgmESOWqYRkDk_KhewnaaJmQGSUaSILzOzpade9tRc")
-    worksheet = sheet.worksheet("Zipper")
-
-    if df.empty:
-        print("Skip: DataFrame is empty, not pasting to sheet.")
-    else:
-        worksheet.clear()
-        time.sleep(4)
-        set_with_dataframe(worksheet, df)
-        print("Data pasted to Google Sheet (Sheet4).")
-        local_tz = pytz.timezone('Asia/Dhaka')
-        local_time = datetime.now(local_tz).strftime("%Y-%m-%d %H:%M:%S")
-        worksheet.update("AA2", [[f"{local_time}"]])
-        log.info(f"✅ Data pasted & timestamp updated: {local_time}")
-
-    
+        if df.empty:
+            print("Skip: DataFrame is empty, not pasting to sheet.")
+        else:
+            SheetSync(worksheet, "Zipper").push(df)
+            print("Data pasted to Google Sheet (Zipper).")
+            local_tz = pytz.timezone('Asia/Dhaka')
+            local_time = datetime.now(local_tz).strftime("%Y-%m-%d %H:%M:%S")
+            worksheet.update("AA2", [[f"{local_time}"]])
+            log.info(f"✅ Data pasted & timestamp updated: {local_time}")
+        step.note(rows=len(df))
 
 except Exception as e:
     log.error(f"❌ Error while pasting to Google Sheets: {e}")
+    log.info(f"📂 Export kept at {latest_file}")
+
+# Fails the job when the upload did not go through, with the resume command logged
+if not manifest.finish("Zipper.py"):
+    sys.exit(1)
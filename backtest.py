@@ -0,0 +1,253 @@
+"""
+Walk-forward backtest of RM consumption forecasts.
+
+Replays the ledger snapshots kept by the snapshot store. For every cut-off
+snapshot, each forecaster sees only that snapshot and predicts per-item
+consumption for the next HORIZON_DAYS. The prediction is scored against what
+was actually issued in between: the growth of |Issue Quantity| per item from
+the cut-off snapshot to the first snapshot at least HORIZON_DAYS later. That
+growth is scaled to HORIZON_DAYS when the snapshots are further apart.
+
+Cut-offs and item shards are spread over a process pool; metrics are then
+computed per cut-off over all items (MAE, WAPE, Top-N hit rate).
+
+Env Vars
+--------
+- BACKTEST_COMPANY   : company name in the snapshot store (default "Zipper")
+- HORIZON_DAYS       : forecast horizon in days (default 10)
+- LOOKBACK_DAYS      : lookback of the naive forecaster (default 7)
+- TOP_N              : size of the Top-N list scored by hit rate (default 10)
+- BACKTEST_SHARDS    : item shards per cut-off (default 1)
+- BACKTEST_WORKERS   : worker processes (default: CPU count)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+import pandas as pd
+
+from forecast_engine import compute_top_forecasts, daily_consumption
+from snapshot_store import SnapshotStore
+
+
+# ---------------------------
+# Forecaster interface
+# ---------------------------
+
+class Forecaster(Protocol):
+    """Anything with a `name` and a `predict(history, horizon_days)` returning {Item Code: quantity}."""
+
+    name: str
+
+    def predict(self, history: pd.DataFrame, horizon_days: int) -> Dict[str, float]:
+        ...
+
+
+class NaiveMeanForecaster:
+    """The notebook forecast: mean of the last `lookback_days` of daily consumption x horizon."""
+
+    def __init__(self, lookback_days: int = 7):
+        self.lookback_days = lookback_days
+        self.name = f"naive_mean_{lookback_days}d"
+
+    def predict(self, history: pd.DataFrame, horizon_days: int) -> Dict[str, float]:
+        return compute_top_forecasts(history, lookback_days=self.lookback_days, horizon_days=horizon_days)
+
+
+class SklearnForecaster:
+    """
+    Regression on trailing-window features of the daily consumption matrix.
+
+    Training rows are (item, anchor day) pairs from the history itself: the
+    features are the sums of the last `lookbacks` days up to the anchor, and the
+    target is the sum of the following `horizon_days`. Predictions use the same
+    features anchored on each item's last day, like the naive forecaster.
+    """
+
+    def __init__(self, estimator, lookbacks: Sequence[int] = (7, 14, 28), anchor_stride: int = 3, name: Optional[str] = None):
+        self.estimator = estimator
+        self.lookbacks = tuple(lookbacks)
+        self.anchor_stride = anchor_stride
+        self.name = name or f"sklearn_{type(estimator).__name__}"
+
+    def _features(self, prefix: np.ndarray, rows: np.ndarray, anchor: np.ndarray) -> np.ndarray:
+        end = anchor + 1
+        return np.column_stack([prefix[rows, end] - prefix[rows, np.maximum(end - lb, 0)] for lb in self.lookbacks])
+
+    def predict(self, history: pd.DataFrame, horizon_days: int) -> Dict[str, float]:
+        from sklearn.base import clone
+
+        daily = daily_consumption(history)
+        if not daily.n_items:
+            return {}
+        n_items, n_days = daily.matrix.shape
+        prefix = np.zeros((n_items, n_days + 1))
+        np.cumsum(daily.matrix, axis=1, out=prefix[:, 1:])
+
+        anchors = np.arange(max(self.lookbacks) - 1, n_days - horizon_days, self.anchor_stride)
+        if not len(anchors):
+            return {}
+        rows = np.repeat(np.arange(n_items), len(anchors))
+        anchor = np.tile(anchors, n_items)
+        # Only learn from windows inside each item's active span
+        live = (anchor >= daily.first[rows]) & (anchor + horizon_days <= daily.last[rows])
+        rows, anchor = rows[live], anchor[live]
+        if not len(rows):
+            return {}
+
+        X = self._features(prefix, rows, anchor)
+        y = prefix[rows, anchor + 1 + horizon_days] - prefix[rows, anchor + 1]
+        model = clone(self.estimator).fit(X, y)
+
+        all_rows = np.arange(n_items)
+        pred = model.predict(self._features(prefix, all_rows, daily.last))
+        return {str(code): round(float(v), 2) for code, v in zip(daily.codes, pred) if np.isfinite(v) and v > 0}
+
+
+# ---------------------------
+# Replay
+# ---------------------------
+
+def _issued(df: pd.DataFrame) -> pd.Series:
+    qty = pd.to_numeric(df["Issue Quantity"], errors="coerce").fillna(0).abs()
+    return qty.groupby(df["Item Code"].astype(str)).sum()
+
+
+def _shard(df: pd.DataFrame, shard: int, n_shards: int) -> pd.DataFrame:
+    if n_shards <= 1:
+        return df
+    codes = df["Item Code"].astype(str).to_numpy()
+    return df[pd.util.hash_array(codes) % n_shards == shard]
+
+
+def plan_cutoffs(dates: List[str], horizon_days: int):
+    """Pair each snapshot date with the first snapshot at least `horizon_days` later."""
+    pairs = []
+    for i, cutoff in enumerate(dates):
+        target = (date.fromisoformat(cutoff) + timedelta(days=horizon_days)).isoformat()
+        later = [d for d in dates[i + 1:] if d >= target]
+        if later:
+            pairs.append((cutoff, later[0]))
+    return pairs
+
+
+def _run_task(task):
+    forecasters, root, cname, cutoff, follow, shard, n_shards, horizon_days = task
+    store = SnapshotStore(root)
+    history = _shard(store.read(cname, cutoff), shard, n_shards)
+    later = _shard(store.read(cname, follow, columns=["Item Code", "Issue Quantity"]), shard, n_shards)
+
+    gap = (date.fromisoformat(follow) - date.fromisoformat(cutoff)).days
+    actual = (_issued(later).sub(_issued(history), fill_value=0)).clip(lower=0) * (horizon_days / gap)
+
+    frames, timings = [], []
+    for fc in forecasters:
+        t0 = time.perf_counter()
+        pred = pd.Series(fc.predict(history, horizon_days), dtype="float64")
+        timings.append((fc.name, cutoff, time.perf_counter() - t0))
+        both = pd.concat({"forecast": pred, "actual": actual}, axis=1).fillna(0.0)
+        both.index.name = "Item Code"
+        both = both.reset_index()
+        both["forecaster"] = fc.name
+        both["cutoff"] = cutoff
+        frames.append(both)
+    return pd.concat(frames, ignore_index=True), timings
+
+
+def score(group: pd.DataFrame, top_n: int) -> Dict[str, float]:
+    """MAE, WAPE and Top-N hit rate of one forecaster at one cut-off."""
+    err = (group["forecast"] - group["actual"]).abs()
+    actual_total = group["actual"].sum()
+    top_pred = set(group[group["forecast"] > 0].nlargest(top_n, "forecast")["Item Code"])
+    top_true = set(group[group["actual"] > 0].nlargest(top_n, "actual")["Item Code"])
+    return {
+        "items": len(group),
+        "MAE": err.mean(),
+        "WAPE": err.sum() / actual_total if actual_total else np.nan,
+        "top_n_hit_rate": len(top_pred & top_true) / len(top_true) if top_true else np.nan,
+    }
+
+
+def run_backtest(
+    forecasters: Sequence[Forecaster],
+    cname: str,
+    horizon_days: int = 10,
+    top_n: int = 10,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    n_shards: int = 1,
+    max_workers: Optional[int] = None,
+    store: Optional[SnapshotStore] = None,
+):
+    """
+    Backtest `forecasters` on `cname`'s snapshots with cut-offs in [start, end].
+
+    Returns (summary, per_cutoff): summary has one row per forecaster with mean
+    MAE / WAPE / Top-N hit rate and total predict seconds; per_cutoff has the
+    same metrics for every cut-off.
+    """
+    store = store or SnapshotStore()
+    dates = [d for d in store.dates(cname) if (not start or d >= str(start))]
+    pairs = [(c, f) for c, f in plan_cutoffs(dates, horizon_days) if not end or c <= str(end)]
+    if not pairs:
+        raise ValueError(f"No snapshot pairs {horizon_days}+ days apart for {cname}; need more history.")
+
+    tasks = [
+        (list(forecasters), store.root, cname, cutoff, follow, shard, n_shards, horizon_days)
+        for cutoff, follow in pairs
+        for shard in range(n_shards)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_run_task, tasks))
+
+    scored = pd.concat([frame for frame, _ in results], ignore_index=True)
+    # Each shard timed its own predict call; add them up per cut-off
+    seconds = (
+        pd.DataFrame([t for _, timings in results for t in timings], columns=["forecaster", "cutoff", "seconds"])
+          .groupby(["forecaster", "cutoff"])["seconds"].sum()
+    )
+
+    rows = []
+    for (name, cutoff), group in scored.groupby(["forecaster", "cutoff"]):
+        rows.append({"forecaster": name, "cutoff": cutoff, **score(group, top_n), "seconds": seconds[(name, cutoff)]})
+    per_cutoff = pd.DataFrame(rows)
+
+    summary = per_cutoff.groupby("forecaster").agg(
+        cutoffs=("cutoff", "count"),
+        MAE=("MAE", "mean"),
+        WAPE=("WAPE", "mean"),
+        top_n_hit_rate=("top_n_hit_rate", "mean"),
+        seconds=("seconds", "sum"),
+    ).reset_index()
+    return summary, per_cutoff
+
+
+def main():
+    company = os.environ.get("BACKTEST_COMPANY", "Zipper")
+    horizon = int(os.environ.get("HORIZON_DAYS", "10"))
+    lookback = int(os.environ.get("LOOKBACK_DAYS", "7"))
+    top_n = int(os.environ.get("TOP_N", "10"))
+    shards = int(os.environ.get("BACKTEST_SHARDS", "1"))
+    workers = int(os.environ["BACKTEST_WORKERS"]) if os.environ.get("BACKTEST_WORKERS") else None
+
+    forecasters = [NaiveMeanForecaster(lookback)]
+    try:
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.linear_model import Ridge
+        forecasters += [SklearnForecaster(Ridge(alpha=1.0)), SklearnForecaster(HistGradientBoostingRegressor(max_iter=100))]
+    except ImportError:
+        print("ℹ️ scikit-learn not installed; backtesting the naive forecaster only.")
+
+    print(f"🔁 Backtesting {company}: horizon={horizon}d, Top-{top_n}, shards={shards}")
+    t0 = time.perf_counter()
+    summary, _ = run_backtest(forecasters, company, horizon_days=horizon, top_n=top_n, n_shards=shards, max_workers=workers)
+    print(summary.to_string(index=False))
+    print(f"⏱️ Wall time: {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
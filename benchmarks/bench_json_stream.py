@@ -0,0 +1,74 @@
+"""
+Peak memory and time of decoding one large web_search_read page.
+
+"whole" is the previous path (r.json() on the full body, then records_to_frame
+on all records); "stream" feeds the body in network-sized chunks through
+json_stream.RecordStream into LEDGER_DECODER, one batch of records at a time.
+Peak memory is measured with tracemalloc and includes the raw body bytes the
+whole path has to hold.
+
+    python benchmarks/bench_json_stream.py              # 10k, 100k, 500k records
+    python benchmarks/bench_json_stream.py 200000
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_decoder import synthetic_records  # noqa: E402
+from json_stream import RecordStream  # noqa: E402
+from odoo_client import DECODE_BATCH, LEDGER_DECODER, STREAM_CHUNK  # noqa: E402
+
+SIZES = [10_000, 100_000, 500_000]
+
+
+def make_body(n):
+    records = synthetic_records(n)
+    return json.dumps({"jsonrpc": "2.0", "id": None, "result": {"records": records, "length": n}}).encode()
+
+
+def chunks(body, size=STREAM_CHUNK):
+    # Like iter_content: the body arrives piece by piece and each piece is dropped after use
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def whole(body):
+    data = json.loads(bytes(body))  # r.json() holds a private copy of the body
+    return LEDGER_DECODER.decode(data["result"]["records"])
+
+
+def stream(body):
+    frames = [LEDGER_DECODER.decode(batch) for batch in RecordStream(chunks(body)).batches(DECODE_BATCH)]
+    return LEDGER_DECODER.concat(frames)
+
+
+def measure(fn, body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = fn(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, df
+
+
+def main(sizes):
+    mb = 1024 * 1024
+    print(f"{'records':>9} {'body':>8} {'whole peak':>11} {'stream peak':>12} {'whole':>8} {'stream':>8}")
+    for n in sizes:
+        body = make_body(n)
+        t_whole, p_whole, a = measure(whole, body)
+        t_stream, p_stream, b = measure(stream, body)
+        assert a.equals(b)
+        print(f"{n:>9,} {len(body) / mb:>6.1f}MB {p_whole / mb:>9.1f}MB {p_stream / mb:>10.1f}MB {t_whole:>7.2f}s {t_stream:>7.2f}s")
+        del body, a, b
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SIZES)
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: memory and forecast time of the compact ledger.Ledger.
+
+Ledger rows come from the fake Odoo server's generator (cycled from the
+committed xlsx samples) and are written to a temporary snapshot store. For
+each size the same rows are held as:
+
+- object frame : text columns as Python strings (a Sheets load, the notebook's copies)
+- store frame  : SnapshotStore.read (categoricals + pandas' default string dtype)
+- Ledger       : Ledger.from_parquet on the snapshot file
+
+then as a history of `--snapshots` dated snapshots stacked together
+(Ledger.from_snapshots against concatenated store frames). Forecasts and the
+consumption summary are asserted equal on every representation.
+
+    python benchmarks/bench_ledger.py                       # 50k, 200k, 1M rows
+    python benchmarks/bench_ledger.py 20000 --snapshots 24  # custom sizes / history length
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), HERE]
+
+from fake_odoo import FakeLedger  # noqa: E402
+from forecast_engine import compute_top_forecasts  # noqa: E402
+from ledger import Ledger  # noqa: E402
+from ledger_source import summarize_consumption  # noqa: E402
+from odoo_client import LEDGER_DECODER, OPENING_CLOSING_SPEC  # noqa: E402
+from record_decoder import ledger_kind  # noqa: E402
+from snapshot_store import SnapshotStore  # noqa: E402
+
+SIZES = [50_000, 200_000, 1_000_000]
+CHUNK = 50_000
+
+
+def fake_frame(rows):
+    """`rows` decoded ledger rows, built in chunks like streamed pages."""
+    fake = FakeLedger(rows)
+    fake.compute()
+    parts = []
+    for start in range(0, rows, CHUNK):
+        records = [fake.shape(fake.row(i), i, OPENING_CLOSING_SPEC) for i in range(start, min(rows, start + CHUNK))]
+        parts.append(LEDGER_DECODER.decode(records))
+    return LEDGER_DECODER.concat(parts)
+
+
+def as_objects(df):
+    text = [c for c in df.columns if ledger_kind(c) in ("text", "category")]
+    return df.astype({c: object for c in text})
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def timed(fn, *args):
+    gc.collect()
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def row(label, rows, sizes, times=None):
+    line = f"{label:<8} {rows:>10,}" + "".join(f" {b / rows:>10.0f}" for b in sizes)
+    line += f" {sizes[0] / sizes[-1]:>8.1f}x"
+    if times:
+        line += "".join(f" {t:>9.3f}s" for t in times)
+    print(line)
+
+
+def main(sizes, snapshots):
+    print(f"{'':<8} {'rows':>10} {'object B/r':>10} {'store B/r':>10} {'ledger B/r':>10} {'saving':>9}"
+          f" {'fc frame':>10} {'fc ledger':>10}")
+    with tempfile.TemporaryDirectory(prefix="bench_ledger_") as folder:
+        store = SnapshotStore(os.path.join(folder, "snapshots"))
+        for n in sizes:
+            df = fake_frame(n)
+            first = date(2025, 1, 31)
+            dates = [(first + timedelta(days=30 * k)).isoformat() for k in range(snapshots)]
+            for d in dates:
+                store.write("Zipper", d, df)
+            objects = as_objects(df)
+            del df
+
+            # ----- one snapshot -----
+            stored = store.read("Zipper", dates[0])
+            ledger = Ledger.from_parquet(store.path("Zipper", dates[0]))
+            t_frame, fc_frame = timed(compute_top_forecasts, stored)
+            t_ledger, fc_ledger = timed(compute_top_forecasts, ledger)
+            assert fc_frame == fc_ledger == compute_top_forecasts(objects)
+            pd.testing.assert_frame_equal(summarize_consumption(ledger), summarize_consumption(objects))
+            row("single", n, [frame_bytes(objects), frame_bytes(stored), ledger.nbytes], [t_frame, t_ledger])
+            del objects, stored, ledger
+
+            # ----- stacked history -----
+            history = pd.concat([store.read("Zipper", d) for d in dates], ignore_index=True)
+            t_build, stacked = timed(Ledger.from_snapshots, store, "Zipper")
+            assert len(stacked) == len(history) == n * snapshots
+            assert compute_top_forecasts(stacked) == compute_top_forecasts(history)
+            history_bytes = frame_bytes(history)
+            object_bytes = frame_bytes(as_objects(history))
+            row(f"x{snapshots}", len(stacked), [object_bytes, history_bytes, stacked.nbytes])
+            print(f"{'':<8} {'':>10} history ledger built in {t_build:.2f}s, "
+                  f"{stacked.nbytes / 1e6:,.0f} MB vs {history_bytes / 1e6:,.0f} MB (store) / {object_bytes / 1e6:,.0f} MB (objects)")
+            del history, stacked
+            for d in dates:
+                os.remove(store.path("Zipper", d))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description="Compact ledger memory / forecast benchmark")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--snapshots", type=int, default=12, help="dated snapshots in the stacked history")
+    args = parser.parse_args()
+    main(args.sizes, args.snapshots)
@@ -0,0 +1,156 @@
+"""
+End-to-end benchmark of the sync pipeline against local fakes.
+
+For each size a fake Odoo (benchmarks/fake_odoo.py) is started in its own
+process and the pipeline runs in a fresh child process with the in-process
+fake Sheets backend (benchmarks/fake_sheets.py) installed:
+
+    login → wizard compute → fetch (streamed pages) → write (snapshot + Sheets diff push) → forecast
+
+Stage times come from run_metrics; peak memory is the child's max RSS (the
+import baseline is reported next to it). Each result is appended with the
+commit it ran on to BENCH_HISTORY, so throughput and memory can be compared
+from run to run.
+
+    python benchmarks/bench_pipeline.py                       # 5k, 50k, 500k rows
+    python benchmarks/bench_pipeline.py 5000 50000 --latency 0.02 --compute-seconds 1 --xlsx
+
+Env Vars
+--------
+- BENCH_HISTORY : JSONL file results are appended to (default state/bench_pipeline.jsonl)
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+SIZES = [5_000, 50_000, 500_000]
+HISTORY = os.getenv("BENCH_HISTORY", os.path.join(ROOT, "state", "bench_pipeline.jsonl"))
+STAGES = ["login", "wizard compute", "fetch + snapshot", "sheets push", "forecast"]
+
+
+def _max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ========= CHILD: one pipeline run ==========
+def run_child(rows, url, workdir, xlsx):
+    os.environ.update({
+        "ODOO_URL": url, "ODOO_DB": "bench", "ODOO_USERNAME": "bench", "ODOO_PASSWORD": "bench",
+        "SNAPSHOT_DIR": os.path.join(workdir, "snapshots"),
+        "SYNC_STATE_DIR": os.path.join(workdir, "state"),
+        "RUN_REPORT_PATH": os.path.join(workdir, "state", "run_report.jsonl"),
+        "INCREMENTAL_SYNC": "0",
+        "EXPORT_XLSX": "1" if xlsx else "0",
+        # Measure the pipeline, not the Sheets quota pacing
+        "SHEETS_WRITE_QUOTA": "1000000",
+    })
+    os.chdir(workdir)
+    sys.path[:0] = [ROOT, HERE]
+
+    import fake_sheets
+    clients = fake_sheets.install()
+    import Mt_Zip_db as pipeline
+    from forecast_engine import compute_top_forecasts
+    from ledger import Ledger
+    from run_metrics import records, stage
+
+    baseline = _max_rss_mb()
+    started = time.perf_counter()
+    odoo = pipeline.OdooClient()
+    odoo.login()
+    n_rows = pipeline.sync_company(odoo, 1, "Zipper")
+    with stage("forecast", company="Zipper") as st:
+        forecasts = compute_top_forecasts(Ledger.from_parquet(pipeline.store.path("Zipper", pipeline.TO_DATE)))
+        st.add(rows=len(forecasts))
+    total = time.perf_counter() - started
+
+    pushed = len(clients.spreadsheet(pipeline.SHEET_KEY).values("Zipper")) - 1
+    assert n_rows == rows == pushed, (n_rows, rows, pushed)
+    stages = {}
+    for r in records():
+        stages[r["stage"]] = stages.get(r["stage"], 0.0) + r["seconds"]
+    return {
+        "rows": rows,
+        "seconds": round(total, 3),
+        "rows_per_s": round(rows / total, 1),
+        "peak_rss_mb": round(_max_rss_mb(), 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "stages": {k: round(v, 3) for k, v in stages.items()},
+    }
+
+
+# ========= PARENT: fake server + child per size ==========
+def run_size(rows, latency, compute_seconds, xlsx):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "fake_odoo.py"), "--rows", str(rows), "--port", "0",
+         "--latency", str(latency), "--compute-seconds", str(compute_seconds)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        url = server.stdout.readline().strip()
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(rows), "--url", url, "--workdir", workdir]
+                + (["--xlsx"] if xlsx else []),
+                capture_output=True, text=True,
+            )
+        if child.returncode:
+            raise RuntimeError(f"{rows} rows failed:\n{child.stderr[-3000:]}")
+        return json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end sync benchmark against local fakes")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake Odoo seconds per request")
+    parser.add_argument("--compute-seconds", type=float, default=0.0, help="fake wizard compute duration")
+    parser.add_argument("--xlsx", action="store_true", help="also write the dated xlsx (EXPORT_XLSX=1)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.url, args.workdir, args.xlsx)))
+        return
+
+    commit = _commit()
+    print(f"{'rows':>8} {'total':>8} {'rows/s':>9} " + " ".join(f"{s:>16}" for s in STAGES) + f" {'peak RSS':>9}")
+    for rows in args.sizes:
+        result = run_size(rows, args.latency, args.compute_seconds, args.xlsx)
+        stages = " ".join(f"{result['stages'].get(s, 0.0):>15.2f}s" for s in STAGES)
+        print(f"{rows:>8,} {result['seconds']:>7.2f}s {result['rows_per_s']:>9,.0f} {stages} {result['peak_rss_mb']:>7.0f}MB"
+              f"  (imports {result['baseline_rss_mb']:.0f}MB)")
+        os.makedirs(os.path.dirname(HISTORY), exist_ok=True)
+        with open(HISTORY, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": commit,
+                "latency": args.latency,
+                "compute_seconds": args.compute_seconds,
+                "xlsx": args.xlsx,
+                **result,
+            }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark: loading an exported opening/closing report workbook.
+
+Compares pd.read_excel (openpyxl, then coerce_ledger for store dtypes) with
+xlsx_loader.load_report on the committed download: uncached with each
+available engine (openpyxl read-only, calamine when installed), with a
+column subset, as stored cells (checked against pd.read_excel cell for cell)
+and as a cache hit. Larger sheets are
+built by repeating the download's rows `scale` times.
+
+    python benchmarks/bench_xlsx_loader.py            # the download as is, x10, x50
+    python benchmarks/bench_xlsx_loader.py 1 100      # custom scales
+"""
+
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import xlsx_loader  # noqa: E402
+from sheet_sync import cell_value  # noqa: E402
+from snapshot_store import coerce_ledger  # noqa: E402
+
+SAMPLE = os.path.join(ROOT, "download", "zipper_opening_closing_2025-09-01.xlsx")
+SCALES = [1, 10, 50]
+SUBSET = ["Item Code", "Category", "Receive Date", "Issue Quantity", "Closing Quantity", "Closing Value"]
+
+
+def scaled_copy(path, scale, folder):
+    """The sample's rows repeated `scale` times, written like the export (one sheet, header row)."""
+    if scale == 1:
+        return path
+    src = load_workbook(path, read_only=True)
+    rows = list(src.worksheets[0].iter_rows(values_only=True))
+    src.close()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(rows[0])
+    for _ in range(scale):
+        for row in rows[1:]:
+            ws.append(row)
+    out = os.path.join(folder, f"report_x{scale}.xlsx")
+    wb.save(out)
+    return out
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def same_content(a, b):
+    # The loader keeps empty text as None where coerce_ledger leaves NaN in all-empty columns
+    for c in a.columns:
+        x, y = a[c].astype(object), b[c].astype(object)
+        assert (x.isna() == y.isna()).all(), c
+        assert (x[x.notna()] == y[y.notna()]).all(), c
+
+
+def rendered(df):
+    # The sheet cells SheetSync would write
+    values = df.astype(object).where(df.notna(), None)
+    return [list(df.columns)] + [[cell_value(v) for v in row] for row in values.itertuples(index=False, name=None)]
+
+
+def main(scales):
+    engines = ["openpyxl"] + (["calamine"] if xlsx_loader.HAS_CALAMINE else [])
+    header = (f"{'rows':>8} {'read_excel':>11}" + "".join(f" {e:>10}" for e in engines)
+              + f" {'subset':>8} {'stored':>8} {'cached':>8} {'speedup':>8}")
+    print(header)
+    with tempfile.TemporaryDirectory(prefix="bench_xlsx_") as folder:
+        xlsx_loader.CACHE_DIR = os.path.join(folder, "cache")
+        for scale in scales:
+            path = scaled_copy(SAMPLE, scale, folder)
+            repeat = 3 if scale <= 10 else 1
+            t_base, raw = timed(pd.read_excel, path, repeat=repeat)
+            base = coerce_ledger(raw)
+            times = {}
+            for engine in engines:
+                times[engine], df = timed(xlsx_loader.load_report, path, engine=engine, cache=False, repeat=repeat)
+                same_content(df, base)
+            t_subset, subset = timed(xlsx_loader.load_report, path, columns=SUBSET, engine=engines[-1], cache=False, repeat=repeat)
+            pd.testing.assert_frame_equal(subset, df[SUBSET])
+            t_stored, stored = timed(xlsx_loader.load_report, path, engine=engines[-1], as_stored=True, repeat=repeat)
+            assert rendered(stored) == rendered(raw)
+            xlsx_loader.load_report(path, engine=engines[-1])  # fill the cache
+            t_cached, cached = timed(xlsx_loader.load_report, path, repeat=repeat)
+            pd.testing.assert_frame_equal(cached, df)
+            fastest = min(times.values())
+            print(f"{len(base):>8,} {t_base:>10.3f}s" + "".join(f" {times[e]:>9.3f}s" for e in engines)
+                  + f" {t_subset:>7.3f}s {t_stored:>7.3f}s {t_cached:>7.3f}s {t_base / fastest:>7.1f}x")
+            del raw, base, df, stored, cached
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    main([int(a) for a in sys.argv[1:]] or SCALES)
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Odoo JSON-RPC endpoints the sync talks to.
+
+Serves /web/session/authenticate, /web/dataset/call_kw and
+/web/dataset/call_button with the shapes Mt_Zip_db expects:
+
+- res.users write, stock.forecast.report create
+- stock.forecast.report print_date_wise_stock_register (sleeps --compute-seconds,
+  then (re)creates the ledger rows and bumps their write_date)
+- stock.opening.closing web_search_read (pages in `id asc` order, honouring the
+  request specification, plus the write_date stamp query), web_read_group
+  summed by product_id
+- product.product read (default_code)
+
+Ledger rows are cycled from the committed *_opening_closing*.xlsx samples
+(relations as {"id", "display_name"}, `false` for blanks); every copy gets its
+own lot, and the columns the samples lack (dates, prices, PO fields) are
+filled deterministically. Every request waits --latency seconds first.
+
+    python benchmarks/fake_odoo.py --rows 50000 --latency 0.02 --compute-seconds 1
+    ODOO_URL=http://127.0.0.1:8069 python Mt_Zip_db.py
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = [
+    os.path.join(ROOT, "zipper_opening_closing2025-09-01.xlsx"),
+    os.path.join(ROOT, "metaltrims_opening_closing2025-09-01.xlsx"),
+]
+RELATIONS = ["product_id", "product_category", "parent_category", "product_uom", "lot_id"]
+NUMBERS = ["opening_qty", "opening_value", "receive_qty", "receive_value", "issue_qty", "issue_value", "cloing_qty", "cloing_value"]
+PO_TYPES = ["Local", "Foreign", False]
+SHIPMENT_MODES = ["Sea", "Air", "Road", False]
+
+
+def _relation(value):
+    if isinstance(value, str) and value.startswith("{"):
+        return ast.literal_eval(value)
+    return False
+
+
+def load_samples(paths=SAMPLES):
+    """Base ledger rows (spec field → JSON value) from the committed xlsx samples."""
+    rows = []
+    for path in paths:
+        df = pd.read_excel(path)
+        for rec in df.to_dict("records"):
+            row = {f: _relation(rec.get(f)) for f in RELATIONS}
+            row["pr_code"] = rec["pr_code"] if isinstance(rec.get("pr_code"), str) else False
+            for f in NUMBERS:
+                v = rec.get(f)
+                row[f] = float(v) if pd.notna(v) else 0.0
+            rows.append(row)
+    return rows
+
+
+class FakeLedger:
+    """`rows` ledger lines cycled from the samples, materialised page by page on request."""
+
+    def __init__(self, rows, samples=None):
+        self.rows = rows
+        self.samples = samples or load_samples()
+        self.computed = False
+        self.write_date = None
+        self.wizards = 0
+        self.lock = threading.Lock()
+        self.products = {}
+        for s in self.samples:
+            if s["product_id"]:
+                self.products[s["product_id"]["id"]] = s["pr_code"]
+
+    def compute(self):
+        with self.lock:
+            self.computed = True
+            self.write_date = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def length(self):
+        return self.rows if self.computed else 0
+
+    def row(self, i):
+        base = self.samples[i % len(self.samples)]
+        cycle = i // len(self.samples)
+        lot = base["lot_id"]
+        qty = base["opening_qty"] or base["receive_qty"] or 1.0
+        value = base["opening_value"] or base["receive_value"]
+        row = dict(base)
+        row["lot_id"] = {"id": 1_000_000 + i, "display_name": f"{lot['display_name'] if lot else 'LOT'}/{cycle}"} if lot or i % 13 else False
+        row["receive_date"] = (date(2025, 1, 1) + timedelta(days=(i * 7919) % 240)).isoformat() if i % 17 else False
+        row["pur_price"] = round(abs(value / qty), 4) if qty else 0.0
+        row["landed_cost"] = round(row["pur_price"] * 0.04, 4)
+        row["lot_price"] = round(row["pur_price"] + row["landed_cost"], 4)
+        row["po_type"] = PO_TYPES[i % len(PO_TYPES)]
+        row["rejected"] = "No" if i % 50 else "Yes"
+        row["shipment_mode"] = SHIPMENT_MODES[i % len(SHIPMENT_MODES)]
+        row["write_date"] = self.write_date
+        return row
+
+    @staticmethod
+    def shape(row, i, spec):
+        out = {"id": i + 1}
+        for field, sub in spec.items():
+            value = row.get(field, False)
+            if sub.get("fields") and value:
+                value = {"id": value["id"], **{k: value.get(k, False) for k in sub["fields"]}}
+            out[field] = value
+        return out
+
+    def search_read(self, kw):
+        spec = kw.get("specification") or {}
+        offset, limit = kw.get("offset", 0), kw.get("limit") or self.length
+        if str(kw.get("order", "")).startswith("write_date desc"):
+            ids = [self.length - 1] if self.length else []
+        else:
+            ids = range(offset, min(offset + limit, self.length))
+        return {"records": [self.shape(self.row(i), i, spec) for i in ids], "length": self.length}
+
+    def read_group(self, kw):
+        if kw.get("groupby") != ["product_id"]:
+            raise ValueError("fake web_read_group only groups by product_id")
+        fields = [f.split(":")[0] for f in kw.get("fields", [])]
+        groups = {}
+        n = len(self.samples)
+        for j, s in enumerate(self.samples):
+            copies = self.length // n + (1 if j < self.length % n else 0)
+            if not copies or not s["product_id"]:
+                continue
+            g = groups.setdefault(s["product_id"]["id"], {"product_id": [s["product_id"]["id"], s["product_id"]["display_name"]], "__count": 0, **dict.fromkeys(fields, 0.0)})
+            g["__count"] += copies
+            for f in fields:
+                g[f] += s.get(f, 0.0) * copies
+        return {"groups": list(groups.values()), "length": len(groups)}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ledger: FakeLedger = None
+    latency = 0.0
+    compute_seconds = 0.0
+    calls = 0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        Handler.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            result = self.dispatch(self.path, request.get("params", {}))
+            self._reply({"jsonrpc": "2.0", "id": request.get("id"), "result": result})
+        except Exception as e:
+            self._reply({"jsonrpc": "2.0", "id": request.get("id"), "error": {"message": str(e), "data": {"name": type(e).__name__}}})
+
+    def dispatch(self, path, params):
+        if path == "/web/session/authenticate":
+            return {"uid": 2, "db": params.get("db"), "username": params.get("login")}
+        model, method, kw = params.get("model"), params.get("method"), params.get("kwargs", {})
+        if path == "/web/dataset/call_button" and method == "print_date_wise_stock_register":
+            time.sleep(self.compute_seconds)
+            self.ledger.compute()
+            return {"type": "ir.actions.act_window", "res_model": "stock.opening.closing"}
+        if (model, method) == ("res.users", "write"):
+            return True
+        if (model, method) == ("stock.forecast.report", "create"):
+            self.ledger.wizards += 1
+            return self.ledger.wizards
+        if (model, method) == ("stock.opening.closing", "web_search_read"):
+            return self.ledger.search_read(kw)
+        if (model, method) == ("stock.opening.closing", "web_read_group"):
+            return self.ledger.read_group(kw)
+        if (model, method) == ("product.product", "read"):
+            ids = params.get("args", [[]])[0]
+            return [{"id": i, "default_code": self.ledger.products.get(i, False)} for i in ids]
+        raise NotImplementedError(f"{model}.{method} via {path}")
+
+
+def serve(rows, port=0, latency=0.0, compute_seconds=0.0, computed=False):
+    """Start the server in a background thread; returns (server, url)."""
+    ledger = FakeLedger(rows)
+    if computed:
+        ledger.compute()
+    handler = type("FakeOdooHandler", (Handler,), {"ledger": ledger, "latency": latency, "compute_seconds": compute_seconds})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--compute-seconds", type=float, default=0.0, help="duration of the wizard compute")
+    args = parser.parse_args()
+    server, url = serve(args.rows, args.port, args.latency, args.compute_seconds)
+    print(url, flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
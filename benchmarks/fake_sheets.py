@@ -0,0 +1,154 @@
+"""
+In-process stand-in for the Google Sheets side of the pipeline.
+
+FakeSpreadsheet / FakeWorksheet implement the handful of gspread calls the
+writers use (values_batch_update, values_get, values_batch_get, row_values,
+col_values, update, add_rows/add_cols) over a row-list grid, so SheetSync, the bulk
+uploader and the helper-sheet writer run unchanged. install() swaps the
+shared google_clients provider for FakeClients, after which every
+open_worksheet()/open_spreadsheet() in the process lands here.
+
+    clients = fake_sheets.install()
+    ...run the sync...
+    clients.spreadsheet(SHEET_KEY).values("Zipper")
+"""
+
+import threading
+from typing import Dict, List
+
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol
+
+import google_clients
+from sheets_uploader import split_range
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+
+    def add_rows(self, n):
+        self.row_count += n
+
+    def add_cols(self, n):
+        self.col_count += n
+
+    def col_values(self, col):
+        grid = self.spreadsheet.grid(self.title)
+        values = [row[col - 1] if len(row) >= col else "" for row in grid]
+        while values and values[-1] in ("", None):
+            values.pop()
+        return values
+
+    def row_values(self, row):
+        grid = self.spreadsheet.grid(self.title)
+        values = list(grid[row - 1]) if len(grid) >= row else []
+        while values and values[-1] in ("", None):
+            values.pop()
+        return values
+
+    def update(self, range_name, values):
+        self.spreadsheet.write(self.title, range_name, values)
+
+
+class FakeSpreadsheet:
+    def __init__(self, key):
+        self.id = key
+        self.tabs: Dict[str, FakeWorksheet] = {}
+        self.grids: Dict[str, List[list]] = {}
+        self.requests = 0
+        self.cells = 0
+        self.lock = threading.Lock()
+
+    # ----- tabs -----
+    def worksheet(self, title):
+        if title not in self.tabs:
+            self.tabs[title] = FakeWorksheet(self, title)
+            self.grids[title] = []
+        return self.tabs[title]
+
+    def worksheets(self):
+        return list(self.tabs.values())
+
+    def grid(self, title) -> List[list]:
+        return self.grids.setdefault(title, [])
+
+    # ----- values -----
+    def write(self, title, a1, values):
+        g = a1_range_to_grid_range(a1) if ":" in a1 else dict(zip(("startRowIndex", "startColumnIndex"), (x - 1 for x in a1_to_rowcol(a1))))
+        top, left = g.get("startRowIndex", 0), g.get("startColumnIndex", 0)
+        with self.lock:
+            grid = self.grid(title)
+            if len(grid) < top + len(values):
+                grid.extend([] for _ in range(top + len(values) - len(grid)))
+            for r, row in enumerate(values):
+                target = grid[top + r]
+                if len(target) < left + len(row):
+                    target.extend([""] * (left + len(row) - len(target)))
+                target[left:left + len(row)] = row
+                self.cells += len(row)
+
+    def values_batch_update(self, body):
+        with self.lock:
+            self.requests += 1
+        for d in body["data"]:
+            title, a1 = split_range(d["range"])
+            self.worksheet(title)
+            self.write(title, a1, d["values"])
+
+    def _read(self, a1_range, params=None):
+        title, a1 = split_range(a1_range)
+        grid = self.grid(title)
+        # Whole-column ("D2:D") and whole-row ("1:1") ranges are open-ended
+        start, _, end = a1.partition(":")
+        col = "".join(ch for ch in start if ch.isalpha())
+        row = int("".join(ch for ch in start if ch.isdigit()) or 1)
+        if not col:  # row range
+            return {"range": a1_range, "values": [grid[row - 1]] if len(grid) >= row else []}
+        c = a1_to_rowcol(f"{col}1")[1] - 1
+        column = [r[c] if len(r) > c else "" for r in grid[row - 1:]]
+        while column and column[-1] in ("", None):
+            column.pop()
+        columns = (params or {}).get("majorDimension") == "COLUMNS"
+        return {"range": a1_range, "values": ([column] if column else []) if columns else [[v] for v in column]}
+
+    def values_get(self, a1_range, params=None):
+        return self._read(a1_range, params)
+
+    def values_batch_get(self, ranges, params=None):
+        return {"valueRanges": [self._read(r, params) for r in ranges]}
+
+    def values(self, title) -> List[list]:
+        return [list(r) for r in self.grid(title)]
+
+
+class FakeClients:
+    """Drop-in for google_clients.GoogleClients backed by FakeSpreadsheets."""
+
+    def __init__(self):
+        self.spreadsheets: Dict[str, FakeSpreadsheet] = {}
+        self.lock = threading.RLock()
+
+    def client(self):
+        return self
+
+    def spreadsheet(self, key_or_url):
+        key = google_clients.sheet_key(key_or_url)
+        with self.lock:
+            if key not in self.spreadsheets:
+                self.spreadsheets[key] = FakeSpreadsheet(key)
+            return self.spreadsheets[key]
+
+    def worksheet(self, key_or_url, title):
+        return self.spreadsheet(key_or_url).worksheet(title)
+
+    def invalidate(self, key_or_url=None):
+        pass
+
+
+def install() -> FakeClients:
+    clients = FakeClients()
+    google_clients._provider = clients
+    return clients
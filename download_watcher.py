@@ -0,0 +1,157 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import time
+import zipfile
+from pathlib import Path
+
+log = logging.getLogger()
+
+# === inotify constants (linux/inotify.h) ===
+IN_CREATE = 0x00000100
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+SETTLE_SECONDS = float(os.getenv("DOWNLOAD_SETTLE_SECONDS", "0.2"))
+POLL_SECONDS = float(os.getenv("DOWNLOAD_POLL_SECONDS", "0.25"))
+
+
+def _libc():
+    name = ctypes.util.find_library("c")
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def is_candidate(path, pattern, since=None):
+    """Finished-looking report file: matches `pattern`, is not a partial/lock file and is newer than `since`."""
+    name = path.name
+    if name.endswith(".crdownload") or name.startswith("~$") or not fnmatch.fnmatch(name, pattern):
+        return False
+    try:
+        return since is None or path.stat().st_mtime >= since
+    except FileNotFoundError:
+        return False
+
+
+def is_complete(path, settle=SETTLE_SECONDS):
+    """Size stopped changing over `settle` seconds and the xlsx opens as a zip archive."""
+    try:
+        size = path.stat().st_size
+        if not size:
+            return False
+        time.sleep(settle)
+        return path.stat().st_size == size and zipfile.is_zipfile(path)
+    except FileNotFoundError:
+        return False
+
+
+class DownloadWatcher:
+    """
+    Waits for a download to land in `folder`.
+
+    Uses inotify (through ctypes) to wake up as soon as Chrome closes or renames
+    a file in the folder, and falls back to polling where inotify is not
+    available. Partial (.crdownload), Office lock (~$) and files older than
+    `since` are ignored; a hit must have a stable size and be a valid xlsx zip.
+
+        with DownloadWatcher(folder, "*Report*.xlsx", since=time.time()) as watcher:
+            trigger_download()
+            path = watcher.wait(timeout=300)
+    """
+
+    def __init__(self, folder, pattern="*.xlsx", since=None):
+        self.folder = Path(folder)
+        self.pattern = pattern
+        self.since = since
+        self.fd = None
+        self.libc = None
+
+    def __enter__(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        libc = _libc()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(self.folder), IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO) >= 0:
+                self.fd, self.libc = fd, libc
+            elif fd >= 0:
+                os.close(fd)
+        if self.fd is None:
+            log.info("ℹ️ inotify unavailable; polling the download folder")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _ready(self, names=None):
+        paths = [self.folder / n for n in names] if names is not None else self.folder.iterdir()
+        hits = sorted(
+            (p for p in paths if is_candidate(p, self.pattern, self.since)),
+            key=_mtime,
+            reverse=True,
+        )
+        return next((p for p in hits if is_complete(p)), None)
+
+    def _events(self, timeout):
+        """Names touched within `timeout` seconds (empty on timeout)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            _, _, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            names.append(os.fsdecode(buf[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def wait(self, timeout):
+        """Return the finished file's path, or raise TimeoutError after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        # The file may already be there if the download beat the watcher
+        found = self._ready()
+        while found is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No finished {self.pattern} in {self.folder} after {timeout}s")
+            if self.fd is not None:
+                names = self._events(min(remaining, 5.0))
+                # Rescan on the periodic wake-up too, in case a size check raced with the write
+                found = self._ready(names) if names else self._ready()
+            else:
+                time.sleep(min(POLL_SECONDS, remaining))
+                found = self._ready()
+        return found
+
+
+def wait_for_file(folder, pattern="*.xlsx", since=None, timeout=300):
+    with DownloadWatcher(folder, pattern, since) as watcher:
+        return watcher.wait(timeout)
@@ -0,0 +1,151 @@
+"""
+Compute cache for the `stock.forecast.report` wizard.
+
+`print_date_wise_stock_register` rebuilds the `stock.opening.closing` rows for
+a (company, from_date, to_date) range and is the heaviest call in the
+pipeline. Each compute is recorded here with a stamp of the rows it left
+behind (row count + latest write_date). Later runs and other consumers asking
+for the same key skip the wizard while the entry is younger than the TTL and
+the rows on the server still carry the same stamp, i.e. nobody recomputed a
+different range in between.
+
+    cache = forecast_cache()
+    cache.ensure(cid, FROM_DATE, TO_DATE, stamp=lambda: odoo.opening_closing_stamp(cid),
+                 compute=lambda: odoo.compute_forecast(cid, odoo.create_forecast_wizard(cid)))
+
+Env Vars
+--------
+- FORECAST_CACHE_TTL     : seconds a compute stays reusable (default 21600; 0 disables the cache)
+- FORECAST_CACHE_REFRESH : "1" recomputes regardless of the cache (the result is still recorded)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from incremental_sync import STATE_DIR
+
+log = logging.getLogger()
+
+CACHE_PATH = os.path.join(STATE_DIR, "forecast_cache.json")
+TTL = int(os.getenv("FORECAST_CACHE_TTL", "21600"))
+
+# A stamp is what the server reports for the computed rows: {"count": n, "write_date": "..."}
+Stamp = Dict[str, object]
+
+
+def cache_key(company_id, from_date, to_date) -> str:
+    return f"{company_id}|{from_date}|{to_date}"
+
+
+class ForecastCache:
+    """
+    Remembers which wizard computes are still valid on the server.
+
+    Entries live in one JSON file, so a manual re-run on the same runner (or a
+    notebook next to it) sees what the scheduled run computed. Per-key locks
+    make concurrent consumers of the same key compute once and share it.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.key_locks: Dict[str, threading.Lock] = {}
+        self.counts = Counter()
+
+    # ----- state -----
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"entries": {}, "totals": {}}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, state: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _update(self, key: str, entry: Optional[dict], outcome: str):
+        # Re-read before writing so entries from other companies/processes are kept
+        with self.lock:
+            self.counts[outcome] += 1
+            state = self._load()
+            if entry is not None:
+                state["entries"][key] = entry
+            totals = state.setdefault("totals", {})
+            totals[outcome] = totals.get(outcome, 0) + 1
+            self._save(state)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        with self.lock:
+            return self._load()["entries"].get(key)
+
+    # ----- freshness -----
+    def miss_reason(self, entry: Optional[dict], stamp: Callable[[], Stamp]) -> Optional[str]:
+        """Why `entry` cannot be reused, or None when the rows on the server are still the ones it recorded."""
+        if self.ttl <= 0:
+            return "disabled"
+        if os.getenv("FORECAST_CACHE_REFRESH", "0") == "1":
+            return "forced"
+        if entry is None:
+            return "cold"
+        if time.time() - entry["computed_at"] > self.ttl:
+            return "expired"
+        current = stamp()
+        if not current.get("count"):
+            return "rows missing"
+        if current != entry["stamp"]:
+            return "rows changed"
+        return None
+
+    # ----- compute -----
+    def ensure(self, company_id, from_date, to_date, stamp: Callable[[], Stamp], compute: Callable[[], object]) -> bool:
+        """
+        Make sure the rows for (company, from_date, to_date) are on the server.
+        Runs `compute` only on a miss; returns True on a cache hit.
+        """
+        key = cache_key(company_id, from_date, to_date)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.lookup(key)
+            reason = self.miss_reason(entry, stamp)
+            if reason is None:
+                age = int(time.time() - entry["computed_at"])
+                log.info(f"♻️ Forecast {key}: reusing compute from {age}s ago ({entry['stamp']['count']} rows)")
+                self._update(key, None, "hits")
+                return True
+
+            log.info(f"🧮 Forecast {key}: computing ({reason})")
+            started = time.time()
+            compute()
+            entry = {"computed_at": started, "seconds": round(time.time() - started, 1), "stamp": stamp()}
+            self._update(key, entry, "misses")
+            return False
+
+    def stats(self) -> dict:
+        """Hits and misses in this process, plus the totals recorded across runs."""
+        with self.lock:
+            totals = self._load().get("totals", {})
+            run = {"hits": self.counts["hits"], "misses": self.counts["misses"]}
+        calls = run["hits"] + run["misses"]
+        return {**run, "hit_rate": run["hits"] / calls if calls else 0.0, "totals": totals}
+
+
+_cache: Optional[ForecastCache] = None
+_cache_lock = threading.Lock()
+
+
+def forecast_cache() -> ForecastCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ForecastCache()
+        return _cache
@@ -0,0 +1,236 @@
+"""
+Vectorized RM consumption forecasts.
+
+The naive forecast per Item Code is
+
+    forecast = mean(last LOOKBACK_DAYS of daily consumption, ending on the
+               item's own last Receive Date) * HORIZON_DAYS
+
+Instead of resampling each item separately, the ledger is folded once into an
+item x day consumption matrix, and the trailing window of every item is taken
+from it in a single vectorized gather.
+
+Every entry point takes either a labelled ledger DataFrame or a compact
+ledger.Ledger; the latter is folded straight from its code and float arrays.
+"""
+
+from typing import Callable, Dict, Hashable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ledger import Ledger
+
+REQUIRED_COLS = ["Item Code", "Receive Date", "Issue Quantity"]
+
+
+class DailyConsumption:
+    """
+    Daily consumption per item.
+
+    Attributes
+    ----------
+    codes  : item codes, one per matrix row (sorted when comparable)
+    start  : calendar day of column 0
+    matrix : float64 array (items x days) of summed |Issue Quantity| per day
+    first  : first day index with data per item
+    last   : last day index with data per item
+    """
+
+    def __init__(self, codes, start, matrix, first, last):
+        self.codes = codes
+        self.start = start
+        self.matrix = matrix
+        self.first = first
+        self.last = last
+
+    @property
+    def n_items(self) -> int:
+        return self.matrix.shape[0]
+
+    def span_days(self) -> np.ndarray:
+        """Days between each item's first and last activity, inclusive."""
+        return self.last - self.first + 1
+
+    def window_sums(self, lookback_days: int) -> np.ndarray:
+        """
+        Sum of the `lookback_days` days ending on each item's last day (missing days count as 0).
+
+        Gathers the window columns and sums them directly, which reproduces the
+        per-item pandas mean to the last bit.
+        """
+        return self.trailing_window(lookback_days).sum(axis=1)
+
+    def trailing_window(self, days: int) -> np.ndarray:
+        """(items x days) block of the last `days` days up to each item's last day, oldest first."""
+        cols = self.last[:, None] + np.arange(-days + 1, 1)
+        return np.where(cols >= 0, self.matrix[np.arange(self.n_items)[:, None], np.maximum(cols, 0)], 0.0)
+
+    def trailing_sums(self, lookbacks: Sequence[int]) -> Dict[int, np.ndarray]:
+        """
+        {lookback -> per-item sum of the last `lookback` days} for several lookbacks at once.
+
+        One gather of the longest window plus a running sum from the newest day
+        backwards, so every extra lookback is a single column read.
+        """
+        longest = max(lookbacks)
+        running = np.cumsum(self.trailing_window(longest)[:, ::-1], axis=1)
+        return {lb: running[:, lb - 1] for lb in lookbacks}
+
+
+def _empty_daily() -> DailyConsumption:
+    empty = np.empty(0, dtype=np.int64)
+    return DailyConsumption(np.empty(0, dtype=object), None, np.zeros((0, 0)), empty, empty)
+
+
+def _fold(item, day, qty, codes, start) -> DailyConsumption:
+    n_items, n_days = len(codes), int(day.max()) + 1
+    matrix = np.bincount(item * n_days + day, weights=qty, minlength=n_items * n_days).reshape(n_items, n_days)
+    first = np.full(n_items, n_days, dtype=np.int64)
+    last = np.full(n_items, -1, dtype=np.int64)
+    np.minimum.at(first, item, day)
+    np.maximum.at(last, item, day)
+    return DailyConsumption(np.asarray(codes, dtype=object), start, matrix, first, last)
+
+
+def _daily_from_ledger(ledger: Ledger) -> DailyConsumption:
+    # Codes index a sorted vocabulary, so unique codes come out in Item Code order
+    code = ledger.codes["Item Code"]
+    dates = ledger.dates["Receive Date"]
+    valid = (code >= 0) & ~np.isnat(dates)
+    if not valid.any():
+        return _empty_daily()
+    qty = ledger.measure("Issue Quantity")[valid]
+    qty = np.abs(np.where(np.isnan(qty), 0.0, qty))
+    day_number = dates[valid].astype("datetime64[D]").astype(np.int64)
+    first_day = day_number.min()
+    used, item = np.unique(code[valid], return_inverse=True)
+    start = pd.Timestamp(np.datetime64(int(first_day), "D"))
+    return _fold(item.reshape(-1), day_number - first_day, qty, ledger.vocab[used], start)
+
+
+def daily_consumption(df_main: Union[pd.DataFrame, Ledger]) -> DailyConsumption:
+    """Fold ledger rows into one item x day matrix of |Issue Quantity| by Receive Date."""
+    if isinstance(df_main, Ledger):
+        missing = [c for c in REQUIRED_COLS if c not in df_main.columns]
+        if missing:
+            raise KeyError(f"Ledger is missing columns: {missing}")
+        return _daily_from_ledger(df_main)
+
+    missing = [c for c in REQUIRED_COLS if c not in df_main.columns]
+    if missing:
+        raise KeyError(f"Main sheet is missing columns: {missing}")
+
+    dates = pd.to_datetime(df_main["Receive Date"], errors="coerce")
+    codes = df_main["Item Code"]
+    valid = (dates.notna() & codes.notna()).to_numpy()
+
+    qty = pd.to_numeric(df_main["Issue Quantity"], errors="coerce").fillna(0).abs().to_numpy(dtype="float64")[valid]
+    days = dates[valid].dt.normalize()
+    if days.empty:
+        return _empty_daily()
+
+    start = days.min()
+    day = (days - start).dt.days.to_numpy()
+
+    try:
+        item, uniques = pd.factorize(codes[valid], sort=True)
+    except TypeError:
+        # Mixed code types (e.g. numbers and strings from Sheets) are not orderable
+        item, uniques = pd.factorize(codes[valid], sort=False)
+    return _fold(item, day, qty, uniques, start)
+
+
+def forecast_values(daily: DailyConsumption, lookback_days: int, horizon_days: int):
+    """Forecast per item, plus a mask of items with enough history and a positive forecast."""
+    forecast = daily.window_sums(lookback_days) / lookback_days * float(horizon_days)
+    ok = (daily.span_days() >= lookback_days) & np.isfinite(forecast) & (forecast > 0)
+    return forecast, ok
+
+
+def compute_top_forecasts(
+    df_main: Union[pd.DataFrame, Ledger],
+    lookback_days: int = 7,
+    horizon_days: int = 10,
+    key: Callable[[Hashable], str] = str,
+) -> Dict[str, float]:
+    """
+    Returns a dict {key(Item Code) -> forecast_value} for the Top-N selection to be done later.
+    Items whose history spans fewer than `lookback_days` days, or whose forecast is 0, are left out.
+    """
+    daily = daily_consumption(df_main)
+    forecast, ok = forecast_values(daily, lookback_days, horizon_days)
+    idx = np.flatnonzero(ok)
+    return {key(code): round(float(val), 2) for code, val in zip(daily.codes[idx], forecast[idx])}
+
+
+def forecast_grid(
+    df_main: Union[pd.DataFrame, Ledger],
+    lookbacks: Sequence[int] = (7, 14, 28),
+    horizons: Sequence[int] = (7, 10, 30),
+    key: Callable[[Hashable], str] = str,
+) -> pd.DataFrame:
+    """
+    Forecasts for every (lookback, horizon) pair from one pass over the daily consumption.
+
+    Returns a tidy frame with columns Item Code, Lookback Days, Horizon Days,
+    Forecast and Rank (1 = largest forecast within that setting). As in
+    compute_top_forecasts, items without enough history or with a zero forecast
+    are left out. Running sums may differ from compute_top_forecasts in the last
+    floating-point bit, so a value can round one cent apart.
+
+    Raises ValueError for a lookback or horizon that is not a positive number of days.
+    """
+    lookbacks = sorted(set(int(lb) for lb in lookbacks))
+    horizons = sorted(set(int(h) for h in horizons))
+    bad = [d for d in lookbacks + horizons if d <= 0]
+    if bad:
+        raise ValueError(f"Lookbacks and horizons must be positive day counts, got {bad}")
+    horizons = np.array(horizons, dtype="float64")
+    columns = ["Item Code", "Lookback Days", "Horizon Days", "Forecast", "Rank"]
+
+    daily = daily_consumption(df_main)
+    if not daily.n_items or not lookbacks or not len(horizons):
+        return pd.DataFrame(columns=columns)
+
+    sums = daily.trailing_sums(lookbacks)
+    span = daily.span_days()
+    parts = []
+    for lb in lookbacks:
+        forecast = sums[lb][:, None] / lb * horizons[None, :]
+        ok = (span >= lb)[:, None] & np.isfinite(forecast) & (forecast > 0)
+        item_idx, h_idx = np.nonzero(ok)
+        parts.append(pd.DataFrame({
+            "Item Code": [key(c) for c in daily.codes[item_idx]],
+            "Lookback Days": lb,
+            "Horizon Days": horizons[h_idx].astype(int),
+            "Forecast": np.round(forecast[item_idx, h_idx], 2),
+        }))
+
+    grid = pd.concat(parts, ignore_index=True)
+    grid["Rank"] = (
+        grid.groupby(["Lookback Days", "Horizon Days"])["Forecast"]
+            .rank(ascending=False, method="first")
+            .astype(int)
+    )
+    return grid.sort_values(["Lookback Days", "Horizon Days", "Rank"], ignore_index=True)[columns]
+
+
+def select_top(forecast_map: Dict[str, float], n: int) -> Dict[str, float]:
+    """
+    Top-`n` entries by value, largest first, using a partial partition instead of a full sort.
+    Ties keep their original order, matching a stable descending sort.
+    """
+    if n <= 0 or not forecast_map:
+        return {}
+    keys = list(forecast_map)
+    vals = np.fromiter(forecast_map.values(), dtype="float64", count=len(keys))
+    if n < len(vals):
+        kth = vals[np.argpartition(-vals, n - 1)[n - 1]]
+        above = np.flatnonzero(vals > kth)
+        ties = np.flatnonzero(vals == kth)[: n - len(above)]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(len(vals))
+    order = idx[np.lexsort((idx, -vals[idx]))]
+    return {keys[i]: forecast_map[keys[i]] for i in order}
@@ -0,0 +1,153 @@
+"""
+Process-wide Google Sheets client provider.
+
+Service-account credentials are loaded once, the access token is refreshed
+ahead of expiry, and every caller shares one gspread client over one
+keep-alive HTTP session. Spreadsheet and Worksheet handles are cached by key
+and title, so opening the same tab again costs no metadata round trip.
+
+Env Vars
+--------
+- GOOGLE_APPLICATION_CREDENTIALS : path to the service account JSON (default "service_account.json")
+- GCP_SERVICE_ACCOUNT_B64        : Base64 service account JSON, written to that path when the file is missing
+- GOOGLE_TOKEN_REFRESH_MARGIN    : seconds before expiry to refresh the token (default 300)
+- GOOGLE_HTTP_POOL_SIZE          : keep-alive connections in the shared session (default 8)
+"""
+
+import base64
+import datetime as dt
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import gspread
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from gspread.utils import extract_id_from_url
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger()
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+REFRESH_MARGIN = int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300"))
+POOL_SIZE = int(os.getenv("GOOGLE_HTTP_POOL_SIZE", "8"))
+
+
+def service_account_path() -> str:
+    """Path to the service account JSON, materialised from GCP_SERVICE_ACCOUNT_B64 if needed."""
+    sa_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "service_account.json")
+    if os.path.exists(sa_path):
+        return sa_path
+    b64 = os.environ.get("GCP_SERVICE_ACCOUNT_B64")
+    if b64:
+        if os.path.dirname(sa_path):
+            os.makedirs(os.path.dirname(sa_path), exist_ok=True)
+        with open(sa_path, "wb") as f:
+            f.write(base64.b64decode(b64))
+        return sa_path
+    raise FileNotFoundError(f"Service account JSON not found at {sa_path} and GCP_SERVICE_ACCOUNT_B64 not set.")
+
+
+def sheet_key(key_or_url: str) -> str:
+    return extract_id_from_url(key_or_url) if key_or_url.startswith("http") else key_or_url
+
+
+class GoogleClients:
+    """Credentials, session, gspread client and handle caches shared by the whole process."""
+
+    def __init__(self, sa_path: Optional[str] = None, scopes=SCOPES, pool_size: int = POOL_SIZE):
+        self.sa_path = sa_path
+        self.scopes = scopes
+        self.pool_size = pool_size
+        self.creds = None
+        self.session = None
+        self.token_session = None
+        self.gc = None
+        self.spreadsheets: Dict[str, gspread.Spreadsheet] = {}
+        self.worksheets: Dict[Tuple[str, str], gspread.Worksheet] = {}
+        self.lock = threading.RLock()
+
+    def _refresh_if_needed(self):
+        expiry = self.creds.expiry
+        if expiry is not None and expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=dt.timezone.utc)  # google-auth keeps expiry as naive UTC
+        soon = expiry is not None and expiry - dt.datetime.now(dt.timezone.utc) < dt.timedelta(seconds=REFRESH_MARGIN)
+        if not self.creds.valid or soon:
+            # A plain session: going through the AuthorizedSession would attach the
+            # old bearer token and refresh a second time on a 401
+            if self.token_session is None:
+                self.token_session = requests.Session()
+            self.creds.refresh(Request(self.token_session))
+
+    def client(self) -> gspread.Client:
+        with self.lock:
+            if self.gc is None:
+                self.creds = Credentials.from_service_account_file(self.sa_path or service_account_path(), scopes=self.scopes)
+                self.session = AuthorizedSession(self.creds)
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                self.session.mount("https://", adapter)
+                self.gc = gspread.Client(self.creds, session=self.session)
+                log.info("🔐 Google Sheets client ready")
+            self._refresh_if_needed()
+            return self.gc
+
+    def spreadsheet(self, key_or_url: str) -> gspread.Spreadsheet:
+        key = sheet_key(key_or_url)
+        gc = self.client()
+        with self.lock:
+            if key not in self.spreadsheets:
+                sh = gc.open_by_key(key)
+                self.spreadsheets[key] = sh
+                # One metadata read fills the handle cache for every tab of the spreadsheet
+                for ws in sh.worksheets():
+                    self.worksheets[(key, ws.title)] = ws
+            return self.spreadsheets[key]
+
+    def worksheet(self, key_or_url: str, title: str) -> gspread.Worksheet:
+        key = sheet_key(key_or_url)
+        sh = self.spreadsheet(key)
+        with self.lock:
+            if (key, title) not in self.worksheets:
+                self.worksheets[(key, title)] = sh.worksheet(title)
+            return self.worksheets[(key, title)]
+
+    def invalidate(self, key_or_url: Optional[str] = None):
+        """Forget cached handles (all, or one spreadsheet's) after tabs were added, renamed or resized elsewhere."""
+        with self.lock:
+            if key_or_url is None:
+                self.spreadsheets.clear()
+                self.worksheets.clear()
+                return
+            key = sheet_key(key_or_url)
+            self.spreadsheets.pop(key, None)
+            for k in [k for k in self.worksheets if k[0] == key]:
+                del self.worksheets[k]
+
+
+_provider: Optional[GoogleClients] = None
+_provider_lock = threading.Lock()
+
+
+def provider() -> GoogleClients:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = GoogleClients()
+        return _provider
+
+
+def get_client() -> gspread.Client:
+    return provider().client()
+
+
+def open_spreadsheet(key_or_url: str) -> gspread.Spreadsheet:
+    return provider().spreadsheet(key_or_url)
+
+
+def open_worksheet(key_or_url: str, title: str) -> gspread.Worksheet:
+    return provider().worksheet(key_or_url, title)
@@ -0,0 +1,176 @@
+"""
+Batched writer for the helper spreadsheet's lookup columns.
+
+The notebook fills single columns of the helper tabs (Top-10 consumption in F,
+Top-N forecast in G) next to an RM-code key column. Instead of reloading a
+whole tab and sending one range per matched row, each update:
+
+- reads only the header row, the key column and the target column,
+- maps codes to values with one vectorized lookup,
+- keeps only the cells whose value actually changes, merged into contiguous
+  row ranges,
+
+and is staged on a writer shared per spreadsheet. flush_all() then sends every
+staged tab and column in a single values.batchUpdate; the notebook calls it
+once, from its last cell. If the run stops before that (an error, an early
+sys.exit), an atexit hook sends whatever was staged, so columns computed by
+earlier cells are not lost.
+"""
+
+import atexit
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from google_clients import open_spreadsheet, sheet_key
+from run_metrics import stage
+from sheets_uploader import UPLOAD_WORKERS, BulkUploader, GspreadTransport
+
+log = logging.getLogger()
+
+# A key column is a header name as pandas would label it ("RM Code.1") or a
+# picker over those labels (like the notebook's _find_rm_code_col); a fixed
+# column is passed as letter="D" instead
+KeySpec = Union[str, Callable[[Sequence[str]], Optional[str]]]
+
+
+def pandas_labels(header: Sequence[str]) -> List[str]:
+    """Header labels deduplicated the way read_csv/get_as_dataframe do it ("X", "X.1", ...)."""
+    seen: Dict[str, int] = {}
+    labels = []
+    for name in header:
+        name = str(name)
+        n = seen.get(name, 0)
+        labels.append(name if n == 0 else f"{name}.{n}")
+        seen[name] = n + 1
+    return labels
+
+
+def _column(values_range) -> list:
+    cols = values_range.get("values", [])
+    return list(cols[0]) if cols else []
+
+
+def _runs(rows: Sequence[int]):
+    """Split sorted row numbers into (first, last) runs of consecutive rows."""
+    start = prev = None
+    for r in rows:
+        if start is None:
+            start = prev = r
+        elif r == prev + 1:
+            prev = r
+        else:
+            yield start, prev
+            start = prev = r
+    if start is not None:
+        yield start, prev
+
+
+class HelperSheetWriter:
+    """Collects column updates for one helper spreadsheet and sends them in one request."""
+
+    def __init__(self, sheet_url: str):
+        self.spreadsheet = open_spreadsheet(sheet_url)
+        self.pending: List[dict] = []
+
+    def _key_letter(self, tab: str, key: Optional[KeySpec], letter: Optional[str]) -> Optional[str]:
+        if letter is not None:
+            return letter
+        if key is None:
+            raise ValueError("stage() needs a key column: key= (header label or picker) or letter=")
+        got = self.spreadsheet.values_get(f"'{tab}'!1:1")
+        labels = pandas_labels(got.get("values", [[]])[0])
+        label = key(labels) if callable(key) else (key if key in labels else None)
+        if label is None:
+            return None
+        return rowcol_to_a1(1, labels.index(label) + 1).rstrip("1")
+
+    def stage(
+        self,
+        tab: str,
+        key: Optional[KeySpec] = None,
+        *,
+        target: str,
+        values: Dict[str, object],
+        letter: Optional[str] = None,
+        canon: Callable[[object], str] = str,
+        clear_unmatched: bool = True,
+    ) -> int:
+        """
+        Stage `target` column updates on `tab`: each data row gets values[canon(key cell)].
+
+        The key column is found by header (`key`) or given as a column `letter`.
+        Rows whose code is not in `values` are blanked when `clear_unmatched`,
+        otherwise left as they are. Returns the number of cells staged.
+        """
+        letter = self._key_letter(tab, key, letter)
+        if letter is None:
+            log.info(f"ℹ️ {tab}: key column {key!r} not found; nothing staged")
+            return 0
+
+        got = self.spreadsheet.values_batch_get(
+            [f"'{tab}'!{letter}2:{letter}", f"'{tab}'!{target}2:{target}"],
+            params={"majorDimension": "COLUMNS", "valueRenderOption": "UNFORMATTED_VALUE"},
+        )
+        key_range, target_range = got["valueRanges"]
+        codes = pd.Series(_column(key_range), dtype=object)
+        current = pd.Series(_column(target_range), dtype=object).reindex(codes.index).fillna("")
+
+        # Index join on canonical codes; an object lookup keeps ints as ints
+        lookup = pd.Series({canon(k): v for k, v in values.items()}, dtype=object)
+        lookup = lookup[~lookup.index.duplicated()]
+        keys = codes.map(lambda c: "" if c == "" else canon(c))
+        new = pd.Series(lookup.reindex(keys).to_numpy(), index=codes.index, dtype=object)
+        new[keys.eq("").to_numpy()] = None
+        if clear_unmatched:
+            new = new.where(new.notna(), "")
+        changed = new.notna() & (new.astype(str) != current.astype(str))
+
+        rows = (changed[changed].index + 2).tolist()  # data starts on row 2
+        for first, last in _runs(rows):
+            cells = new.iloc[first - 2:last - 1].tolist()
+            self.pending.append({
+                "range": f"'{tab}'!{target}{first}:{target}{last}",
+                "values": [[v] for v in cells],
+            })
+        log.info(f"🧷 {tab}!{target}: {len(rows)} cells staged")
+        return len(rows)
+
+    def flush(self, max_workers: int = UPLOAD_WORKERS) -> int:
+        """Send everything staged in one batchUpdate; returns the number of ranges sent."""
+        if not self.pending:
+            return 0
+        data, self.pending = self.pending, []
+        with stage("helper sheets flush", rows=len(data)):
+            BulkUploader(GspreadTransport(self.spreadsheet), max_workers=max_workers).upload(data)
+        log.info(f"✅ Helper sheet: {len(data)} ranges written")
+        return len(data)
+
+
+_writers: Dict[str, HelperSheetWriter] = {}
+
+
+def helper_writer(sheet_url: str) -> HelperSheetWriter:
+    """The shared writer for this spreadsheet, so every cell stages onto the same batch."""
+    key = sheet_key(sheet_url)
+    if key not in _writers:
+        _writers[key] = HelperSheetWriter(key)
+    return _writers[key]
+
+
+def flush_all(max_workers: int = UPLOAD_WORKERS) -> int:
+    return sum(w.flush(max_workers) for w in _writers.values())
+
+
+def _flush_at_exit():
+    # Last resort for staged columns a cell did not get to flush
+    try:
+        # Worker threads can no longer start at exit, so send inline
+        flush_all(max_workers=1)
+    except Exception as e:
+        log.error(f"❌ Helper sheet: staged updates not written at exit: {e}")
+
+
+atexit.register(_flush_at_exit)
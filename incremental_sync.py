@@ -0,0 +1,132 @@
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+from snapshot_store import SnapshotStore
+
+# === Local sync state (one folder per company) ===
+STATE_DIR = os.getenv("SYNC_STATE_DIR", os.path.join(os.getcwd(), "state"))
+
+# A ledger row is one lot of one item; repeated (Item Code, Invoice) pairs are
+# told apart by their position within the pair.
+KEY_COLS = ["Item Code", "Invoice"]
+OPENING_COLS = ["Opening Quantity", "Opening Value"]
+FLOW_COLS = ["Receive Quantity", "Receive Value", "Issue Quantity", "Issue Value"]
+
+
+def company_slug(cname):
+    return cname.lower().replace(" ", "")
+
+
+def _state_path(cname, name):
+    folder = os.path.join(STATE_DIR, company_slug(cname))
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, name)
+
+
+# ========= WATERMARK ==========
+def load_watermark(cname):
+    path = _state_path(cname, "watermark.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_watermark(cname, from_date, to_date, hashes):
+    path = _state_path(cname, "watermark.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"from_date": from_date, "to_date": to_date, "row_hashes": hashes}, f)
+    os.replace(tmp, path)
+
+
+def plan_window(watermark, from_date, to_date):
+    """
+    Return the (from, to) window still to be computed, or None when the snapshot
+    is already current. A missing watermark or a moved FROM_DATE means a full
+    range is needed, signalled by returning (from_date, to_date).
+    """
+    if not watermark or watermark.get("from_date") != from_date:
+        return from_date, to_date
+    start = (date.fromisoformat(watermark["to_date"]) + timedelta(days=1)).isoformat()
+    if start > to_date:
+        return None
+    return start, to_date
+
+
+# ========= SNAPSHOT ==========
+def load_snapshot(cname):
+    return SnapshotStore().latest(cname)
+
+
+def save_snapshot(cname, as_of, df):
+    SnapshotStore().write(cname, as_of, df)
+
+
+def _key_text(value):
+    # Odoo `false`, None and NaN are all "no value"; pandas 3's astype(str) would leave NaN in place
+    if value is None or value is False or value != value:
+        return ""
+    return str(value)
+
+
+def row_keys(df, cols=KEY_COLS):
+    parts = [df[c].astype(object).map(_key_text).tolist() for c in cols]
+    base = pd.Series(["|".join(p) for p in zip(*parts)], index=df.index, dtype=object)
+    seen = base.groupby(base).cumcount()
+    return pd.Series([f"{k}#{n}" for k, n in zip(base, seen)], index=df.index, dtype=object)
+
+
+def row_hashes(df):
+    """Content hash per row keyed by row_keys, as {key: hex digest}."""
+    if df.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return dict(zip(row_keys(df), (f"{h:016x}" for h in hashes)))
+
+
+def merge_window(snapshot, window):
+    """
+    Fold a ledger computed over (watermark, to_date] into the full-range snapshot.
+
+    Openings stay as of the original FROM_DATE, receipts and issues accumulate,
+    and closings plus descriptive columns take the window's newer values. Lots
+    first seen in the window had no earlier activity, so their window opening
+    is also their full-range opening.
+    """
+    if snapshot is None or snapshot.empty:
+        return window.reset_index(drop=True)
+    if window.empty:
+        return snapshot
+
+    # Align on plain object columns; callers re-apply the store dtypes afterwards
+    snapshot = snapshot.astype({c: object for c in snapshot.columns if isinstance(snapshot[c].dtype, pd.CategoricalDtype)})
+    window = window.astype({c: object for c in window.columns if isinstance(window[c].dtype, pd.CategoricalDtype)})
+
+    old = snapshot.set_axis(row_keys(snapshot), axis=0)
+    new = window.set_axis(row_keys(window), axis=0)
+
+    merged = new.combine_first(old)
+    both = new.index.intersection(old.index)
+    opening = [c for c in OPENING_COLS if c in merged.columns]
+    flow = [c for c in FLOW_COLS if c in merged.columns]
+    merged.loc[both, opening] = old.loc[both, opening]
+    merged.loc[both, flow] = old.loc[both, flow].add(new.loc[both, flow], fill_value=0)
+
+    # Keep the snapshot's row order and append lots first seen in this window
+    order = old.index.append(new.index.difference(old.index, sort=False))
+    columns = list(snapshot.columns) + [c for c in window.columns if c not in snapshot.columns]
+    return merged.reindex(order)[columns].reset_index(drop=True)
+
+
+def changed_rows(df, previous_hashes):
+    """Rows of df that are new or whose content changed since previous_hashes, plus the new hash map."""
+    hashes = row_hashes(df)
+    if not hashes:
+        return df, hashes
+    previous_hashes = previous_hashes or {}
+    mask = [previous_hashes.get(k) != h for k, h in hashes.items()]
+    return df[mask], hashes
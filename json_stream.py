@@ -0,0 +1,126 @@
+"""
+Incremental decoding of large JSON-RPC search responses.
+
+`RecordStream` consumes a response body chunk by chunk (e.g. requests'
+`iter_content`) and yields the objects of `result.records` one at a time as
+soon as they are complete, so a page never exists as raw body + full object
+graph + DataFrame at once. Each record is parsed with the C-accelerated
+`json.JSONDecoder.raw_decode`; only a partial record at the end of a chunk is
+ever re-read. Bodies that do not have the `{"result": {"records": [...]}}`
+shape (errors, other methods) are buffered and parsed whole at the end.
+
+    stream = RecordStream(r.iter_content(CHUNK_BYTES))
+    for batch in stream.batches(2000):
+        frames.append(decoder.decode(batch))
+    total = stream.length
+"""
+
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, List, Optional
+
+_DECODER = json.JSONDecoder()
+_HEAD = re.compile(r'"result"\s*:\s*\{\s*(?:"length"\s*:\s*(\d+)\s*,\s*)?"records"\s*:\s*\[')
+_LENGTH = re.compile(r'"length"\s*:\s*(\d+)')
+_WS = " \t\r\n,"
+# Longest prefix of the body the head pattern can need before "records": [
+_HEAD_LIMIT = 4096
+
+
+class RecordStream:
+    """Iterates the records of one streamed `web_search_read` body; `length` / `error` are set once it is exhausted."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = chunks
+        self.length: Optional[int] = None
+        self.error = None
+        self.count = 0
+        self.bytes = 0
+
+    def _text(self) -> Iterator[str]:
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        for chunk in self.chunks:
+            if chunk:
+                self.bytes += len(chunk)
+                yield utf8.decode(chunk)
+        yield utf8.decode(b"", final=True)
+
+    def _finish(self, body: str):
+        """Parse a non-streamable body whole (error answers, unexpected shapes)."""
+        payload = json.loads(body)
+        self.error = payload.get("error")
+        result = payload.get("result") or {}
+        records = result.get("records", []) if isinstance(result, dict) else []
+        self.length = result.get("length", len(records)) if isinstance(result, dict) else None
+        return records
+
+    def __iter__(self) -> Iterator[dict]:
+        text = self._text()
+        buf = ""
+        # ----- head: find the start of result.records -----
+        for piece in text:
+            buf += piece
+            head = _HEAD.search(buf)
+            if head:
+                if head.group(1):
+                    self.length = int(head.group(1))
+                buf = buf[head.end():]
+                break
+            if len(buf) > _HEAD_LIMIT:
+                # Not a records answer we can stream (or an error): read it whole
+                buf += "".join(text)
+                for record in self._finish(buf):
+                    self.count += 1
+                    yield record
+                return
+        else:
+            for record in self._finish(buf):
+                self.count += 1
+                yield record
+            return
+
+        # ----- records: one raw_decode per object -----
+        done = False
+        while not done:
+            pos, end = 0, len(buf)
+            while True:
+                while pos < end and buf[pos] in _WS:
+                    pos += 1
+                if pos == end:
+                    break
+                if buf[pos] == "]":
+                    pos += 1
+                    done = True
+                    break
+                try:
+                    record, nxt = _DECODER.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break  # record split across chunks: wait for more text
+                pos = nxt
+                self.count += 1
+                yield record
+            buf = buf[pos:]
+            if done:
+                break
+            piece = next(text, None)
+            if piece is None:
+                raise ValueError(f"Truncated JSON-RPC body after {self.count} records")
+            buf += piece
+
+        # ----- tail: the rest of the envelope is small -----
+        tail = buf + "".join(text)
+        if self.length is None:
+            found = _LENGTH.search(tail)
+            self.length = int(found.group(1)) if found else self.count
+
+    def batches(self, size: int) -> Iterator[List[dict]]:
+        """The records in lists of up to `size`, for decoding into frames as they arrive."""
+        batch = []
+        for record in self:
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,284 @@
+"""
+Compact in-memory opening/closing ledger.
+
+A labelled ledger DataFrame keeps every Product, Category, Item, Item Code,
+Invoice and Unit value as its own Python string, and each copy of the frame
+repeats them. `Ledger` stores the same rows column-wise in typed arrays:
+
+- every text column (the snapshot store's text + categorical columns) as
+  integer codes into ONE sorted vocabulary shared by all text columns;
+- every measure (quantities, values, prices) as one row of a single
+  contiguous float64 block (measures x rows);
+- dates as datetime64[ns] arrays.
+
+The vocabulary is sorted, so comparing codes orders rows exactly like
+comparing the strings, and code -1 means empty (Odoo `false`, blank cells).
+All arrays are read-only; frame() and the accessors hand out views, never
+copies, so one Ledger can back every groupby and forecast of a run:
+
+    ledger = Ledger.from_parquet(store.path("Zipper", "2025-09-01"))
+    ledger.measure("Issue Quantity")                  # float64 view
+    ledger.frame(["Item Code", "Issue Value"])        # categorical + float columns, no copies
+        .groupby("Item Code", observed=True).sum()
+    compute_top_forecasts(ledger)
+
+Ledgers are built with LedgerBuilder from decoded pages (OdooClient.fetch_ledger),
+Arrow tables (Parquet snapshots, several dates at once for multi-year
+history) or any labelled DataFrame (Google Sheets).
+"""
+
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from record_decoder import ledger_kind
+
+KIND_ROLES = {"text": "text", "category": "text", "float": "measure", "date": "date"}
+SNAPSHOT_DATE = "Snapshot Date"
+
+
+def _code_dtype(n_strings: int):
+    # The code width pandas itself picks for that many categories, so
+    # Categorical.from_codes keeps our arrays instead of casting a copy
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_strings < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _label(value) -> Optional[str]:
+    # Strings as they are; Odoo `false` / NaN / None are empty; numbers from Sheets become text
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, bool) or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
+
+
+def _read_only(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+class Vocabulary:
+    """Append-only string → code table filled while a ledger is built."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def encode(self, uniques: Sequence) -> np.ndarray:
+        """Global codes of a column's distinct values (-1 for empties), adding new strings."""
+        out = np.empty(len(uniques) + 1, dtype=np.int64)
+        out[-1] = -1  # local code -1 indexes here
+        index, strings = self.index, self.strings
+        for i, value in enumerate(uniques):
+            label = _label(value)
+            if label is None:
+                out[i] = -1
+                continue
+            code = index.get(label)
+            if code is None:
+                code = index[label] = len(strings)
+                strings.append(label)
+            out[i] = code
+        return out
+
+
+class LedgerBuilder:
+    """
+    Accumulates ledger pieces (frames or Arrow tables) into one Ledger.
+
+    Each piece is reduced to codes / float / datetime arrays as it arrives,
+    so the pieces themselves can be dropped straight away.
+    """
+
+    def __init__(self):
+        self.vocab = Vocabulary()
+        self.columns: Optional[List[str]] = None
+        self.roles: Dict[str, str] = {}
+        self.chunks: Dict[str, List[np.ndarray]] = {}
+        self.rows = 0
+
+    def _start(self, names: Iterable[str], extra_dates: Sequence[str] = ()):
+        if self.columns is not None:
+            return
+        self.columns = [c for c in names if ledger_kind(c) in KIND_ROLES] + list(extra_dates)
+        self.roles = {c: KIND_ROLES.get(ledger_kind(c), "date") for c in self.columns}
+        self.chunks = {c: [] for c in self.columns}
+
+    def _add(self, column: str, values: np.ndarray):
+        self.chunks[column].append(values)
+
+    def _missing(self, role: str, n: int) -> np.ndarray:
+        if role == "text":
+            return np.full(n, -1, dtype=np.int64)
+        if role == "measure":
+            return np.full(n, np.nan)
+        return np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+
+    def append_frame(self, df: pd.DataFrame, **dates) -> "LedgerBuilder":
+        """Add a labelled ledger frame; keyword dates become constant date columns (e.g. Snapshot Date)."""
+        self._start(df.columns, list(dates))
+        n = len(df)
+        for c in self.columns:
+            role = self.roles[c]
+            if c in dates:
+                values = np.full(n, np.datetime64(pd.Timestamp(dates[c]), "ns"))
+            elif c not in df.columns:
+                values = self._missing(role, n)
+            elif role == "text":
+                s = df[c]
+                if isinstance(s.dtype, pd.CategoricalDtype):
+                    local, uniques = s.cat.codes.to_numpy(np.int64), list(s.cat.categories)
+                else:
+                    local, uniques = pd.factorize(s.to_numpy(dtype=object))
+                values = self.vocab.encode(uniques)[local]
+            elif role == "measure":
+                values = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                values = pd.to_datetime(df[c], errors="coerce").to_numpy(dtype="datetime64[ns]")
+            self._add(c, values)
+        self.rows += n
+        return self
+
+    def append_table(self, table: pa.Table, **dates) -> "LedgerBuilder":
+        """Add an Arrow table (e.g. a Parquet snapshot) without going through Python strings per row."""
+        self._start(table.column_names, list(dates))
+        n = table.num_rows
+        for c in self.columns:
+            role = self.roles[c]
+            if c in dates:
+                values = np.full(n, np.datetime64(pd.Timestamp(dates[c]), "ns"))
+            elif c not in table.column_names:
+                values = self._missing(role, n)
+            elif role == "text":
+                column = table.column(c)
+                if pa.types.is_dictionary(column.type):
+                    column = column.cast(column.type.value_type)
+                encoded = pc.dictionary_encode(column.combine_chunks())
+                local = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False).astype(np.int64)
+                values = self.vocab.encode(encoded.dictionary.to_pylist())[local]
+            elif role == "measure":
+                values = table.column(c).to_numpy().astype(np.float64, copy=False)
+            else:
+                values = table.column(c).cast(pa.timestamp("ns")).to_numpy()
+            self._add(c, values)
+        self.rows += n
+        return self
+
+    def build(self) -> "Ledger":
+        if self.columns is None:
+            self._start([])
+        strings = np.array(self.vocab.strings, dtype=object)
+        order = np.argsort(strings, kind="stable")
+        rank = np.empty(len(order) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        rank[-1] = -1  # global code -1 stays empty
+        code_dtype = _code_dtype(len(strings))
+
+        codes, dates, measure_names = {}, {}, []
+        for c in self.columns:
+            if self.roles[c] == "measure":
+                measure_names.append(c)
+        measures = np.empty((len(measure_names), self.rows), dtype=np.float64)
+
+        for c in self.columns:
+            parts = self.chunks.pop(c)
+            role = self.roles[c]
+            if role == "text":
+                merged = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+                codes[c] = _read_only(rank[merged].astype(code_dtype))
+            elif role == "measure":
+                row = measures[measure_names.index(c)]
+                if parts:
+                    np.concatenate(parts, out=row)
+            else:
+                dates[c] = _read_only(np.concatenate(parts) if parts else np.empty(0, dtype="datetime64[ns]"))
+        return Ledger(_read_only(strings[order]), codes, _read_only(measures), measure_names, dates, list(self.columns))
+
+
+class Ledger:
+    """Dictionary-encoded ledger rows; see the module docstring."""
+
+    def __init__(self, vocab: np.ndarray, codes: Dict[str, np.ndarray], measures: np.ndarray,
+                 measure_names: List[str], dates: Dict[str, np.ndarray], columns: List[str]):
+        self.vocab = vocab
+        self.codes = codes
+        self.measures = measures
+        self.measure_names = measure_names
+        self.dates = dates
+        self.columns = columns
+        self.dtype = pd.CategoricalDtype(pd.Index(vocab, dtype=object))
+        self._measure_row = {name: i for i, name in enumerate(measure_names)}
+
+    # ----- constructors -----
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Ledger":
+        return LedgerBuilder().append_frame(df).build()
+
+    @classmethod
+    def from_parquet(cls, path: str, columns: Optional[List[str]] = None) -> "Ledger":
+        return LedgerBuilder().append_table(pq.read_table(path, columns=columns)).build()
+
+    @classmethod
+    def from_snapshots(cls, store, cname: str, start=None, end=None, columns: Optional[List[str]] = None) -> "Ledger":
+        """Every snapshot of `cname` dated within [start, end], stacked with a Snapshot Date column."""
+        start = str(start) if start else None
+        end = str(end) if end else None
+        builder = LedgerBuilder()
+        for d in store.dates(cname):
+            if (start and d < start) or (end and d > end):
+                continue
+            builder.append_table(pq.read_table(store.path(cname, d), columns=columns), **{SNAPSHOT_DATE: d})
+        return builder.build()
+
+    # ----- size -----
+    def __len__(self) -> int:
+        return self.measures.shape[1] if self.measure_names else len(next(iter({**self.codes, **self.dates}.values()), ()))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held: code, measure and date arrays plus the vocabulary strings."""
+        arrays = self.measures.nbytes + sum(a.nbytes for a in self.codes.values()) + sum(a.nbytes for a in self.dates.values())
+        return arrays + self.vocab.nbytes + sum(map(sys.getsizeof, self.vocab))
+
+    # ----- zero-copy access -----
+    def measure(self, name: str) -> np.ndarray:
+        return self.measures[self._measure_row[name]]
+
+    def categorical(self, name: str) -> pd.Categorical:
+        """A text column as a Categorical over the shared vocabulary (codes are not copied)."""
+        return pd.Categorical.from_codes(self.codes[name], dtype=self.dtype, validate=False)
+
+    def column(self, name: str):
+        if name in self._measure_row:
+            return self.measure(name)
+        if name in self.codes:
+            return self.categorical(name)
+        return self.dates[name]
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        The ledger as a read-only DataFrame view: text columns are categoricals over
+        the shared vocabulary (group them with observed=True), measures and dates
+        reference the ledger's arrays.
+        """
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({c: self.column(c) for c in columns}, copy=False)
+
+    # ----- strings -----
+    def strings(self, name: str) -> np.ndarray:
+        """A text column decoded back to an object array of strings / None."""
+        lookup = np.append(self.vocab, None)
+        return lookup[self.codes[name]]
+
+    def code(self, value: str) -> int:
+        """Vocabulary code of `value`, or -1 when no row carries it."""
+        i = int(np.searchsorted(self.vocab, value))
+        return i if i < len(self.vocab) and self.vocab[i] == value else -1
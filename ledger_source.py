@@ -0,0 +1,235 @@
+"""
+Shared ledger loader for the forecasting notebook.
+
+Mt_Zip_db.py stores every fetched ledger in the local snapshot store just
+before the notebook runs, so the analysis cells read that snapshot instead of
+downloading the same tab back from Google Sheets. Sheets stays the fallback when
+no recent snapshot exists. Each tab is loaded once per process and shared by
+every cell that asks for it.
+
+Read-only consumers (forecasts, summaries) use load_compact_ledger(), which
+returns the same rows as a dictionary-encoded ledger.Ledger: the snapshot is
+read straight from Parquet into codes and float arrays, and no DataFrame copy
+of the tab is kept.
+
+Consumers that only need per-item consumption use load_consumption_summary(),
+which aggregates a local snapshot when there is one and otherwise asks Odoo
+for the sums (read_group, one row per item) rather than downloading every lot.
+
+Env Vars
+--------
+- LEDGER_SOURCE         : "auto" (default), "snapshot", "sheets" or "odoo" (fetch live, skipping Sheets)
+- LEDGER_MAX_AGE_DAYS   : oldest snapshot "auto" still accepts (default 3, the cron cadence)
+- SUMMARY_SOURCE        : "auto" (default: snapshot, then Odoo, then Sheets), "odoo" or "ledger"
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple, Union
+
+import gspread
+import numpy as np
+import pandas as pd
+from gspread_dataframe import get_as_dataframe
+
+from google_clients import open_worksheet
+from ledger import Ledger
+from run_metrics import stage
+from snapshot_store import SnapshotStore
+
+MAIN_SHEET_URL = "https://docs.google.com/spreadsheets/d/1tSgmESOWqYRkDk_KhewnaaJmQGSUaSILzOzpade9tRc/edit?gid=0#gid=0"
+
+# Worksheet tab -> company name used by Mt_Zip_db.py / the snapshot store
+TAB_COMPANIES = {
+    "Zipper": "Zipper",
+    "Metal": "Metal Trims",
+}
+
+_cache: Dict[str, pd.DataFrame] = {}
+_ledgers: Dict[str, Ledger] = {}
+
+
+def _latest_snapshot(tab: str, max_age_days: Optional[int]) -> Optional[Tuple[SnapshotStore, str, str]]:
+    """(store, company, date) of the newest snapshot behind `tab`, if recent enough."""
+    cname = TAB_COMPANIES.get(tab)
+    if cname is None:
+        return None
+    store = SnapshotStore()
+    dates = store.dates(cname)
+    if not dates:
+        return None
+    if max_age_days is not None and dates[-1] < (date.today() - timedelta(days=max_age_days)).isoformat():
+        print(f"ℹ️ Snapshot for {tab} is from {dates[-1]}; too old, using Google Sheets.")
+        return None
+    print(f"🗄️ {tab}: using local snapshot {dates[-1]}")
+    return store, cname, dates[-1]
+
+
+def _from_snapshot(tab: str, max_age_days: Optional[int]) -> Optional[pd.DataFrame]:
+    found = _latest_snapshot(tab, max_age_days)
+    if found is None:
+        return None
+    store, cname, as_of = found
+    return store.read(cname, as_of)
+
+
+def _compact_from_snapshot(tab: str, max_age_days: Optional[int]) -> Optional[Ledger]:
+    found = _latest_snapshot(tab, max_age_days)
+    if found is None:
+        return None
+    store, cname, as_of = found
+    return Ledger.from_parquet(store.path(cname, as_of))
+
+
+def _odoo(tab: str):
+    """(client, company id, company name) behind `tab`, or None when Odoo is not configured."""
+    cname = TAB_COMPANIES.get(tab)
+    if cname is None or not os.environ.get("ODOO_URL"):
+        return None
+    # Imported lazily: only needed when Odoo is configured
+    from odoo_client import COMPANIES, OdooClient
+
+    cid = {name: cid for cid, name in COMPANIES.items()}[cname]
+    return OdooClient(), cid, cname
+
+
+def _from_odoo(tab: str, compact: bool = False) -> Union[pd.DataFrame, Ledger]:
+    found = _odoo(tab)
+    if found is None:
+        raise RuntimeError(f"LEDGER_SOURCE=odoo needs ODOO_URL and a company for worksheet {tab!r}")
+    odoo, cid, cname = found
+    odoo.login()
+    odoo.ensure_forecast(cid)
+    print(f"🌐 {tab}: fetched live from Odoo")
+    return odoo.fetch_ledger(cid, cname) if compact else odoo.read_opening_closing(cid, cname)
+
+
+def _from_sheets(tab: str, sheet_url: str, gc: Optional[gspread.Client]) -> pd.DataFrame:
+    ws = gc.open_by_url(sheet_url).worksheet(tab) if gc is not None else open_worksheet(sheet_url, tab)
+    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
+    print(f"📥 {tab}: loaded from Google Sheets")
+    return df.dropna(how="all").reset_index(drop=True)
+
+
+def load_ledger(
+    tab: str,
+    sheet_url: str = MAIN_SHEET_URL,
+    gc: Optional[gspread.Client] = None,
+) -> pd.DataFrame:
+    """
+    Return the opening/closing ledger behind worksheet `tab`.
+
+    Prefers the local snapshot, falls back to Google Sheets, and caches the
+    result so later cells reuse it. Callers get their own copy to modify.
+    """
+    if tab not in _cache:
+        with stage("load ledger", company=tab) as st:
+            source = os.environ.get("LEDGER_SOURCE", "auto")
+            max_age = int(os.environ.get("LEDGER_MAX_AGE_DAYS", "3"))
+            df, origin = None, source
+            if source in ("auto", "snapshot"):
+                df, origin = _from_snapshot(tab, None if source == "snapshot" else max_age), "snapshot"
+                if df is None and source == "snapshot":
+                    raise FileNotFoundError(f"No local snapshot for worksheet {tab!r}")
+            elif source == "odoo":
+                df = _from_odoo(tab)
+            if df is None:
+                df, origin = _from_sheets(tab, sheet_url, gc), "sheets"
+            st.note(source=origin)
+            st.add(rows=len(df))
+        _cache[tab] = df
+    return _cache[tab].copy()
+
+
+def load_compact_ledger(
+    tab: str,
+    sheet_url: str = MAIN_SHEET_URL,
+    gc: Optional[gspread.Client] = None,
+) -> Ledger:
+    """
+    The ledger behind worksheet `tab` as a read-only ledger.Ledger.
+
+    Same sources as load_ledger(); a snapshot goes straight from Parquet into
+    the compact arrays. Built once per process and shared by every caller
+    (it is immutable, so nothing is copied).
+    """
+    if tab not in _ledgers:
+        with stage("load ledger", company=tab) as st:
+            source = os.environ.get("LEDGER_SOURCE", "auto")
+            max_age = int(os.environ.get("LEDGER_MAX_AGE_DAYS", "3"))
+            ledger, origin = None, source
+            if tab in _cache:
+                # A cell already holds the labelled frame; encode it instead of reading again
+                ledger, origin = Ledger.from_frame(_cache[tab]), "cache"
+            elif source in ("auto", "snapshot"):
+                ledger, origin = _compact_from_snapshot(tab, None if source == "snapshot" else max_age), "snapshot"
+                if ledger is None and source == "snapshot":
+                    raise FileNotFoundError(f"No local snapshot for worksheet {tab!r}")
+            elif source == "odoo":
+                ledger = _from_odoo(tab, compact=True)
+            if ledger is None:
+                ledger, origin = Ledger.from_frame(_from_sheets(tab, sheet_url, gc)), "sheets"
+            st.note(source=origin, compact=True)
+            st.add(rows=len(ledger))
+        _ledgers[tab] = ledger
+    return _ledgers[tab]
+
+
+# ========= CONSUMPTION SUMMARY ==========
+SUMMARY_COLS = ["Item Code", "Item", "Consumption Value"]
+
+
+def summarize_consumption(df: Union[pd.DataFrame, Ledger]) -> pd.DataFrame:
+    """Per-item consumption from ledger rows: sum of |Issue Value| by Item Code + Item."""
+    if isinstance(df, Ledger):
+        # Categorical views over the ledger's codes; grouping never materializes the strings
+        keys = df.frame(["Item Code", "Item"])
+        value = np.abs(np.nan_to_num(df.measure("Issue Value")))
+    else:
+        keys = df[["Item Code", "Item"]].astype(object)
+        value = pd.to_numeric(df["Issue Value"], errors="coerce").fillna(0).abs()
+    summary = (
+        keys.assign(**{"Consumption Value": value})
+            .groupby(["Item Code", "Item"], as_index=False, observed=True)["Consumption Value"].sum()
+    )
+    return summary.astype({"Item Code": object, "Item": object})
+
+
+def _summary_from_odoo(tab: str) -> Optional[pd.DataFrame]:
+    found = _odoo(tab)
+    if found is None:
+        return None
+    odoo, cid, cname = found
+    with stage("odoo summary", company=tab) as st:
+        odoo.login()
+        # The rows only exist once the wizard ran; usually a cache hit after the scheduled sync
+        st.note(cache="hit" if odoo.ensure_forecast(cid) else "miss")
+        df = odoo.consumption_summary(cid, cname)
+        st.add(rows=len(df))
+    if df.empty:
+        return None
+    print(f"🧮 {tab}: consumption summed by Odoo read_group ({len(df)} items)")
+    # Issue values of one item share a sign (outflows), so |sum| equals the sum of |values|
+    return df.assign(**{"Consumption Value": df["Issue Value"].abs()})[SUMMARY_COLS]
+
+
+def load_consumption_summary(tab: str, sheet_url: str = MAIN_SHEET_URL) -> pd.DataFrame:
+    """
+    Per-item consumption (Item Code, Item, Consumption Value) for worksheet `tab`.
+
+    A recent local snapshot is aggregated in place; otherwise Odoo returns one
+    summed row per item; the full ledger from Sheets is the last resort.
+    """
+    source = os.environ.get("SUMMARY_SOURCE", "auto")
+    if source == "auto" and tab not in _ledgers and tab not in _cache:
+        max_age = int(os.environ.get("LEDGER_MAX_AGE_DAYS", "3"))
+        ledger = _compact_from_snapshot(tab, max_age)
+        if ledger is not None:
+            _ledgers[tab] = ledger
+    if source in ("auto", "odoo") and tab not in _ledgers and tab not in _cache:
+        summary = _summary_from_odoo(tab)
+        if summary is not None:
+            return summary
+        if source == "odoo":
+            raise RuntimeError(f"No Odoo summary for worksheet {tab!r} (ODOO_URL unset or no rows)")
+    return summarize_consumption(load_compact_ledger(tab, sheet_url))
@@ -0,0 +1,429 @@
+"""
+JSON-RPC client for the Odoo opening/closing ledger.
+
+OdooClient logs in, runs (or reuses, see forecast_cache.py) the
+stock.forecast.report wizard and pages `stock.opening.closing` into labelled
+frames, plus the server-side read_group summaries. Importing this module has
+no side effects, so the sync script, the notebook (ledger_source.py) and the
+benchmarks share it:
+
+    odoo = OdooClient()
+    odoo.login()
+    odoo.ensure_forecast(1)
+    df = odoo.read_opening_closing(1, "Zipper")
+
+Settings are read from the environment when the module is imported; scripts
+that keep them in .env call load_dotenv() before importing it.
+
+Env Vars
+--------
+- ODOO_URL, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD : connection and login
+- ODOO_PAGE_SIZE    : rows per web_search_read page (default 2000)
+- ODOO_POOL_SIZE    : keep-alive connections per host (default 8)
+- ODOO_MAX_WORKERS  : pages fetched at once (default 4)
+- ODOO_STREAM_JSON  : "0" parses whole response bodies instead of decoding while downloading
+- ODOO_STREAM_CHUNK / ODOO_DECODE_BATCH : bytes per read / records per decoded frame
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from itertools import islice
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_cache import forecast_cache
+from json_stream import RecordStream
+from ledger import LedgerBuilder
+from record_decoder import RecordDecoder
+from run_metrics import count, in_context, stage
+
+log = logging.getLogger()
+
+# ========= CONFIG ==========
+ODOO_URL = os.getenv("ODOO_URL")
+DB = os.getenv("ODOO_DB")
+USERNAME = os.getenv("ODOO_USERNAME")
+PASSWORD = os.getenv("ODOO_PASSWORD")
+
+COMPANIES = {
+    1: "Zipper",
+    3: "Metal Trims",
+}
+
+FROM_DATE = "2025-01-01"
+TO_DATE = date.today().strftime("%Y-%m-%d")
+
+# ========= FETCH OPENING/CLOSING WITH LABELS ==========
+# Rows per web_search_read page. Pages are walked until the server-reported
+# `length` is reached, so nothing is silently dropped past a fixed limit.
+PAGE_SIZE = int(os.getenv("ODOO_PAGE_SIZE", "2000"))
+
+OPENING_CLOSING_SPEC = {
+    "parent_category": {"fields": {"display_name": {}}},  # Product
+    "product_category": {"fields": {"display_name": {}}}, # Category
+    "product_id": {"fields": {"display_name": {}}},       # Item
+    "pr_code": {},                                         # Item Code
+    "lot_id": {"fields": {"display_name": {}}},           # Invoice
+    "receive_date": {},                                    # Receive Date
+    "pur_price": {},                                       # Pur Price
+    "landed_cost": {},                                     # Landed Cost
+    "lot_price": {},                                       # Price
+    "product_uom": {"fields": {"display_name": {}}},      # Unit
+    "opening_qty": {},                                     # Opening Quantity
+    "opening_value": {},                                   # Opening Value
+    "receive_qty": {},                                     # Receive Quantity
+    "receive_value": {},                                   # Receive Value
+    "issue_qty": {},                                       # Issue Quantity
+    "issue_value": {},                                     # Issue Value
+    "cloing_qty": {},                                      # Closing Quantity
+    "cloing_value": {},                                    # Closing Value
+    "po_type": {},                                         # Po Type
+    "rejected": {},                                        # Rejected
+    "shipment_mode": {},                                   # Shipment Mode
+}
+
+# Map internal fields to human-readable labels
+FIELD_LABELS = {
+    "parent_category": "Product",
+    "product_category": "Category",
+    "product_id": "Item",
+    "pr_code": "Item Code",
+    "lot_id": "Invoice",
+    "receive_date": "Receive Date",
+    "pur_price": "Pur Price",
+    "landed_cost": "Landed Cost",
+    "lot_price": "Price",
+    "product_uom": "Unit",
+    "opening_qty": "Opening Quantity",
+    "opening_value": "Opening Value",
+    "receive_qty": "Receive Quantity",
+    "receive_value": "Receive Value",
+    "issue_qty": "Issue Quantity",
+    "issue_value": "Issue Value",
+    "cloing_qty": "Closing Quantity",
+    "cloing_value": "Closing Value",
+    "po_type": "Po Type",
+    "rejected": "Rejected",
+    "shipment_mode": "Shipment Mode",
+}
+
+RM_DOMAIN = [["product_id.categ_id.complete_name", "ilike", "All / RM"]]
+
+# Fields summed by the server-side consumption summary
+SUMMARY_FIELDS = ["issue_value", "issue_qty", "cloing_qty"]
+
+
+# Typed decoder built from the request specification: final labels and store dtypes in one pass
+LEDGER_DECODER = RecordDecoder(OPENING_CLOSING_SPEC, FIELD_LABELS)
+
+
+def records_to_frame(records):
+    return LEDGER_DECODER.decode(records)
+
+
+# ========= ODOO CLIENT ==========
+# Connections kept alive per host and the number of pages fetched at once.
+POOL_SIZE = int(os.getenv("ODOO_POOL_SIZE", "8"))
+MAX_WORKERS = int(os.getenv("ODOO_MAX_WORKERS", "4"))
+
+# Pages are decoded while they download (json_stream.py): bytes read per chunk
+# and records turned into a frame at a time. ODOO_STREAM_JSON=0 parses whole bodies.
+STREAM_JSON = os.getenv("ODOO_STREAM_JSON", "1") != "0"
+STREAM_CHUNK = int(os.getenv("ODOO_STREAM_CHUNK", str(256 * 1024)))
+DECODE_BATCH = int(os.getenv("ODOO_DECODE_BATCH", "2000"))
+
+
+class OdooClient:
+    """
+    JSON-RPC client for one authenticated Odoo session.
+
+    Requests go through a pooled keep-alive session, and once the first
+    `stock.opening.closing` page reports the total `length`, the remaining
+    pages are fetched by a bounded thread pool and yielded back in order.
+    """
+
+    def __init__(self, url=None, db=None, username=None, password=None,
+                 pool_size=POOL_SIZE, max_workers=MAX_WORKERS):
+        self.url = url or ODOO_URL
+        self.db = db or DB
+        self.username = username or USERNAME
+        self.password = password or PASSWORD
+        self.max_workers = max(1, max_workers)
+        self.uid = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ----- transport -----
+    def post(self, path, payload):
+        r = self.session.post(f"{self.url}{path}", json=payload)
+        count(http_calls=1, bytes=len(r.content))
+        r.raise_for_status()
+        return r.json()
+
+    def call(self, model, method, args=None, kwargs=None, path="/web/dataset/call_kw"):
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"model": model, "method": method, "args": args or [], "kwargs": kwargs or {}},
+        }
+        return self.post(path, payload)
+
+    # ----- session -----
+    def login(self):
+        with stage("login"):
+            return self._authenticate()
+
+    def _authenticate(self):
+        payload = {
+            "jsonrpc": "2.0",
+            "params": {"db": self.db, "login": self.username, "password": self.password}
+        }
+        result = self.post("/web/session/authenticate", payload).get("result")
+        if result and "uid" in result:
+            self.uid = result["uid"]
+            log.info(f"✅ Logged in (uid={self.uid})")
+            return result
+        raise Exception("❌ Login failed")
+
+    def switch_company(self, company_id):
+        if self.uid is None:
+            raise Exception("User not logged in yet")
+        body = self.call(
+            "res.users", "write",
+            args=[[self.uid], {"company_id": company_id}],
+            kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
+        )
+        if "error" in body:
+            log.error(f"❌ Failed to switch company {company_id}: {body['error']}")
+            return False
+        log.info(f"🔄 Switched to company {company_id}")
+        return True
+
+    # ----- forecast wizard -----
+    def create_forecast_wizard(self, company_id, from_date=None, to_date=None):
+        body = self.call(
+            "stock.forecast.report", "create",
+            args=[{"from_date": from_date or FROM_DATE, "to_date": to_date or TO_DATE}],
+            kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
+        )
+        wiz_id = body["result"]
+        log.info(f"🪄 Created wizard {wiz_id} for company {company_id}")
+        return wiz_id
+
+    def compute_forecast(self, company_id, wizard_id):
+        body = self.call(
+            "stock.forecast.report", "print_date_wise_stock_register",
+            args=[[wizard_id]],
+            kwargs={
+                "context": {
+                    "lang": "en_US",
+                    "tz": "Asia/Dhaka",
+                    "uid": self.uid,
+                    "allowed_company_ids": [company_id],
+                    "company_id": company_id,
+                }
+            },
+            path="/web/dataset/call_button",
+        )
+        # Raise rather than return: forecast_cache would record a failed compute as done
+        if "error" in body:
+            raise Exception(f"print_date_wise_stock_register failed for wizard {wizard_id}: {body['error']}")
+        log.info(f"⚡ Forecast computed for wizard {wizard_id} (company {company_id})")
+        return body
+
+    def opening_closing_stamp(self, company_id):
+        """Row count and latest write_date of the company's computed RM ledger rows."""
+        context = {"allowed_company_ids": [company_id], "company_id": company_id}
+        body = self.call(
+            "stock.opening.closing", "web_search_read",
+            kwargs={
+                "specification": {"write_date": {}},
+                "limit": 1,
+                "order": "write_date desc, id desc",
+                "context": {**context, "active_model": "stock.forecast.report", "active_id": 0, "active_ids": [0]},
+                "domain": RM_DOMAIN,
+            },
+        )
+        if "error" in body:
+            raise Exception(f"web_search_read failed for the ledger stamp: {body['error']}")
+        result = body["result"]
+        records = result["records"]
+        return {"count": result.get("length", len(records)), "write_date": records[0]["write_date"] if records else None}
+
+    def ensure_forecast(self, company_id, from_date=None, to_date=None):
+        """Compute the wizard for the range unless a fresh compute is cached. Returns True on a cache hit."""
+        from_date, to_date = from_date or FROM_DATE, to_date or TO_DATE
+        return forecast_cache().ensure(
+            company_id, from_date, to_date,
+            stamp=lambda: self.opening_closing_stamp(company_id),
+            compute=lambda: self.compute_forecast(company_id, self.create_forecast_wizard(company_id, from_date, to_date)),
+        )
+
+    # ----- opening/closing ledger -----
+    def _opening_closing_kwargs(self, company_id, offset, limit):
+        context = {"allowed_company_ids": [company_id], "company_id": company_id}
+        return {
+            "specification": OPENING_CLOSING_SPEC,
+            "offset": offset,
+            "limit": limit,
+            # Stable ordering so concurrent pages never overlap or skip rows
+            "order": "id asc",
+            "context": {**context, "active_model": "stock.forecast.report", "active_id": 0, "active_ids": [0]},
+            "domain": RM_DOMAIN,
+        }
+
+    def opening_closing_page(self, company_id, offset, limit):
+        body = self.call("stock.opening.closing", "web_search_read", kwargs=self._opening_closing_kwargs(company_id, offset, limit))
+        if "error" in body:
+            raise Exception(f"web_search_read failed at offset {offset}: {body['error']}")
+        return body["result"]
+
+    def stream_records(self, model, method, kwargs, decoder=LEDGER_DECODER, batch=DECODE_BATCH):
+        """
+        call_kw whose `result.records` are decoded into frames of up to `batch`
+        rows while the body is still arriving. Returns (frames, length).
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"model": model, "method": method, "args": [], "kwargs": kwargs},
+        }
+        with self.session.post(f"{self.url}/web/dataset/call_kw", json=payload, stream=True) as r:
+            r.raise_for_status()
+            stream = RecordStream(r.iter_content(STREAM_CHUNK))
+            frames = [decoder.decode(records) for records in stream.batches(batch)]
+        count(http_calls=1, bytes=stream.bytes)
+        if stream.error:
+            raise Exception(f"{method} failed: {stream.error}")
+        return frames, stream.length
+
+    def opening_closing_frames(self, company_id, offset, limit):
+        """One page as labelled frames plus the server's total `length`."""
+        if STREAM_JSON:
+            try:
+                return self.stream_records("stock.opening.closing", "web_search_read", self._opening_closing_kwargs(company_id, offset, limit))
+            except Exception as e:
+                raise Exception(f"web_search_read failed at offset {offset}: {e}") from e
+        result = self.opening_closing_page(company_id, offset, limit)
+        records = result["records"]
+        return ([records_to_frame(records)] if records else []), result.get("length", len(records))
+
+    def iter_opening_closing(self, company_id, cname, page_size=PAGE_SIZE):
+        """Yield labelled DataFrame batches in offset order, fetching pages concurrently once `length` is known."""
+        frames, total = self.opening_closing_frames(company_id, 0, page_size)
+        fetched = sum(len(f) for f in frames)
+        if not fetched:
+            return
+        log.info(f"📄 {cname}: page {fetched}/{total} rows")
+        yield from frames
+
+        offsets = iter(range(fetched, total, page_size))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Keep a bounded window of in-flight pages so memory stays flat
+            # while results are still handed out strictly in offset order.
+            window = deque()
+            for offset in islice(offsets, self.max_workers * 2):
+                window.append((offset, pool.submit(in_context(self.opening_closing_frames), company_id, offset, page_size)))
+            while window:
+                offset, future = window.popleft()
+                nxt = next(offsets, None)
+                if nxt is not None:
+                    window.append((nxt, pool.submit(in_context(self.opening_closing_frames), company_id, nxt, page_size)))
+                frames, _ = future.result()
+                rows = sum(len(f) for f in frames)
+                if not rows:
+                    continue
+                log.info(f"📄 {cname}: page {offset + rows}/{total} rows")
+                yield from frames
+
+    # ----- server-side summaries -----
+    def read_group_opening_closing(self, company_id, groupby, fields=SUMMARY_FIELDS):
+        """Raw web_read_group groups of the RM ledger, with `fields` summed per group."""
+        context = {"allowed_company_ids": [company_id], "company_id": company_id}
+        body = self.call(
+            "stock.opening.closing", "web_read_group",
+            kwargs={
+                "domain": RM_DOMAIN,
+                "fields": [f"{f}:sum" for f in fields],
+                "groupby": list(groupby),
+                "lazy": False,
+                "context": {**context, "active_model": "stock.forecast.report", "active_id": 0, "active_ids": [0]},
+            },
+        )
+        if "error" in body:
+            raise Exception(f"web_read_group failed: {body['error']}")
+        return body["result"]["groups"]
+
+    def product_codes(self, company_id, product_ids):
+        """{product id: default_code} for the given product.product ids, in one read."""
+        if not product_ids:
+            return {}
+        body = self.call(
+            "product.product", "read",
+            args=[sorted(product_ids), ["default_code"]],
+            kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id, "active_test": False}},
+        )
+        if "error" in body:
+            raise Exception(f"product.product read failed: {body['error']}")
+        return {p["id"]: p["default_code"] or "" for p in body["result"]}
+
+    def consumption_summary(self, company_id, cname, by_date=None, fields=SUMMARY_FIELDS):
+        """
+        One row per item (per `by_date` period too: "day", "week", "month") with
+        `fields` summed by Odoo, instead of one row per lot.
+
+        Columns: Item Code, Item, [Receive Date], the labelled sums and Rows
+        (lots folded into the row).
+        """
+        groupby = ["product_id"] + ([f"receive_date:{by_date}"] if by_date else [])
+        groups = self.read_group_opening_closing(company_id, groupby, fields)
+        codes = self.product_codes(company_id, {g["product_id"][0] for g in groups if g.get("product_id")})
+
+        rows = []
+        for g in groups:
+            product = g.get("product_id") or [None, ""]
+            row = {"Item Code": codes.get(product[0], ""), "Item": product[1]}
+            if by_date:
+                row["Receive Date"] = g.get(f"receive_date:{by_date}")
+            for f in fields:
+                row[FIELD_LABELS.get(f, f)] = g.get(f) or 0.0
+            row["Rows"] = g.get("__count", 0)
+            rows.append(row)
+        df = pd.DataFrame(rows)
+        log.info(f"📊 {cname}: {len(df)} summary rows from read_group ({sum(g.get('__count', 0) for g in groups)} lots)")
+        return df
+
+    def read_opening_closing(self, company_id, cname):
+        """The whole ledger as one labelled frame; a failed page raises."""
+        batches = list(self.iter_opening_closing(company_id, cname))
+        df = LEDGER_DECODER.concat(batches) if batches else pd.DataFrame()
+        log.info(f"📊 {cname}: {len(df)} rows fetched with labels")
+        return df
+
+    def fetch_opening_closing(self, company_id, cname):
+        """read_opening_closing, logging a failed fetch and returning an empty frame instead."""
+        try:
+            return self.read_opening_closing(company_id, cname)
+        except Exception as e:
+            log.error(f"❌ {cname}: Failed to fetch report | Error: {e}")
+            return pd.DataFrame()
+
+    def fetch_ledger(self, company_id, cname):
+        """
+        The ledger as a compact Ledger: each decoded batch is folded into codes
+        and float arrays as it arrives, so the labelled frame never exists whole.
+        """
+        builder = LedgerBuilder()
+        for batch in self.iter_opening_closing(company_id, cname):
+            builder.append_frame(batch)
+        ledger = builder.build()
+        log.info(f"📊 {cname}: {len(ledger)} rows fetched into a compact ledger ({ledger.nbytes / 1e6:.1f} MB)")
+        return ledger
@@ -0,0 +1,306 @@
+import logging
+import os
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+from download_watcher import wait_for_file
+from run_metrics import count, stage
+
+log = logging.getLogger()
+
+# ========= CONFIG ==========
+ODOO_WEB_URL = "https://taps.odoo.com"
+REPORT_ACTION = "/web#action=441&model=stock.picking.type&view_type=kanban&cids={cid}&menu_id=280"
+REPORT_PATTERN = "Stock Opening  Closing Report (stock.opening.closing)"
+
+# Company label in the systray switcher -> company id used in the `cids` URL param
+COMPANY_IDS = {
+    "Zipper": 1,
+    "Metal": 3,
+}
+
+STEP_TIMEOUT = int(os.getenv("EXPORT_STEP_TIMEOUT", "30"))      # UI steps
+COMPUTE_TIMEOUT = int(os.getenv("EXPORT_COMPUTE_TIMEOUT", "600"))  # server-side report compute
+DOWNLOAD_TIMEOUT = int(os.getenv("EXPORT_DOWNLOAD_TIMEOUT", "300"))
+STEP_RETRIES = int(os.getenv("EXPORT_STEP_RETRIES", "3"))
+
+# Odoo shows one of these while a JSON-RPC call is in flight
+BUSY_SELECTOR = ".o_loading_indicator, .o_blockUI"
+
+# === XPaths (unchanged from the original scripts) ===
+XP_LOGIN = "//button[contains(text(), 'Log in')]"
+CSS_SWITCHER = "div.o_menu_systray div.o_switch_company_menu > button > span"
+XP_REPORT_MENU = "/html/body/header/nav/div[1]/div[3]/button/span"
+XP_REPORT_ITEM = "/html/body/header/nav/div[1]/div[3]/div/a[2]"
+XP_FROM_DATE = "//*[@id='from_date_0']"
+XP_WIZARD_OK = "/html/body/div[2]/div[2]/div/div/div/div/footer/footer/button[1]"
+XP_LIST_READY = "/html/body/div[1]/div/div[1]/div/div[2]/div/div[1]/div/div[2]/div[3]/button"
+XP_SELECT_PAGE = "/html/body/div[1]/div/div[2]/div/table/thead/tr/th[1]/div"
+XP_SELECT_ALL = "/html/body/div[1]/div/div[1]/div/div[2]/div/div[1]/span/a[1]"
+XP_ACTION_MENU = "/html/body/div[1]/div/div[1]/div/div[2]/div/div[2]/div/button"
+XP_ACTION_EXPORT = "/html/body/div[1]/div/div[1]/div/div[2]/div/div[2]/div/div/span"
+XP_TEMPLATE_SELECT = "/html/body/div[2]/div[2]/div/div/div/div/main/div/div[2]/div[3]/div/select"
+XP_TEMPLATE_OPTION = "/html/body/div[2]/div[2]/div/div/div/div/main/div/div[2]/div[3]/div/select/option[34]"
+XP_EXPORT_OK = "/html/body/div[2]/div[2]/div/div/div/div/footer/button[1]"
+
+
+class StepFailed(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def driver_path():
+    """Resolve (and download if needed) the chromedriver binary once per process."""
+    return ChromeDriverManager().install()
+
+
+def company_download_dir(download_dir, label):
+    folder = os.path.join(download_dir, label.lower())
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def chrome_options(download_dir):
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Comment this line for debug
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_experimental_option("prefs", {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    })
+    return options
+
+
+def wait_for_download(download_dir, started_at, timeout=DOWNLOAD_TIMEOUT):
+    """
+    Return the report xlsx created after `started_at` as soon as Chrome has
+    finished writing it (see DownloadWatcher for what counts as finished).
+    """
+    path = wait_for_file(download_dir, f"*{REPORT_PATTERN}*.xlsx", since=started_at, timeout=timeout)
+    count(bytes=path.stat().st_size)
+    return path
+
+
+class ExportDriver:
+    """
+    Drives the Odoo web client through the Stock Opening/Closing export.
+
+    One browser and one login serve every company: each company gets its own
+    tab (the company is picked through the `cids` URL param) and its own
+    download folder. Chrome keeps one download path for the whole browser, not
+    per tab, so it is pointed at a company's folder right before that
+    company's export is confirmed. Every step waits on a concrete condition (element state,
+    RPC idle, finished download) rather than a fixed sleep, and a failing step
+    is retried on its own before the browser is given up on.
+    """
+
+    def __init__(self, download_dir, retries=STEP_RETRIES):
+        self.download_dir = download_dir
+        self.retries = retries
+        self.driver = None
+        self.tabs = {}
+
+    # ----- lifecycle -----
+    def start(self):
+        log.info("Attempting to start the browser...")
+        self.driver = webdriver.Chrome(
+            service=Service(driver_path()),
+            options=chrome_options(self.download_dir),
+        )
+        return self
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+            self.driver = None
+            self.tabs = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.quit()
+
+    # ----- primitives -----
+    def wait(self, timeout=STEP_TIMEOUT):
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.2)
+
+    def wait_rpc_idle(self, timeout=STEP_TIMEOUT):
+        self.wait(timeout).until(EC.invisibility_of_element_located((By.CSS_SELECTOR, BUSY_SELECTOR)))
+
+    def click(self, xpath, timeout=STEP_TIMEOUT):
+        el = self.wait(timeout).until(EC.element_to_be_clickable((By.XPATH, xpath)))
+        self.driver.execute_script("arguments[0].scrollIntoView(true);", el)
+        el.click()
+        self.wait_rpc_idle(timeout)
+        return el
+
+    def close_dialogs(self):
+        # Leave any dialog still open from a failed attempt; a bare ESC on the list would drop the selection
+        if self.driver.find_elements(By.CSS_SELECTOR, ".modal-backdrop"):
+            self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+            self.wait().until(EC.invisibility_of_element_located((By.CSS_SELECTOR, ".modal-backdrop")))
+
+    def step(self, name, fn, *args):
+        """Run one step, retrying only that step on failure."""
+        company, _, what = name.rpartition(": ")
+        with stage(f"export {what.lower()}", company=company or None) as st:
+            for attempt in range(1, self.retries + 1):
+                try:
+                    t0 = time.monotonic()
+                    result = fn(*args)
+                    log.info(f"✅ {name} ({time.monotonic() - t0:.1f}s)")
+                    return result
+                except (TimeoutException, TimeoutError, WebDriverException) as e:
+                    log.warning(f"⚠️ {name} failed (attempt {attempt}/{self.retries}): {e.__class__.__name__}: {e}")
+                    if attempt < self.retries:
+                        st.add(retries=1)
+            raise StepFailed(f"{name} failed after {self.retries} attempts")
+
+    # ----- steps -----
+    def login(self):
+        log.info("Navigating to login page...")
+        self.driver.get(ODOO_WEB_URL)
+        self.click(XP_LOGIN)
+        self.wait().until(EC.invisibility_of_element_located((By.CSS_SELECTOR, ".modal-backdrop")))
+        self.wait().until(EC.element_to_be_clickable((By.CSS_SELECTOR, CSS_SWITCHER)))
+
+    def open_tab(self, label):
+        """Open (or reuse) the tab for `label`."""
+        if label not in self.tabs:
+            if self.tabs:
+                self.driver.switch_to.new_window("tab")
+            self.tabs[label] = self.driver.current_window_handle
+        self.activate(label)
+
+    def download_to(self, label):
+        """Send the browser's next downloads (every tab) to `label`'s folder."""
+        self.driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": company_download_dir(self.download_dir, label),
+        })
+
+    def activate(self, label):
+        self.driver.switch_to.window(self.tabs[label])
+
+    def submit_report(self, label, from_date):
+        """Fill in the report wizard and start the server-side compute without waiting for it."""
+        log.info(f"Opening the report for '{label}'...")
+        self.activate(label)
+        self.driver.get(ODOO_WEB_URL + REPORT_ACTION.format(cid=COMPANY_IDS[label]))
+        self.wait_rpc_idle()
+        self.click(XP_REPORT_MENU)
+        self.click(XP_REPORT_ITEM)
+        date_input = self.wait().until(EC.presence_of_element_located((By.XPATH, XP_FROM_DATE)))
+        date_input.clear()
+        date_input.send_keys(from_date.strftime("%d/%m/%Y"))
+        ok = self.wait().until(EC.element_to_be_clickable((By.XPATH, XP_WIZARD_OK)))
+        ok.click()
+
+    def wait_report(self):
+        # The server computes the register here; the list toolbar shows up when it is done
+        self.wait(COMPUTE_TIMEOUT).until(EC.element_to_be_clickable((By.XPATH, XP_LIST_READY)))
+        self.wait_rpc_idle(COMPUTE_TIMEOUT)
+
+    def select_all_records(self):
+        self.close_dialogs()
+        self.click(XP_LIST_READY)
+        checkbox = self.wait().until(EC.presence_of_element_located((By.XPATH, XP_SELECT_PAGE + "//input")))
+        if not checkbox.is_selected():
+            self.click(XP_SELECT_PAGE)
+        self.click(XP_SELECT_ALL)
+
+    def start_export(self):
+        """Confirm the export dialog and return the time the download was requested."""
+        self.close_dialogs()
+        self.click(XP_ACTION_MENU)
+        self.click(XP_ACTION_EXPORT)
+        self.click(XP_TEMPLATE_SELECT)
+        self.click(XP_TEMPLATE_OPTION)
+        started_at = time.time()
+        log.info("Confirming file export...")
+        self.click(XP_EXPORT_OK)
+        return started_at
+
+
+def keep_latest_only(folder, latest):
+    for f in Path(folder).glob(f"*{REPORT_PATTERN}*.xlsx"):
+        if f != latest:
+            f.unlink()
+
+
+def export_companies(labels, download_dir, from_date, restarts=3):
+    """
+    Export the opening/closing report for every company in `labels` from one
+    browser session and return {label: downloaded path}.
+
+    All reports are submitted first, one tab each, so the server computes them
+    side by side. Each tab is then exported as soon as its list is ready, and
+    its download is awaited before the next export moves the browser's
+    download path to another company's folder. Steps retry on their own; only
+    if a step keeps failing is the browser restarted, and then only for the
+    companies that have not been downloaded yet.
+    """
+    results = {}
+    for attempt in range(1, restarts + 1):
+        pending = [label for label in labels if label not in results]
+        if not pending:
+            break
+        with ExportDriver(download_dir) as export:
+            try:
+                export.step("Log in", export.login)
+                for label in pending:
+                    export.open_tab(label)
+                    export.step(f"{label}: submit report", export.submit_report, label, from_date)
+
+                for label in pending:
+                    export.activate(label)
+                    export.step(f"{label}: compute report", export.wait_report)
+                    export.step(f"{label}: select records", export.select_all_records)
+                    export.download_to(label)
+                    started = export.step(f"{label}: export", export.start_export)
+                    folder = company_download_dir(download_dir, label)
+                    path = export.step(f"{label}: download", wait_for_download, folder, started)
+                    log.info(f"✅ File download complete! {path}")
+                    keep_latest_only(folder, path)
+                    results[label] = path
+            except StepFailed as e:
+                log.error(f"❌ {e}; restarting browser ({attempt}/{restarts})")
+    missing = [label for label in labels if label not in results]
+    if missing:
+        raise StepFailed(f"Export failed for {', '.join(missing)} after {restarts} browser restarts")
+    return results
+
+
+def export_company(label, download_dir, from_date, restarts=3):
+    """Export the opening/closing report for one company and return the downloaded path."""
+    return export_companies([label], download_dir, from_date, restarts)[label]
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    companies = sys.argv[1:] or list(COMPANY_IDS)
+    download_dir = os.path.join(os.getcwd(), "download")
+    for label, path in export_companies(companies, download_dir, from_date=datetime(2025, 1, 1)).items():
+        log.info(f"📂 {label}: {path}")
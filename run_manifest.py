@@ -0,0 +1,252 @@
+"""
+Checkpoints for resumable sync runs.
+
+A run manifest records, per company, which stages of a run succeeded and what
+each one left behind: the fetched ledger (Parquet), written or downloaded
+files, the rows pushed to Sheets. Manifests live next to the sync state in
+state/runs/<pipeline>/<run id>/manifest.json, with the run's artifacts in the
+same folder.
+
+Started with --resume, a script reopens the last unfinished run (or the one
+named) and skips every stage already marked done, reloading its artifact
+instead. A failed Sheets push is then retried without logging in to Odoo,
+recomputing the wizard or fetching again:
+
+    manifest = RunManifest.open("mt_zip_db", resume=args.resume)
+    if not manifest.done(cname, "fetch"):
+        with manifest.step(cname, "fetch") as step:
+            df = odoo.fetch_opening_closing(cid, cname)
+            step.keep_frame(df)
+            step.note(rows=len(df))
+    df = manifest.frame(cname, "fetch")
+    ...
+    manifest.finish("Mt_Zip_db.py")
+
+Without a run (notebook, benchmarks) RunManifest.ephemeral() keeps the same
+bookkeeping in memory only.
+
+Env Vars
+--------
+- RUN_MANIFEST_KEEP : runs kept per pipeline, oldest removed first (default 10)
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from run_metrics import RUN_ID, STATE_DIR
+
+log = logging.getLogger()
+
+RUNS_DIR = os.path.join(STATE_DIR, "runs")
+KEEP_RUNS = int(os.getenv("RUN_MANIFEST_KEEP", "10"))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _slug(name: str) -> str:
+    return name.lower().replace(" ", "")
+
+
+class Step:
+    """What a stage leaves behind; filled inside RunManifest.step()."""
+
+    def __init__(self):
+        self.info: Dict[str, object] = {}
+        self.files: List[tuple] = []
+        self.frame: Optional[pd.DataFrame] = None
+
+    def note(self, **info):
+        """Extra JSON fields for the stage entry (rows, dates, ...)."""
+        self.info.update(info)
+
+    def keep_file(self, path: str, copy: bool = False):
+        """Record a file the stage wrote; copy=True keeps a copy in the run folder (for shared download dirs)."""
+        self.files.append((path, copy))
+
+    def keep_frame(self, df: pd.DataFrame):
+        """Keep the stage's output frame as the run's Parquet artifact."""
+        self.frame = df
+
+
+class RunManifest:
+    """
+    Stage status and artifacts of one run, keyed by company then stage.
+
+    The manifest is rewritten atomically after every stage, so a run killed at
+    any point resumes from its last finished stage.
+    """
+
+    def __init__(self, pipeline: str, run_id: str, folder: Optional[str] = None):
+        self.pipeline = pipeline
+        self.run_id = run_id
+        self.folder = folder
+        self.path = os.path.join(folder, "manifest.json") if folder else None
+        self.lock = threading.Lock()
+        self.state = self._load()
+        # Stages finished by an earlier attempt of this run, reported once when skipped
+        self.restored = {(c, s) for c, stages in self.state["companies"].items()
+                         for s, e in stages.items() if e["status"] == "done"}
+
+    # ----- opening -----
+    @classmethod
+    def open(cls, pipeline: str, resume=None, run_id: str = RUN_ID) -> "RunManifest":
+        """
+        The manifest for this run. resume=True reopens the latest unfinished run
+        of `pipeline`, a string reopens that run id; otherwise a fresh run is
+        started under `run_id`.
+        """
+        root = os.path.join(RUNS_DIR, pipeline)
+        if resume:
+            target = resume if isinstance(resume, str) else latest_unfinished(pipeline)
+            if target and os.path.exists(os.path.join(root, target, "manifest.json")):
+                manifest = cls(pipeline, target, os.path.join(root, target))
+                manifest.state.setdefault("resumed", []).append(_now())
+                manifest._save()
+                log.info(f"↩️ Resuming {pipeline} run {target} ({len(manifest.restored)} stages already done)")
+                return manifest
+            log.warning(f"⚠️ No unfinished {pipeline} run{' ' + target if target else ''} to resume; starting {run_id}")
+        folder = os.path.join(root, run_id)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        manifest = cls(pipeline, run_id, folder)
+        manifest._save()
+        _prune(pipeline, keep=KEEP_RUNS)
+        return manifest
+
+    @classmethod
+    def ephemeral(cls, pipeline: str = "interactive") -> "RunManifest":
+        """In-memory manifest: same calls, nothing written, nothing to resume."""
+        return cls(pipeline, RUN_ID)
+
+    # ----- state -----
+    def _load(self) -> dict:
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"pipeline": self.pipeline, "run": self.run_id, "created": _now(), "finished": None, "companies": {}}
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, default=str)
+        os.replace(tmp, self.path)
+
+    def _set(self, company: str, stage: str, entry: dict):
+        with self.lock:
+            self.state["companies"].setdefault(company, {})[stage] = entry
+            self._save()
+
+    # ----- stages -----
+    def entry(self, company: str, stage: str) -> Optional[dict]:
+        return self.state["companies"].get(company, {}).get(stage)
+
+    def done(self, company: str, stage: str) -> bool:
+        """True when the stage succeeded and its artifacts are still on disk."""
+        entry = self.entry(company, stage)
+        if not entry or entry["status"] != "done":
+            return False
+        missing = [p for p in entry.get("files", []) + ([entry["frame"]] if entry.get("frame") else []) if not os.path.exists(p)]
+        if missing:
+            log.warning(f"⚠️ {company}: {stage} artifacts gone ({', '.join(missing)}); running it again")
+            return False
+        if (company, stage) in self.restored:
+            self.restored.discard((company, stage))
+            log.info(f"⏭️ {company}: {stage} already done in run {self.run_id}, skipped")
+        return True
+
+    def get(self, company: str, stage: str) -> Optional[dict]:
+        """The entry of a finished stage (its noted fields and artifact paths), else None."""
+        return self.entry(company, stage) if self.done(company, stage) else None
+
+    def frame(self, company: str, stage: str) -> pd.DataFrame:
+        entry = self.entry(company, stage)
+        if "frame_data" in entry:  # ephemeral manifests keep the frame itself
+            return entry["frame_data"]
+        return pd.read_parquet(entry["frame"])
+
+    def _artifact(self, company: str, name: str) -> str:
+        return os.path.join(self.folder, f"{_slug(company)}_{name}")
+
+    @contextmanager
+    def step(self, company: str, stage: str):
+        """Run one stage: recorded as done with what the Step kept, or as failed with the error (re-raised)."""
+        step = Step()
+        started = _now()
+        try:
+            yield step
+        except BaseException as e:
+            self._set(company, stage, {"status": "failed", "started": started, "at": _now(), "error": f"{type(e).__name__}: {e}"[:300]})
+            raise
+        entry = {"status": "done", "started": started, "at": _now(), **step.info}
+        files = []
+        for path, copy in step.files:
+            if copy and self.folder:
+                target = self._artifact(company, os.path.basename(path))
+                shutil.copy2(path, target)
+                path = target
+            files.append(os.path.abspath(path))
+        entry["files"] = files
+        if step.frame is not None:
+            if self.folder:
+                entry["frame"] = self._artifact(company, f"{_slug(stage)}.parquet")
+                step.frame.to_parquet(entry["frame"], index=False)
+            else:
+                entry["frame_data"] = step.frame
+        self._set(company, stage, entry)
+
+    # ----- run -----
+    def failures(self) -> Dict[str, List[str]]:
+        return {c: [s for s, e in stages.items() if e["status"] == "failed"]
+                for c, stages in self.state["companies"].items()
+                if any(e["status"] == "failed" for e in stages.values())}
+
+    def finish(self, script: str) -> bool:
+        """Close the run when nothing failed; otherwise log how to resume it. Returns True when complete."""
+        failed = self.failures()
+        if failed:
+            summary = "; ".join(f"{c}: {', '.join(s)}" for c, s in failed.items())
+            log.error(f"❌ Run {self.run_id} incomplete ({summary}). Retry only the failed stages with: python {script} --resume {self.run_id}")
+            return False
+        with self.lock:
+            self.state["finished"] = _now()
+            self._save()
+        return True
+
+
+def _runs(pipeline: str) -> List[dict]:
+    root = os.path.join(RUNS_DIR, pipeline)
+    if not os.path.isdir(root):
+        return []
+    found = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name, "manifest.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                found.append(json.load(f))
+    return sorted(found, key=lambda m: m["created"])
+
+
+def latest_unfinished(pipeline: str) -> Optional[str]:
+    """Run id of the newest run of `pipeline` that did not finish, if any."""
+    pending = [m["run"] for m in _runs(pipeline) if not m.get("finished")]
+    return pending[-1] if pending else None
+
+
+def _prune(pipeline: str, keep: int):
+    if keep <= 0:
+        return
+    for m in _runs(pipeline)[:-keep]:
+        shutil.rmtree(os.path.join(RUNS_DIR, pipeline, m["run"]), ignore_errors=True)
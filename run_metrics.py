@@ -0,0 +1,217 @@
+"""
+Stage timing and counters for a sync run, kept as a JSON-lines history.
+
+Every instrumented stage records its wall time, status and counters (rows,
+payload bytes, HTTP calls, retries) per company:
+
+    with stage("fetch", company=cname) as st:
+        for batch in batches:
+            st.add(rows=len(batch))
+
+    @timed("forecast grid")
+    def forecast_grid(...): ...
+
+Counters reported with count() go to every stage open in the current context
+(so a company stage includes its fetch's HTTP calls); worker threads started
+through in_context() report to the stage that started them.
+
+Stage records are appended to RUN_REPORT_PATH when the process exits (or on
+write_report()), one line per stage tagged with the run id, so regressions
+and the slowest stages can be compared across cron runs:
+
+    python run_metrics.py            # slowest stages of the last run vs. the median of earlier runs
+
+Env Vars
+--------
+- RUN_REPORT_PATH  : JSONL history file (default state/run_report.jsonl, kept with the sync state)
+- RUN_REPORT_KEEP  : runs kept in the history (default 200)
+- RUN_ID           : id stamped on this run's records (default GITHUB_RUN_ID, else a timestamp)
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+log = logging.getLogger()
+
+# Same state folder as incremental_sync (cached between workflow runs), without importing the store stack
+STATE_DIR = os.getenv("SYNC_STATE_DIR", os.path.join(os.getcwd(), "state"))
+REPORT_PATH = os.getenv("RUN_REPORT_PATH", os.path.join(STATE_DIR, "run_report.jsonl"))
+KEEP_RUNS = int(os.getenv("RUN_REPORT_KEEP", "200"))
+RUN_ID = os.getenv("RUN_ID") or os.getenv("GITHUB_RUN_ID") or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+COUNTERS = ("rows", "bytes", "http_calls", "retries")
+
+_active: contextvars.ContextVar = contextvars.ContextVar("run_metrics_stages", default=())
+_lock = threading.Lock()
+_records: List[dict] = []
+_registered = False
+
+
+class Stage:
+    """One timed stage; counters are thread-safe since pool workers report into it."""
+
+    def __init__(self, name: str, company: Optional[str] = None, **fields):
+        self.name = name
+        self.company = company
+        self.fields = fields
+        self.counts: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.lock = threading.Lock()
+
+    def add(self, **counts):
+        with self.lock:
+            for key, value in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + (value or 0)
+
+    def note(self, **fields):
+        """Attach extra fields to the record (e.g. cache=hit)."""
+        self.fields.update(fields)
+
+
+class stage:
+    """Context manager timing one pipeline stage; yields the Stage to add counters to."""
+
+    def __init__(self, name: str, company: Optional[str] = None, **fields):
+        parents = _active.get()
+        if company is None and parents:
+            company = parents[-1].company
+        self.stage = Stage(name, company, **fields)
+
+    def __enter__(self) -> Stage:
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.token = _active.set(_active.get() + (self.stage,))
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.t0
+        _active.reset(self.token)
+        st = self.stage
+        record = {
+            "run": RUN_ID,
+            "script": os.path.basename(sys.argv[0]) or "interactive",
+            "stage": st.name,
+            "company": st.company,
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "seconds": round(seconds, 3),
+            **st.counts,
+            "status": "ok" if exc_type is None else "error",
+            **st.fields,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"[:300]
+        _collect(record)
+        return False
+
+
+def timed(name: str):
+    """Decorator form of stage() for whole functions."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def count(**counts):
+    """Add counters (rows, bytes, http_calls, retries) to every stage open in this context."""
+    for st in _active.get():
+        st.add(**counts)
+
+
+def in_context(fn):
+    """Bind `fn` to the caller's open stages, for work handed to a thread pool."""
+    stages = _active.get()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = _active.set(stages)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+    return run
+
+
+# ========= REPORT ==========
+def _collect(record: dict):
+    global _registered
+    with _lock:
+        _records.append(record)
+        if not _registered:
+            atexit.register(write_report)
+            _registered = True
+
+
+def records() -> List[dict]:
+    with _lock:
+        return list(_records)
+
+
+def write_report(path: str = REPORT_PATH) -> int:
+    """Append this process's pending stage records to the history; returns how many were written."""
+    with _lock:
+        pending = list(_records)
+        _records.clear()
+    if not pending:
+        return 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    history = load_history(path) + pending
+    runs = list(dict.fromkeys(r["run"] for r in history))
+    keep = set(runs[-KEEP_RUNS:])
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in history:
+            if r["run"] in keep:
+                f.write(json.dumps(r, default=str) + "\n")
+    os.replace(tmp, path)
+    slowest = max(pending, key=lambda r: r["seconds"])
+    log.info(f"⏱️ Run report: {len(pending)} stages → {path} (slowest: {slowest['stage']} {slowest['company'] or ''} {slowest['seconds']:.1f}s)")
+    return len(pending)
+
+
+def load_history(path: str = REPORT_PATH) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_last_run(history: List[dict], top: int = 10) -> List[dict]:
+    """The last run's stages, slowest first, with the median of the same stage in earlier runs."""
+    if not history:
+        return []
+    last = history[-1]["run"]
+    earlier: Dict[tuple, List[float]] = {}
+    for r in history:
+        if r["run"] != last:
+            earlier.setdefault((r["stage"], r["company"]), []).append(r["seconds"])
+    rows = []
+    for r in history:
+        if r["run"] != last:
+            continue
+        past = earlier.get((r["stage"], r["company"]))
+        median = statistics.median(past) if past else None
+        rows.append({**r, "median": median, "ratio": r["seconds"] / median if median else None})
+    return sorted(rows, key=lambda r: r["seconds"], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    rows = compare_last_run(load_history(), top=int(sys.argv[1]) if len(sys.argv) > 1 else 10)
+    if not rows:
+        print(f"No run history at {REPORT_PATH}")
+    for r in rows:
+        trend = f"{r['ratio']:.2f}x median {r['median']:.1f}s" if r["ratio"] else "no history"
+        flag = " ⚠️" if r["ratio"] and r["ratio"] > 1.5 else ""
+        print(f"{r['seconds']:>8.1f}s  {r['stage']:<28} {r['company'] or '-':<12} rows={r['rows']:<8} "
+              f"http={r['http_calls']:<5} retries={r['retries']:<3} {trend}{flag}")
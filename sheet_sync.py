@@ -0,0 +1,245 @@
+"""
+Diff-based Google Sheets writer.
+
+Keeps the last pushed contents of a worksheet on disk, keyed per ledger row
+(Item Code + Invoice, see incremental_sync.row_keys), and on every push sends
+only the cells that changed as `values.batchUpdate` ranges (sent through
+sheets_uploader.BulkUploader):
+
+- changed rows are rewritten in place (only the changed column span),
+- new rows fill the slots of deleted rows first, then go after the last row,
+- leftover slots at the bottom (when the ledger shrank) are blanked last.
+
+The tab is never cleared, so readers always see a complete ledger. Rows keep
+their slot from run to run rather than the frame's order; every consumer keys
+on Item Code, so order does not matter downstream.
+
+The saved state also holds a fingerprint of the tab as this push left it
+(header row and data height). Before a diff push it is compared with the live
+tab; when another writer changed the tab in between, the push falls back to a
+full rewrite instead of patching cells into foreign contents. Writers of the
+same tab share one state file (named after the tab).
+
+Env Vars
+--------
+- SHEET_SYNC_FULL        : "1" ignores the saved state and rewrites every row (e.g. after manual edits)
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from incremental_sync import KEY_COLS, STATE_DIR, company_slug, row_keys
+from run_metrics import stage
+from sheets_uploader import BulkUploader, GspreadTransport
+
+log = logging.getLogger()
+
+SHEET_STATE_DIR = os.path.join(STATE_DIR, "sheets")
+
+
+def cell_value(value) -> str:
+    """How gspread_dataframe renders a cell: blanks for NaN/NaT, str() for everything else."""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return ""
+    return str(value)
+
+
+def frame_rows(df: pd.DataFrame, key_cols: Sequence[str] = KEY_COLS) -> Dict[str, List[str]]:
+    """{row key: rendered cell values}, in frame order."""
+    values = df.astype(object).where(df.notna(), None)
+    rendered = ([cell_value(v) for v in row] for row in values.itertuples(index=False, name=None))
+    return dict(zip(row_keys(df, list(key_cols)), rendered))
+
+
+def _spans(old: List[str], new: List[str]) -> Optional[Tuple[int, int]]:
+    """First and last differing column (0-based, inclusive), or None when the rows are equal."""
+    diff = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+    return (diff[0], diff[-1]) if diff else None
+
+
+class SheetSync:
+    """
+    Pushes a ledger frame to one worksheet, sending only what changed since the
+    last push recorded for `name`. Rows are matched by `key_cols` (Item Code +
+    Invoice for the labelled ledger).
+    """
+
+    def __init__(self, worksheet, name: str, state_dir: str = SHEET_STATE_DIR, transport=None,
+                 key_cols: Sequence[str] = KEY_COLS):
+        self.worksheet = worksheet
+        self.name = name
+        self.transport = transport
+        self.key_cols = list(key_cols)
+        os.makedirs(state_dir, exist_ok=True)
+        self.path = os.path.join(state_dir, f"{company_slug(name)}.json")
+
+    # ----- state -----
+    def load_state(self):
+        if os.getenv("SHEET_SYNC_FULL", "0") == "1" or not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self, header, slots, rows):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"header": header, "slots": slots, "rows": rows, "fingerprint": self.fingerprint(header, slots, rows)}, f)
+        os.replace(tmp, self.path)
+
+    # ----- fingerprint -----
+    def fingerprint(self, header, slots, rows) -> dict:
+        """The header and data height the tab shows after a push of (slots, rows), measured like _sheet_height."""
+        col = self._height_col(header) - 1
+        height = 0
+        for i, key in enumerate(slots):
+            if key is not None and rows[key][col] != "":
+                height = i + 1
+        return {"header": header, "height": height}
+
+    def live_fingerprint(self, header) -> dict:
+        return {"header": self.worksheet.row_values(1), "height": self._sheet_height(header)}
+
+    def check_state(self, state):
+        """`state` when the live tab still looks like our last push left it, else None (full rewrite)."""
+        if state is None:
+            return None
+        expected = state.get("fingerprint")
+        live = self.live_fingerprint(state["header"])
+        if expected != live:
+            log.warning(f"⚠️ {self.name}: tab changed since the last push (header/rows {live['height']} vs {expected and expected['height']}); rewriting it in full")
+            return None
+        return state
+
+    # ----- planning -----
+    def _range(self, row: int, first_col: int, last_col: int) -> str:
+        title = self.worksheet.title.replace("'", "''")
+        return f"'{title}'!{rowcol_to_a1(row, first_col + 1)}:{rowcol_to_a1(row, last_col + 1)}"
+
+    def plan(self, df: pd.DataFrame, state) -> Tuple[List[dict], list, dict]:
+        """
+        Returns (data, slots, rows): the batchUpdate value ranges to send plus
+        the new slot layout and row contents to save once they are sent.
+        Slot i is sheet row i + 2 (row 1 holds the header); None marks a blank slot.
+        """
+        header = [str(c) for c in df.columns]
+        rows = frame_rows(df, self.key_cols)
+        width = len(header)
+
+        if state is None or state["header"] != header:
+            # No usable state: write everything, then blank whatever the old tab had below it
+            old_height = self._sheet_height(header) if state is None else len(state["slots"])
+            slots = list(rows)
+            updates = {i: (0, width - 1) for i in range(len(slots))}
+            data = [{"range": self._range(1, 0, width - 1), "values": [header]}]
+            blank_from = len(slots)
+            blank_to = max(old_height, len(slots))
+            # ...and to the right of it, when a wider layout was written there before
+            old_width = len(self.worksheet.row_values(1)) if state is None else len(state["header"])
+            if old_width > width:
+                data.append({
+                    "range": f"{self._range(1, width, old_width - 1).split(':')[0]}:{rowcol_to_a1(blank_to + 1, old_width)}",
+                    "values": [[""] * (old_width - width) for _ in range(blank_to + 1)],
+                })
+        else:
+            old_rows = state["rows"]
+            slots = list(state["slots"])
+            updates = {}
+            free = []
+            for i, key in enumerate(slots):
+                if key is None or key not in rows:
+                    slots[i] = None
+                    free.append(i)
+                    continue
+                span = _spans(old_rows[key], rows[key])
+                if span:
+                    updates[i] = span
+            free.reverse()  # fill the topmost holes first
+            for key in rows:
+                if key in old_rows:
+                    continue
+                i = free.pop() if free else len(slots)
+                if i == len(slots):
+                    slots.append(key)
+                else:
+                    slots[i] = key
+                updates[i] = (0, width - 1)
+            # Drop trailing blanks so the tab shrinks; inner blanks stay as free slots
+            blank_to = len(slots)
+            while slots and slots[-1] is None:
+                slots.pop()
+            blank_from = len(slots)
+            data = []
+            # Inner slots vacated this run (no new row took them) need blanking too
+            for i, key in enumerate(slots):
+                if key is None and state["slots"][i] is not None:
+                    data.append({"range": self._range(i + 2, 0, width - 1), "values": [[""] * width]})
+
+        data.extend(self._row_ranges(slots, rows, updates))
+        if blank_to > blank_from:
+            data.append({
+                "range": f"{self._range(blank_from + 2, 0, width - 1).split(':')[0]}:{rowcol_to_a1(blank_to + 1, width)}",
+                "values": [[""] * width for _ in range(blank_to - blank_from)],
+            })
+        return data, slots, rows
+
+    @staticmethod
+    def _height_col(header) -> int:
+        # The Item Code column (Product can be blank), else the first one
+        return header.index("Item Code") + 1 if "Item Code" in header else 1
+
+    def _sheet_height(self, header) -> int:
+        """Data rows currently on the tab, judged by the Item Code column."""
+        return max(len(self.worksheet.col_values(self._height_col(header))) - 1, 0)
+
+    def _ensure_grid(self, n_rows: int, n_cols: int):
+        # values.batchUpdate does not grow the grid, unlike set_with_dataframe
+        if self.worksheet.row_count < n_rows:
+            self.worksheet.add_rows(n_rows - self.worksheet.row_count)
+        if self.worksheet.col_count < n_cols:
+            self.worksheet.add_cols(n_cols - self.worksheet.col_count)
+
+    def _row_ranges(self, slots, rows, updates) -> List[dict]:
+        """Merge consecutive rows with the same changed column span into one range."""
+        data = []
+        run_start, run_span, run_values = None, None, []
+        for i in sorted(updates):
+            span = updates[i]
+            values = rows[slots[i]][span[0]:span[1] + 1]
+            if run_start is not None and span == run_span and i == run_start + len(run_values):
+                run_values.append(values)
+                continue
+            if run_start is not None:
+                data.append(self._block(run_start, run_span, run_values))
+            run_start, run_span, run_values = i, span, [values]
+        if run_start is not None:
+            data.append(self._block(run_start, run_span, run_values))
+        return data
+
+    def _block(self, slot, span, values) -> dict:
+        first = self._range(slot + 2, span[0], span[1])
+        last = rowcol_to_a1(slot + 1 + len(values), span[1] + 1)
+        return {"range": f"{first.split(':')[0]}:{last}", "values": values}
+
+    # ----- push -----
+    def push(self, df: pd.DataFrame) -> int:
+        """Send the minimal update for `df` and record it. Returns the number of ranges sent."""
+        with stage("sheets push", sheet=self.name) as st:
+            state = self.check_state(self.load_state())
+            data, slots, rows = self.plan(df, state)
+            # One spare column for the timestamp written next to the data
+            self._ensure_grid(len(slots) + 1, df.shape[1] + 1)
+            # Blocked, paced and resumable; the checkpoint lives next to this tab's state
+            uploader = BulkUploader(self.transport or GspreadTransport(self.worksheet.spreadsheet), checkpoint_path=f"{self.path}.upload")
+            requests = uploader.upload(data)
+            self.save_state([str(c) for c in df.columns], slots, rows)
+            cells = sum(len(d["values"]) * len(d["values"][0]) for d in data)
+            st.add(rows=len(df))
+            st.note(ranges=len(data), cells=cells, mode="full" if state is None else "diff")
+        log.info(f"🧮 {self.name}: {len(data)} ranges / {cells} cells pushed in {requests} requests ({'full' if state is None else 'diff'})")
+        return len(data)
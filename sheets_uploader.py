@@ -0,0 +1,282 @@
+"""
+Chunked, rate-limited bulk uploader for Google Sheets value ranges.
+
+Splits a list of `values.batchUpdate` ranges into request blocks of bounded
+size (large ranges are cut into row blocks), sends the blocks concurrently
+under a token-bucket budget matching the Sheets write quota, backs off on
+429 / 5xx, and records finished blocks in a checkpoint file so a rerun of the
+same upload resumes after the last block that made it.
+
+The transport is pluggable: GspreadTransport talks to the real API through a
+gspread Spreadsheet, MemoryTransport keeps an in-process grid (with optional
+injected failures) for local runs and benchmarks.
+
+Env Vars
+--------
+- SHEETS_WRITE_QUOTA      : write requests per minute (default 60, the per-user Sheets quota)
+- SHEETS_UPLOAD_WORKERS   : concurrent requests (default 4)
+- SHEETS_BLOCK_CELLS      : max cells per request (default 20000)
+- SHEETS_MAX_RETRIES      : retries per block on 429/5xx (default 6)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Protocol
+
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+from run_metrics import count, in_context
+
+log = logging.getLogger()
+
+WRITE_QUOTA = int(os.getenv("SHEETS_WRITE_QUOTA", "60"))
+UPLOAD_WORKERS = int(os.getenv("SHEETS_UPLOAD_WORKERS", "4"))
+BLOCK_CELLS = int(os.getenv("SHEETS_BLOCK_CELLS", "20000"))
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "6"))
+
+RETRYABLE = {429, 500, 502, 503, 504}
+
+
+class TransientError(Exception):
+    """A request the server asked us to retry (429 / 5xx), with its Retry-After if any."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ========= TRANSPORTS ==========
+class Transport(Protocol):
+    def batch_update(self, data: List[dict]) -> None:
+        ...
+
+
+class GspreadTransport:
+    """Sends value ranges through `Spreadsheet.values_batch_update`."""
+
+    def __init__(self, spreadsheet, value_input_option="USER_ENTERED"):
+        self.spreadsheet = spreadsheet
+        self.value_input_option = value_input_option
+
+    def batch_update(self, data):
+        from gspread.exceptions import APIError
+
+        body = {"valueInputOption": self.value_input_option, "data": data}
+        count(http_calls=1, bytes=len(json.dumps(body, default=str)))
+        try:
+            self.spreadsheet.values_batch_update(body=body)
+        except APIError as e:
+            status = getattr(e.response, "status_code", None)
+            if status in RETRYABLE:
+                retry_after = e.response.headers.get("Retry-After")
+                raise TransientError(status, float(retry_after) if retry_after else None) from e
+            raise
+
+
+class MemoryTransport:
+    """
+    In-process stand-in for the Sheets API: applies ranges to a dict grid.
+    `fail_every=n` answers every n-th request with a 429 to exercise backoff.
+    """
+
+    def __init__(self, fail_every=0, latency=0.0):
+        self.grid: Dict[str, Dict[tuple, str]] = {}
+        self.fail_every = fail_every
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def batch_update(self, data):
+        with self.lock:
+            self.requests += 1
+            fail = self.fail_every and self.requests % self.fail_every == 0
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise TransientError(429, retry_after=0.01)
+        with self.lock:
+            for d in data:
+                title, a1 = split_range(d["range"])
+                g = a1_range_to_grid_range(a1)
+                tab = self.grid.setdefault(title, {})
+                for r, row in enumerate(d["values"]):
+                    for c, v in enumerate(row):
+                        tab[(g["startRowIndex"] + r, g["startColumnIndex"] + c)] = v
+
+    def values(self, title):
+        """The tab as a list of rows (trailing blanks trimmed by the caller)."""
+        tab = self.grid.get(title, {})
+        if not tab:
+            return []
+        n_rows = max(r for r, _ in tab) + 1
+        n_cols = max(c for _, c in tab) + 1
+        return [[tab.get((r, c), "") for c in range(n_cols)] for r in range(n_rows)]
+
+
+# ========= PACING ==========
+class TokenBucket:
+    """
+    `rate_per_minute` tokens per minute, up to `burst` banked. A 429 pauses
+    every caller, not just the one that hit it, since the quota is shared.
+    """
+
+    def __init__(self, rate_per_minute=WRITE_QUOTA, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(wait, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+# ========= BLOCKING ==========
+def split_range(a1):
+    title, _, cells = a1.rpartition("!")
+    return title.strip("'").replace("''", "'"), cells
+
+
+def split_rows(item, max_cells):
+    """Cut one value range into row blocks of at most `max_cells` cells."""
+    values = item["values"]
+    width = max((len(r) for r in values), default=1) or 1
+    rows_per_block = max(1, max_cells // width)
+    if len(values) <= rows_per_block:
+        return [item]
+    prefix, _, cells = item["range"].rpartition("!")
+    g = a1_range_to_grid_range(cells)
+    top, left = g["startRowIndex"] + 1, g["startColumnIndex"] + 1
+    right = left + width - 1
+    pieces = []
+    for start in range(0, len(values), rows_per_block):
+        chunk = values[start:start + rows_per_block]
+        a1 = f"{rowcol_to_a1(top + start, left)}:{rowcol_to_a1(top + start + len(chunk) - 1, right)}"
+        pieces.append({"range": f"{prefix}!{a1}" if prefix else a1, "values": chunk})
+    return pieces
+
+
+def plan_blocks(data, max_cells=BLOCK_CELLS):
+    """Group ranges into request blocks of at most `max_cells` cells each."""
+    blocks, current, size = [], [], 0
+    for item in data:
+        for piece in split_rows(item, max_cells):
+            cells = sum(len(r) for r in piece["values"])
+            if current and size + cells > max_cells:
+                blocks.append(current)
+                current, size = [], 0
+            current.append(piece)
+            size += cells
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _fingerprint(blocks):
+    return hashlib.sha1(json.dumps(blocks, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# ========= UPLOADER ==========
+class BulkUploader:
+    """
+    Sends value ranges as sized, paced, concurrent requests.
+
+    With `checkpoint_path`, finished blocks are recorded as they complete; an
+    upload of the same ranges that failed part-way resumes from there, and the
+    checkpoint is removed once everything has been sent.
+    """
+
+    def __init__(self, transport, checkpoint_path=None, bucket=None, max_workers=UPLOAD_WORKERS,
+                 max_cells=BLOCK_CELLS, max_retries=MAX_RETRIES):
+        self.transport = transport
+        self.checkpoint_path = checkpoint_path
+        self.bucket = bucket or TokenBucket()
+        self.max_workers = max_workers
+        self.max_cells = max_cells
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.retries = 0
+
+    def _load_done(self, fingerprint):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        return set(saved["done"]) if saved.get("fingerprint") == fingerprint else set()
+
+    def _mark_done(self, fingerprint, done):
+        if not self.checkpoint_path:
+            return
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "done": sorted(done)}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _send(self, block):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                self.transport.batch_update(block)
+                return
+            except TransientError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else min(64.0, 2 ** attempt) + random.random()
+                with self.lock:
+                    self.retries += 1
+                count(retries=1)
+                log.warning(f"⏳ Sheets {e}; backing off {delay:.1f}s (retry {attempt + 1}/{self.max_retries})")
+                self.bucket.pause(delay)
+
+    def upload(self, data: List[dict]) -> int:
+        """Send `data` ranges; returns the number of requests made for this call (resumed blocks excluded)."""
+        blocks = plan_blocks(data, self.max_cells)
+        if not blocks:
+            return 0
+        fingerprint = _fingerprint(blocks)
+        done = self._load_done(fingerprint)
+        todo = [i for i in range(len(blocks)) if i not in done]
+        if done:
+            log.info(f"↩️ Resuming upload: {len(done)}/{len(blocks)} blocks already sent")
+
+        def run(i):
+            self._send(blocks[i])
+            with self.lock:
+                done.add(i)
+                self._mark_done(fingerprint, done)
+
+        if self.max_workers <= 1:
+            # Inline: also works at interpreter exit, when no new threads can start
+            for i in todo:
+                run(i)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # list() re-raises the first block that gave up; finished ones stay checkpointed
+                list(pool.map(in_context(run), todo))
+
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return len(todo)
@@ -0,0 +1,203 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# === Store location ===
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.getcwd(), "snapshots"))
+
+# ========= LEDGER SCHEMA ==========
+TEXT_COLS = ["Product", "Item", "Item Code", "Invoice", "Rejected"]
+CATEGORICAL_COLS = ["Category", "Unit", "Po Type", "Shipment Mode"]
+DATE_COLS = ["Receive Date"]
+NUMERIC_COLS = [
+    "Pur Price", "Landed Cost", "Price",
+    "Opening Quantity", "Opening Value", "Receive Quantity", "Receive Value",
+    "Issue Quantity", "Issue Value", "Closing Quantity", "Closing Value",
+]
+
+# Categoricals are stored as plain strings (Parquet dictionary-encodes them on
+# disk anyway) so every batch shares one schema; they come back as pandas
+# categoricals through `read_dictionary` on load.
+ARROW_TYPES = {
+    **{c: pa.string() for c in TEXT_COLS + CATEGORICAL_COLS},
+    **{c: pa.timestamp("ns") for c in DATE_COLS},
+    **{c: pa.float64() for c in NUMERIC_COLS},
+}
+
+
+def _strings(s):
+    # Odoo sends `false` for empty many2one/char fields; keep only real strings
+    return s.where(s.map(lambda v: isinstance(v, str)), None).astype(object)
+
+
+def coerce_ledger(df):
+    """Return a copy of a labelled ledger frame with the store's column dtypes."""
+    df = df.copy()
+    for c in TEXT_COLS:
+        if c in df.columns:
+            df[c] = _strings(df[c])
+    for c in CATEGORICAL_COLS:
+        if c in df.columns:
+            df[c] = _strings(df[c].astype(object)).astype("category")
+    for c in DATE_COLS:
+        if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = pd.to_datetime(_strings(df[c].astype(object)), errors="coerce")
+    for c in NUMERIC_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    return df
+
+
+def as_exported(df):
+    """
+    The inverse of coerce_ledger for display: cells as Odoo hands them out and
+    the web export shows them, i.e. dates as YYYY-MM-DD text and `false` for
+    empty text, category and date values. Measures stay float64.
+    """
+    df = df.copy()
+    for c in TEXT_COLS + CATEGORICAL_COLS + DATE_COLS:
+        if c not in df.columns:
+            continue
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.dt.strftime("%Y-%m-%d")
+        s = s.astype(object)
+        df[c] = s.where(s.notna(), False)
+    return df
+
+
+def arrow_schema(columns):
+    return pa.schema([(c, ARROW_TYPES.get(c, pa.string())) for c in columns])
+
+
+def to_arrow(df, schema):
+    df = coerce_ledger(df)
+    df = df.astype({c: object for c in CATEGORICAL_COLS if c in df.columns})
+    for c in df.columns:
+        if c not in ARROW_TYPES:
+            df[c] = _strings(df[c].astype(object))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+# ========= SNAPSHOT STORE ==========
+class SnapshotWriter:
+    """Append ledger batches to one snapshot partition as they arrive."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+    def write(self, df):
+        if df.empty:
+            return
+        if self.writer is None:
+            self.schema = arrow_schema(df.columns)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        self.writer.write_table(to_arrow(df[self.schema.names], self.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SnapshotStore:
+    """
+    Ledger snapshots partitioned as <root>/company=<slug>/date=<YYYY-MM-DD>/ledger.parquet.
+
+    Each partition is the full opening/closing ledger as computed up to that date.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+
+    @staticmethod
+    def slug(cname):
+        return cname.lower().replace(" ", "")
+
+    def _partition(self, cname, as_of):
+        return os.path.join(self.root, f"company={self.slug(cname)}", f"date={as_of}", "ledger.parquet")
+
+    def path(self, cname, as_of):
+        return self._partition(cname, as_of)
+
+    def writer(self, cname, as_of):
+        return SnapshotWriter(self._partition(cname, as_of))
+
+    def write(self, cname, as_of, df):
+        with self.writer(cname, as_of) as w:
+            w.write(df)
+        return self._partition(cname, as_of)
+
+    def dates(self, cname):
+        """Snapshot dates available for a company, oldest first."""
+        folder = os.path.join(self.root, f"company={self.slug(cname)}")
+        if not os.path.isdir(folder):
+            return []
+        found = []
+        for name in os.listdir(folder):
+            if name.startswith("date=") and os.path.exists(os.path.join(folder, name, "ledger.parquet")):
+                found.append(name[len("date="):])
+        return sorted(found)
+
+    def read(self, cname, as_of, columns=None):
+        path = self._partition(cname, as_of)
+        names = pq.read_schema(path).names
+        if columns is not None:
+            missing = [c for c in columns if c not in names]
+            if missing:
+                raise KeyError(f"Snapshot {cname} {as_of} is missing columns: {missing}")
+            names = list(columns)
+        table = pq.read_table(path, columns=names, read_dictionary=[c for c in CATEGORICAL_COLS if c in names])
+        return table.to_pandas()
+
+    def latest(self, cname, columns=None, as_of=None):
+        """Most recent snapshot on or before `as_of` (any date if None), or None when there is none."""
+        dates = [d for d in self.dates(cname) if as_of is None or d <= str(as_of)]
+        return self.read(cname, dates[-1], columns) if dates else None
+
+    def load(self, cname, start=None, end=None, columns=None):
+        """
+        Concatenate every snapshot dated within [start, end] (inclusive, ISO dates
+        or `date`s), restricted to `columns`, with a "Snapshot Date" column added.
+        """
+        start = str(start) if start else None
+        end = str(end) if end else None
+        frames = []
+        for d in self.dates(cname):
+            if (start and d < start) or (end and d > end):
+                continue
+            df = self.read(cname, d, columns)
+            df.insert(0, "Snapshot Date", pd.Timestamp(d))
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["Snapshot Date"] + list(columns or []))
+        # Categories can differ per snapshot; union them so concat keeps the dtype
+        cats = [c for c in CATEGORICAL_COLS if c in frames[0].columns]
+        if cats and len(frames) > 1:
+            for c in cats:
+                union = pd.api.types.union_categoricals([f[c] for f in frames]).categories
+                for f in frames:
+                    f[c] = f[c].cat.set_categories(union)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,33 @@
+"""
+Shared setup for the unit tests.
+
+The modules under test are flat scripts at the repo root, and the fakes
+(fake_odoo, fake_sheets) live in benchmarks/. State folders are resolved from
+env vars at import time, so they point at a throwaway folder before anything
+is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+_STATE = tempfile.mkdtemp(prefix="tests_state_")
+os.environ.setdefault("SYNC_STATE_DIR", _STATE)
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(_STATE, "snapshots"))
+os.environ.setdefault("XLSX_CACHE_DIR", "")
+
+SAMPLE_XLSX = os.path.join(ROOT, "download", "zipper_opening_closing_2025-09-01.xlsx")
+
+
+@pytest.fixture(scope="session")
+def sample_ledger() -> pd.DataFrame:
+    """The committed Zipper download as a typed ledger frame."""
+    from xlsx_loader import load_report
+
+    return load_report(SAMPLE_XLSX, engine="openpyxl", cache=False)
@@ -0,0 +1,97 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast_engine import compute_top_forecasts, forecast_grid, select_top
+from ledger import Ledger
+
+
+def baseline_forecasts(df_main: pd.DataFrame, lookback_days: int = 7, horizon_days: int = 10) -> Dict[str, float]:
+    """The notebook's original per-item groupby forecast, kept as the reference."""
+    df = df_main.copy()
+    df["Issue Quantity"] = pd.to_numeric(df["Issue Quantity"], errors="coerce").fillna(0)
+    df["Receive Date"] = pd.to_datetime(df["Receive Date"], errors="coerce")
+    df["Consumption"] = df["Issue Quantity"].abs()
+
+    forecast_map = {}
+    for code, dfg in df.groupby("Item Code"):
+        d = (
+            dfg.dropna(subset=["Receive Date"])
+              .groupby(pd.Grouper(key="Receive Date", freq="D"))["Consumption"]
+              .sum()
+              .sort_index()
+        )
+        if d.size < lookback_days:
+            continue
+        last_date = d.index.max()
+        full_idx = pd.date_range(end=last_date, periods=lookback_days, freq="D")
+        d_last = d.reindex(full_idx, fill_value=0.0)
+        forecast_val = float(d_last.tail(lookback_days).mean()) * float(horizon_days)
+        if np.isfinite(forecast_val) and forecast_val > 0:
+            forecast_map[str(code)] = round(forecast_val, 2)
+    return forecast_map
+
+
+def synthetic_ledger(seed=0, rows=3000):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, rows), unit="D")
+    df = pd.DataFrame({
+        "Item Code": rng.choice([f"R_{i:03d}" for i in range(60)], rows).astype(object),
+        "Receive Date": pd.Series(dates).dt.strftime("%Y-%m-%d").astype(object),
+        "Issue Quantity": -rng.gamma(2.0, 10.0, rows).round(2),
+    })
+    # Blank dates, text quantities and missing codes as a Sheets load has them
+    df.loc[rng.choice(rows, 40, replace=False), "Receive Date"] = None
+    df.loc[rng.choice(rows, 20, replace=False), "Issue Quantity"] = np.nan
+    df.loc[rng.choice(rows, 10, replace=False), "Item Code"] = None
+    return df
+
+
+@pytest.mark.parametrize("lookback,horizon", [(7, 10), (14, 30), (1, 1), (60, 7)])
+def test_matches_baseline_on_synthetic_ledger(lookback, horizon):
+    df = synthetic_ledger()
+    assert compute_top_forecasts(df, lookback, horizon) == baseline_forecasts(df, lookback, horizon)
+
+
+def test_matches_baseline_on_sample_download(sample_ledger):
+    expected = baseline_forecasts(sample_ledger)
+    assert compute_top_forecasts(sample_ledger) == expected
+    assert compute_top_forecasts(Ledger.from_frame(sample_ledger)) == expected
+
+
+def test_key_canonicalises_codes():
+    df = pd.DataFrame({
+        "Item Code": [101, 101.0, "101"],
+        "Receive Date": ["2025-01-01", "2025-01-02", "2025-01-02"],
+        "Issue Quantity": [-1.0, -2.0, -3.0],
+    })
+    forecasts = compute_top_forecasts(df, lookback_days=1, horizon_days=1, key=lambda c: str(int(float(c))))
+    assert list(forecasts) == ["101"]
+
+
+def test_select_top_orders_by_forecast():
+    assert list(select_top({"a": 1.0, "b": 5.0, "c": 3.0}, 2)) == ["b", "c"]
+
+
+def test_grid_agrees_with_single_forecasts():
+    df = synthetic_ledger(seed=1)
+    grid = forecast_grid(df, lookbacks=[7, 14], horizons=[10, 30])
+    for (lb, h), part in grid.groupby(["Lookback Days", "Horizon Days"]):
+        single = compute_top_forecasts(df, lookback_days=lb, horizon_days=h)
+        got = dict(zip(part["Item Code"], part["Forecast"]))
+        assert got.keys() == single.keys()
+        assert all(abs(got[k] - single[k]) <= 0.011 for k in got)
+        assert part["Rank"].tolist() == list(range(1, len(part) + 1))
+
+
+@pytest.mark.parametrize("lookbacks,horizons", [([0, 7], [10]), ([7], [-1])])
+def test_grid_rejects_non_positive_days(lookbacks, horizons):
+    with pytest.raises(ValueError):
+        forecast_grid(synthetic_ledger(), lookbacks=lookbacks, horizons=horizons)
+
+
+def test_missing_columns_raise():
+    with pytest.raises(KeyError):
+        compute_top_forecasts(pd.DataFrame({"Item Code": ["A"]}))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from incremental_sync import changed_rows, merge_window, row_hashes, row_keys
+
+
+def test_row_keys_number_repeated_pairs():
+    df = pd.DataFrame({"Item Code": ["A", "A", "B"], "Invoice": ["I1", "I1", "I1"]})
+    assert list(row_keys(df)) == ["A|I1#0", "A|I1#1", "B|I1#0"]
+
+
+def test_row_keys_treat_missing_values_as_blank():
+    # Odoo `false`, None and NaN all mean "no value", in object and categorical columns
+    df = pd.DataFrame({
+        "Item Code": pd.Series(["A", None, "B", "A", np.nan], dtype=object),
+        "Invoice": pd.Series([np.nan, "I1", False, None, "I2"], dtype=object),
+    })
+    assert list(row_keys(df)) == ["A|#0", "|I1#0", "B|#0", "A|#1", "|I2#0"]
+    df["Invoice"] = df["Invoice"].replace({False: None}).astype("category")
+    assert list(row_keys(df)) == ["A|#0", "|I1#0", "B|#0", "A|#1", "|I2#0"]
+
+
+def test_row_keys_other_columns_and_empty_frame():
+    df = pd.DataFrame({"id": [3, 1, 3]})
+    assert list(row_keys(df, ["id"])) == ["3#0", "1#0", "3#1"]
+    assert list(row_keys(df.iloc[:0], ["id"])) == []
+
+
+def test_changed_rows_with_missing_invoice():
+    df = pd.DataFrame({"Item Code": ["A", "B"], "Invoice": [None, "I1"], "Closing Quantity": [1.0, 2.0]})
+    _, hashes = changed_rows(df, None)
+    assert set(hashes) == {"A|#0", "B|I1#0"}
+
+    edited = df.assign(**{"Closing Quantity": [1.0, 5.0]})
+    changed, new_hashes = changed_rows(edited, hashes)
+    assert list(changed["Item Code"]) == ["B"]
+    assert new_hashes == row_hashes(edited)
+
+
+def test_merge_window_keeps_openings_and_adds_flows():
+    snapshot = pd.DataFrame({
+        "Item Code": ["A", "B"], "Invoice": ["I1", None],
+        "Opening Quantity": [10.0, 5.0], "Issue Quantity": [-2.0, -1.0], "Closing Quantity": [8.0, 4.0],
+    })
+    window = pd.DataFrame({
+        "Item Code": ["A", "C"], "Invoice": ["I1", "I9"],
+        "Opening Quantity": [8.0, 3.0], "Issue Quantity": [-3.0, -1.0], "Closing Quantity": [5.0, 2.0],
+    })
+    merged = merge_window(snapshot, window)
+    assert list(merged["Item Code"]) == ["A", "B", "C"]
+    assert merged["Opening Quantity"].tolist() == [10.0, 5.0, 3.0]
+    assert merged["Issue Quantity"].tolist() == [-5.0, -1.0, -1.0]
+    assert merged["Closing Quantity"].tolist() == [5.0, 4.0, 2.0]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from json_stream import RecordStream
+
+RECORDS = [
+    {"id": 1, "pr_code": "R_01", "lot_id": {"id": 7, "display_name": "EXP/1 é \"q\" ]"}, "issue_qty": -1.5},
+    {"id": 2, "pr_code": False, "lot_id": False, "issue_qty": 0.0},
+    {"id": 3, "pr_code": "R_€", "lot_id": None, "issue_qty": 1e-3, "nested": [{"a": [1, 2]}, {}]},
+]
+
+
+def body(records=RECORDS, length=True):
+    result = {"length": len(records), "records": records} if length else {"records": records, "length": len(records)}
+    return json.dumps({"jsonrpc": "2.0", "id": None, "result": result}, ensure_ascii=False).encode("utf-8")
+
+
+def chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("length_first", [True, False])
+def test_every_split_point_yields_the_same_records(length_first):
+    data = body(length=length_first)
+    # Two chunks split at every byte: records, strings and multi-byte characters cut in half
+    for cut in range(1, len(data)):
+        stream = RecordStream([data[:cut], data[cut:]])
+        assert list(stream) == RECORDS, cut
+        assert stream.length == len(RECORDS)
+        assert stream.bytes == len(data)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 1 << 16])
+def test_small_chunks_and_batches(size):
+    records = [{"id": i, "name": f"row {i}"} for i in range(25)]
+    stream = RecordStream(chunks(body(records), size))
+    batches = list(stream.batches(10))
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [r for b in batches for r in b] == records
+    assert stream.count == 25 and stream.length == 25
+
+
+def test_empty_records():
+    stream = RecordStream(chunks(body([]), 5))
+    assert list(stream) == []
+    assert stream.length == 0
+
+
+def test_error_body_is_parsed_whole():
+    error = {"code": 200, "message": "Odoo Server Error", "data": {"name": "odoo.exceptions.AccessError"}}
+    data = json.dumps({"jsonrpc": "2.0", "id": None, "error": error}).encode()
+    stream = RecordStream(chunks(data, 4))
+    assert list(stream) == []
+    assert stream.error == error
+
+
+def test_truncated_body_raises():
+    data = body()
+    with pytest.raises(ValueError, match="Truncated"):
+        list(RecordStream([data[: len(data) // 2]]))
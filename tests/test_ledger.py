@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import Ledger
+from snapshot_store import SnapshotStore, coerce_ledger
+
+TEXT = ["Product", "Category", "Item", "Item Code", "Invoice", "Unit", "Po Type", "Rejected", "Shipment Mode"]
+MEASURES = ["Opening Quantity", "Issue Quantity", "Closing Quantity", "Closing Value"]
+
+
+def small_ledger():
+    return coerce_ledger(pd.DataFrame({
+        "Product": ["METAL 4", "METAL 4", None],
+        "Category": ["B", "A", "B"],
+        "Item": ["Wire", "Slider", "Wire"],
+        "Item Code": ["R_02", "R_01", "R_02"],
+        "Invoice": ["EXP/1", None, "EXP/2"],
+        "Receive Date": ["2025-01-03", None, "2025-02-01"],
+        "Unit": ["kg", "pcs", "kg"],
+        "Opening Quantity": [10.0, 5.0, np.nan],
+        "Issue Quantity": [-2.0, 0.0, -1.5],
+        "Closing Quantity": [8.0, 5.0, 3.5],
+        "Closing Value": [80.0, 50.0, 35.0],
+        "Po Type": [False, "Import", "Local"],
+    }))
+
+
+def assert_same_rows(ledger, df):
+    assert len(ledger) == len(df)
+    for c in df.columns:
+        if c in ledger.codes:
+            expected = [v if isinstance(v, str) else None for v in df[c].astype(object)]
+            assert ledger.strings(c).tolist() == expected, c
+        elif c in ledger.dates:
+            np.testing.assert_array_equal(ledger.dates[c], df[c].to_numpy("datetime64[ns]"))
+        else:
+            np.testing.assert_array_equal(ledger.measure(c), df[c].to_numpy("float64"))
+
+
+def test_frame_round_trip():
+    df = small_ledger()
+    ledger = Ledger.from_frame(df)
+    assert_same_rows(ledger, df)
+    assert ledger.columns == list(df.columns)
+    view = ledger.frame(["Item Code", "Issue Quantity"])
+    assert view["Item Code"].astype(object).tolist() == df["Item Code"].tolist()
+    assert view["Issue Quantity"].tolist() == df["Issue Quantity"].tolist()
+
+
+def test_vocabulary_is_shared_and_sorted():
+    ledger = Ledger.from_frame(small_ledger())
+    assert list(ledger.vocab) == sorted(ledger.vocab)
+    assert len(set(ledger.vocab)) == len(ledger.vocab)
+    assert ledger.code("R_01") >= 0 and ledger.vocab[ledger.code("R_01")] == "R_01"
+    assert ledger.code("nope") == -1
+    # Comparing codes orders rows like comparing the strings
+    codes = ledger.codes["Item Code"]
+    assert (codes[0] > codes[1]) == ("R_02" > "R_01")
+
+
+def test_arrays_are_read_only():
+    ledger = Ledger.from_frame(small_ledger())
+    with pytest.raises(ValueError):
+        ledger.measure("Issue Quantity")[0] = 1.0
+
+
+def test_parquet_round_trip_matches_frame(tmp_path, sample_ledger):
+    store = SnapshotStore(str(tmp_path))
+    store.write("Zipper", "2025-09-01", sample_ledger)
+    from_parquet = Ledger.from_parquet(store.path("Zipper", "2025-09-01"))
+    from_frame = Ledger.from_frame(sample_ledger)
+    assert_same_rows(from_parquet, coerce_ledger(sample_ledger))
+    assert list(from_parquet.vocab) == list(from_frame.vocab)
+    for c in from_frame.codes:
+        np.testing.assert_array_equal(from_parquet.codes[c], from_frame.codes[c])
+
+
+def test_snapshots_stack_with_their_date(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first = small_ledger()
+    second = coerce_ledger(first.assign(**{"Item Code": ["R_03", "R_01", "R_02"]}))
+    store.write("Zipper", "2025-01-31", first)
+    store.write("Zipper", "2025-02-28", second)
+
+    stacked = Ledger.from_snapshots(store, "Zipper")
+    assert len(stacked) == 6
+    assert stacked.strings("Item Code").tolist() == first["Item Code"].tolist() + second["Item Code"].tolist()
+    dates = pd.to_datetime(stacked.dates["Snapshot Date"])
+    assert [str(d.date()) for d in dates] == ["2025-01-31"] * 3 + ["2025-02-28"] * 3
+
+    only_second = Ledger.from_snapshots(store, "Zipper", start="2025-02-01")
+    assert_same_rows(only_second, second)
@@ -0,0 +1,116 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import run_manifest
+from run_manifest import RunManifest, latest_unfinished
+
+
+@pytest.fixture(autouse=True)
+def runs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_manifest, "RUNS_DIR", str(tmp_path / "runs"))
+    return tmp_path / "runs"
+
+
+def fail(manifest, company, stage):
+    with pytest.raises(RuntimeError):
+        with manifest.step(company, stage):
+            raise RuntimeError("push failed")
+
+
+def test_finish_marks_a_clean_run_finished():
+    manifest = RunManifest.open("demo", run_id="run1")
+    with manifest.step("Zipper", "fetch") as step:
+        step.note(rows=3)
+    assert manifest.finish("demo.py") is True
+    assert manifest.state["finished"]
+    assert latest_unfinished("demo") is None
+
+
+def test_failed_stage_keeps_the_run_open():
+    manifest = RunManifest.open("demo", run_id="run1")
+    with manifest.step("Zipper", "fetch"):
+        pass
+    fail(manifest, "Zipper", "sheets push")
+    assert manifest.failures() == {"Zipper": ["sheets push"]}
+    assert manifest.finish("demo.py") is False
+    assert manifest.state["finished"] is None
+    assert latest_unfinished("demo") == "run1"
+    entry = manifest.entry("Zipper", "sheets push")
+    assert entry["status"] == "failed" and "push failed" in entry["error"]
+
+
+def test_resume_skips_done_stages_and_reloads_their_frame():
+    first = RunManifest.open("demo", run_id="run1")
+    df = pd.DataFrame({"Item Code": ["A", "B"], "Closing Quantity": [1.0, 2.0]})
+    with first.step("Zipper", "fetch") as step:
+        step.keep_frame(df)
+        step.note(rows=len(df))
+    fail(first, "Zipper", "sheets push")
+    assert first.finish("demo.py") is False
+
+    resumed = RunManifest.open("demo", resume=True, run_id="run2")
+    assert resumed.run_id == "run1"
+    assert resumed.done("Zipper", "fetch")
+    assert resumed.get("Zipper", "fetch")["rows"] == 2
+    pd.testing.assert_frame_equal(resumed.frame("Zipper", "fetch"), df)
+    assert not resumed.done("Zipper", "sheets push")
+
+    with resumed.step("Zipper", "sheets push"):
+        pass
+    assert resumed.finish("demo.py") is True
+    with open(os.path.join(resumed.folder, "manifest.json"), encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["finished"] and saved["resumed"]
+
+
+def test_resume_without_an_unfinished_run_starts_fresh():
+    done = RunManifest.open("demo", run_id="run1")
+    assert done.finish("demo.py")
+    fresh = RunManifest.open("demo", resume=True, run_id="run2")
+    assert fresh.run_id == "run2"
+    assert fresh.state["companies"] == {}
+
+
+def test_stage_with_missing_artifact_is_not_done(tmp_path):
+    manifest = RunManifest.open("demo", run_id="run1")
+    path = tmp_path / "export.xlsx"
+    path.write_bytes(b"x")
+    with manifest.step("Zipper", "export") as step:
+        step.keep_file(str(path))
+    assert manifest.done("Zipper", "export")
+    path.unlink()
+    assert not manifest.done("Zipper", "export")
+
+
+def test_ephemeral_manifest_keeps_frames_in_memory():
+    manifest = RunManifest.ephemeral()
+    df = pd.DataFrame({"x": [1]})
+    with manifest.step("Zipper", "fetch") as step:
+        step.keep_frame(df)
+    assert manifest.frame("Zipper", "fetch") is df
+    assert manifest.finish("demo.py")
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_odoo_session_failure_fails_the_run(monkeypatch, parallel):
+    import Mt_Zip_db
+
+    class Unreachable(Mt_Zip_db.OdooClient):
+        def login(self):
+            raise ConnectionError("Odoo unreachable")
+
+    def login():
+        raise ConnectionError("Odoo unreachable")
+
+    monkeypatch.setattr(Mt_Zip_db, "OdooClient", Unreachable)
+    monkeypatch.setattr(Mt_Zip_db, "login", login)
+    manifest = RunManifest.open("mt_zip_db", run_id="run1")
+    results = Mt_Zip_db.run_companies(companies={1: "Zipper", 3: "Metal Trims"}, parallel=parallel, manifest=manifest)
+
+    assert all(isinstance(r, ConnectionError) for r in results.values())
+    assert manifest.failures() == {"Zipper": ["login"], "Metal Trims": ["login"]}
+    assert manifest.finish("Mt_Zip_db.py") is False
+    assert latest_unfinished("mt_zip_db") == "run1"
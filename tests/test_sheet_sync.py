@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from fake_sheets import FakeSpreadsheet
+from sheet_sync import SheetSync, frame_rows
+
+
+@pytest.fixture
+def tab():
+    spreadsheet = FakeSpreadsheet("sheet-key")
+    return spreadsheet, spreadsheet.worksheet("Zipper")
+
+
+def ledger(rows):
+    return pd.DataFrame(rows, columns=["Item Code", "Invoice", "Closing Quantity"])
+
+
+def shown(spreadsheet):
+    """The tab as {rendered row key: cells}, ignoring slot order and blank rows."""
+    grid = spreadsheet.values("Zipper")
+    header = grid[0][:3]
+    body = [r[:3] + [""] * (3 - len(r[:3])) for r in grid[1:]]
+    body = [r for r in body if any(v != "" for v in r)]
+    return header, sorted(body)
+
+
+def expected(df):
+    return [str(c) for c in df.columns], sorted(frame_rows(df).values())
+
+
+def test_first_push_writes_everything(tab, tmp_path):
+    spreadsheet, ws = tab
+    df = ledger([["A", "I1", 1.0], ["B", None, 2.0]])
+    SheetSync(ws, "Zipper", state_dir=str(tmp_path)).push(df)
+    assert shown(spreadsheet) == expected(df)
+
+
+def test_diff_push_sends_only_changed_cells(tab, tmp_path):
+    spreadsheet, ws = tab
+    sync = SheetSync(ws, "Zipper", state_dir=str(tmp_path))
+    sync.push(ledger([["A", "I1", 1.0], ["B", None, 2.0], ["C", "I3", 3.0]]))
+    before = spreadsheet.cells
+
+    df = ledger([["A", "I1", 1.0], ["B", None, 7.0], ["C", "I3", 3.0]])
+    assert sync.push(df) == 1
+    assert spreadsheet.cells - before == 1
+    assert shown(spreadsheet) == expected(df)
+
+
+def test_missing_keys_and_reordered_rows(tab, tmp_path):
+    spreadsheet, ws = tab
+    sync = SheetSync(ws, "Zipper", state_dir=str(tmp_path))
+    sync.push(ledger([[None, None, 1.0], ["A", None, 2.0], ["A", None, 3.0]]))
+    before = spreadsheet.cells
+
+    # Same rows in another order: nothing to send
+    df = ledger([["A", None, 2.0], [None, None, 1.0], ["A", None, 3.0]])
+    assert sync.push(df) == 0
+    assert spreadsheet.cells == before
+    assert shown(spreadsheet) == expected(df)
+
+
+def test_deleted_rows_free_their_slots(tab, tmp_path):
+    spreadsheet, ws = tab
+    sync = SheetSync(ws, "Zipper", state_dir=str(tmp_path))
+    sync.push(ledger([["A", "I1", 1.0], ["B", "I2", 2.0], ["C", "I3", 3.0]]))
+
+    df = ledger([["A", "I1", 1.0], ["D", "I4", 4.0]])
+    sync.push(df)
+    assert shown(spreadsheet) == expected(df)
+
+    df = ledger([["A", "I1", 1.0]])
+    sync.push(df)
+    assert shown(spreadsheet) == expected(df)
+    assert len([r for r in spreadsheet.values("Zipper") if any(v != "" for v in r[:3])]) == 2
+
+
+def test_foreign_write_forces_a_full_rewrite(tab, tmp_path):
+    spreadsheet, ws = tab
+    sync = SheetSync(ws, "Zipper", state_dir=str(tmp_path))
+    sync.push(ledger([["A", "I1", 1.0], ["B", "I2", 2.0]]))
+
+    # Another writer replaces the tab with a wider, longer layout
+    spreadsheet.write("Zipper", "A1", [["Item Code", "Invoice", "Closing Quantity", "Extra"]]
+                      + [[f"X{i}", "", "9", "x"] for i in range(5)])
+    df = ledger([["A", "I1", 1.0], ["B", "I2", 2.0]])
+    sync.push(df)
+    grid = spreadsheet.values("Zipper")
+    assert shown(spreadsheet) == expected(df)
+    assert all(len(r) < 4 or r[3] == "" for r in grid)
+
+    # ...after which diffs resume
+    before = spreadsheet.cells
+    assert sync.push(df) == 0
+    assert spreadsheet.cells == before
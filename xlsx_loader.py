@@ -0,0 +1,177 @@
+"""
+Fast loader for the exported "Stock Opening Closing Report" workbooks.
+
+pd.read_excel through openpyxl builds a cell object for every cell of the
+sheet and then infers dtypes; for the Selenium downloads that is most of the
+time spent handling the file. load_report() instead:
+
+- uses the calamine engine (Rust, `python-calamine`) when it is installed,
+  otherwise streams the rows with openpyxl in read-only mode;
+- types the columns once, straight into the ledger dtypes of the snapshot
+  store (float64 measures, datetime64 dates, categoricals, object text);
+- caches the parsed frame as Parquet keyed by the file's content hash, so
+  reprocessing the same download is a Parquet read.
+
+With as_stored=True the cells are kept as the workbook stores them, typed the
+way pd.read_excel infers them (text dates stay text, FALSE stays False), for
+callers that mirror the export as is, like the Zipper tab.
+
+    df = load_report(latest_file)
+    df = load_report(latest_file, columns=["Item Code", "Closing Quantity"])
+    df = load_report(latest_file, as_stored=True)
+
+Env Vars
+--------
+- XLSX_ENGINE     : "auto" (default: calamine if installed, else openpyxl), "calamine" or "openpyxl"
+- XLSX_CACHE_DIR  : parsed-report cache folder (default state/xlsx_cache; "" disables the cache)
+- XLSX_CACHE_KEEP : cached reports kept, oldest removed first (default 20)
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+from operator import itemgetter
+from typing import List, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from record_decoder import KIND_CONVERTERS, gc_paused, ledger_kind, typed_frame
+from run_metrics import STATE_DIR, stage
+from snapshot_store import coerce_ledger
+
+log = logging.getLogger()
+
+ENGINE = os.getenv("XLSX_ENGINE", "auto")
+CACHE_DIR = os.getenv("XLSX_CACHE_DIR", os.path.join(STATE_DIR, "xlsx_cache"))
+CACHE_KEEP = int(os.getenv("XLSX_CACHE_KEEP", "20"))
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+
+# Bump when the parsed frame changes shape or dtypes, so old cache entries are not reused
+LOADER_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _engine(engine: str) -> str:
+    if engine == "auto":
+        return "calamine" if HAS_CALAMINE else "openpyxl"
+    if engine == "calamine" and not HAS_CALAMINE:
+        raise ImportError("XLSX_ENGINE=calamine needs the python-calamine package")
+    return engine
+
+
+def _stored(values, n):
+    # What pd.read_excel makes of a column: numbers become int64/float64, anything mixed stays as stored
+    return pd.Series(KIND_CONVERTERS["raw"](values, n), dtype=object).infer_objects().to_numpy()
+
+
+# ========= READERS ==========
+def _read_calamine(path: str, columns: Optional[List[str]], sheet, as_stored: bool) -> pd.DataFrame:
+    df = pd.read_excel(path, engine="calamine", sheet_name=sheet or 0, usecols=columns)
+    return df if as_stored else coerce_ledger(df)
+
+
+def _read_openpyxl(path: str, columns: Optional[List[str]], sheet, as_stored: bool) -> pd.DataFrame:
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.worksheets[0]
+        # Exports do not always carry a correct <dimension>; read rows until they end instead
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        labels = [h for h in header if h] if columns is None else list(columns)
+        missing = [c for c in labels if c not in header]
+        if missing:
+            raise KeyError(f"{os.path.basename(path)} is missing columns: {missing}")
+        index = [header.index(c) for c in labels]
+        width = max(index) + 1 if index else 0
+        pick = itemgetter(*index) if len(index) > 1 else (lambda row: (row[index[0]],))
+
+        with gc_paused():
+            picked = []
+            for row in rows:
+                if len(row) < width:
+                    row = row + (None,) * (width - len(row))
+                values = pick(row)
+                if any(v is not None and v != "" for v in values):
+                    picked.append(values)
+            n = len(picked)
+            table = list(zip(*picked)) if n else [[] for _ in labels]
+            converters = [_stored if as_stored else KIND_CONVERTERS[ledger_kind(label)] for label in labels]
+            return typed_frame(labels, converters, table, n)
+    finally:
+        wb.close()
+
+
+READERS = {"calamine": _read_calamine, "openpyxl": _read_openpyxl}
+
+
+# ========= CACHE ==========
+def _cache_path(digest: str, columns: Optional[List[str]], sheet) -> str:
+    key = hashlib.sha256(repr((digest, columns, sheet, LOADER_VERSION)).encode()).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, f"{key}.parquet")
+
+
+def _from_cache(path: str) -> pd.DataFrame:
+    # Parquet hands text back as strings; restore the object columns and categories a fresh parse has
+    df = coerce_ledger(pd.read_parquet(path))
+    for c in df.columns:
+        if isinstance(df[c].dtype, pd.CategoricalDtype) and df[c].cat.categories.dtype != object:
+            df[c] = df[c].cat.rename_categories(pd.Index(df[c].cat.categories, dtype=object))
+    return df
+
+
+def _prune(keep: int):
+    entries = sorted(
+        (os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".parquet")),
+        key=os.path.getmtime,
+    )
+    for path in entries[:-keep] if keep > 0 else []:
+        os.remove(path)
+
+
+def load_report(path: str, columns: Optional[List[str]] = None, sheet: Optional[str] = None,
+                engine: str = ENGINE, cache: bool = True, as_stored: bool = False) -> pd.DataFrame:
+    """
+    The report sheet as a typed ledger frame, restricted to `columns` (all
+    non-empty headers if None). Rows with no value in any selected column are
+    dropped, like pd.read_excel drops trailing blank rows.
+
+    With `as_stored` the cells keep their stored values instead of the ledger
+    dtypes. Those frames are not cached: mixed columns (FALSE among text) do
+    not round-trip through Parquet.
+    """
+    with stage("xlsx load", file=os.path.basename(path)) as st:
+        cached = None
+        if cache and CACHE_DIR and not as_stored:
+            digest = file_hash(path)
+            cached = _cache_path(digest, list(columns) if columns is not None else None, sheet)
+            if os.path.exists(cached):
+                df = _from_cache(cached)
+                os.utime(cached)
+                st.note(cache="hit")
+                st.add(rows=len(df))
+                log.info(f"♻️ {os.path.basename(path)}: parsed report reused from cache ({len(df)} rows)")
+                return df
+
+        engine = _engine(engine)
+        df = READERS[engine](path, columns, sheet, as_stored)
+        st.note(cache="miss" if cached else "off", engine=engine)
+        st.add(rows=len(df), bytes=os.path.getsize(path))
+        log.info(f"📥 {os.path.basename(path)}: {len(df)} rows × {df.shape[1]} columns via {engine}")
+
+        if cached:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{cached}.tmp"
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, cached)
+            _prune(CACHE_KEEP)
+        return df